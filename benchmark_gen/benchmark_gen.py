@@ -0,0 +1,137 @@
+from string import Template
+
+from .utils import *
+from utils.input_synth import param_kinds, generator_source
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Generated modules depend only on the standard library and the target module
+BENCHMARK_TEMPLATE = Template('''"""
+Performance benchmark for $function_name (generated by Autotest).
+
+Run:  python $module_file [--output results.json]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from $import_path import $function_name
+
+FUNCTION = "$function_name"
+SIZES = $sizes
+REPEATS = 7
+MIN_TIME = 0.2  # seconds per timing sample; loop counts calibrate to reach it
+
+
+def make_args(n, rng):
+    return ($arg_exprs)
+
+
+def bench(n):
+    rng = random.Random(n)
+    args = make_args(n, rng)
+    try:
+        $function_name(*args)
+    except Exception as e:
+        return {"n": n, "error": f"{type(e).__name__}: {e}"}
+
+    timer = timeit.Timer(lambda: $function_name(*args))
+    # Calibrate: scale the loop count until one sample takes at least MIN_TIME
+    number = 1
+    elapsed = timer.timeit(number)
+    while elapsed < MIN_TIME and number < 10 ** 8:
+        number = int(number * min(10.0, 1.2 * MIN_TIME / max(elapsed, 1e-9))) + 1
+        elapsed = timer.timeit(number)
+    samples = [t / number for t in timer.repeat(repeat=REPEATS, number=number)]
+    quartiles = statistics.quantiles(samples, n=4)
+    return {
+        "n": n,
+        "number": number,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples),
+        "iqr": quartiles[2] - quartiles[0],
+    }
+
+
+def main(argv):
+    results = {"function": FUNCTION, "module": "$import_path", "results": [bench(n) for n in SIZES]}
+    if "--output" in argv:
+        path = argv[argv.index("--output") + 1]
+        merged = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                merged = json.load(f)
+        merged[FUNCTION] = results
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+''')
+
+
+class BenchmarkGenAgent(Runnable):
+    """
+    Emits a standard-library-only microbenchmark module per testable function,
+    alongside the unit tests generated by TestSuiteGenAgent.
+
+    Inputs are synthesized at several sizes from parameter type hints (or,
+    failing that, parameter names); timing loops self-calibrate and each size
+    reports min/median/mean/stdev/IQR. Compare runs against a stored baseline
+    with `python -m benchmark_gen.compare`.
+    """
+
+    def invoke(self, input_dict: dict) -> list:
+        """
+        Args:
+            input_dict: {
+                "blueprints": List[dict],        # blueprints of testable functions
+                "output_dir": <str>,             # directory for bench_<function>.py modules
+                "sizes": List[int]               # (Optional) input sizes, default DEFAULT_SIZES
+            }
+        Returns:
+            List of dicts, one per blueprint:
+            {
+                "function_name": ...,
+                "benchmark_filename": ...,
+                "status": "written" | "skipped_no_code" | <error>
+            }
+        """
+        blueprints = input_dict.get("blueprints", [])
+        output_dir = input_dict.get("output_dir", "benchmarks")
+        sizes = list(input_dict.get("sizes") or DEFAULT_SIZES)
+
+        os.makedirs(output_dir, exist_ok=True)
+        results = []
+        for bp in blueprints:
+            function_name = bp.get("function_name", "")
+            code = bp.get("code", "")
+            filename = os.path.join(output_dir, f"bench_{function_name}.py")
+            if not function_name or not code:
+                results.append({"function_name": function_name, "benchmark_filename": "", "status": "skipped_no_code"})
+                continue
+
+            kinds = [kind for _, kind in param_kinds(code)]
+            arg_exprs = "".join(f"{generator_source(kind)}, " for kind in kinds).rstrip(" ")
+            module = BENCHMARK_TEMPLATE.substitute(
+                function_name=function_name,
+                import_path=bp.get("import_path", ""),
+                module_file=os.path.basename(filename),
+                sizes=repr(sizes),
+                arg_exprs=arg_exprs,
+            )
+            try:
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write(module)
+                results.append({"function_name": function_name, "benchmark_filename": filename, "status": "written"})
+            except Exception as e:
+                results.append({"function_name": function_name, "benchmark_filename": filename, "status": f"error: {e}"})
+        return results
@@ -0,0 +1,104 @@
+"""
+Run generated benchmarks and flag regressions against a stored baseline.
+
+    python -m benchmark_gen.compare run --dir benchmarks --output bench_current.json
+    python -m benchmark_gen.compare check bench_baseline.json bench_current.json [--threshold 0.10]
+    python -m benchmark_gen.compare check ... --update   # accept current timings as the new baseline
+
+`check` exits with status 1 if any function got slower.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+
+def run_benchmarks(bench_dir: str, output: str) -> dict:
+    """Runs every bench_*.py in `bench_dir` (each in its own process) and merges results into `output`."""
+    if os.path.exists(output):
+        os.remove(output)
+    for path in sorted(glob.glob(os.path.join(bench_dir, "bench_*.py"))):
+        proc = subprocess.run([sys.executable, path, "--output", os.path.abspath(output)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"❌ {os.path.basename(path)} failed:\n{proc.stderr[-1000:]}")
+    if not os.path.exists(output):
+        return {}
+    with open(output, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """
+    A function/size regressed when its median got more than `threshold`
+    slower AND its fastest sample is slower than the baseline median, so
+    ordinary run-to-run noise isn't reported.
+
+    Returns:
+        [{"function", "n", "baseline_median", "current_median", "ratio"}], worst first.
+    """
+    regressions = []
+    for function, entry in current.items():
+        base_by_size = {r["n"]: r for r in baseline.get(function, {}).get("results", []) if "median" in r}
+        for result in entry.get("results", []):
+            base = base_by_size.get(result["n"])
+            if not base or "median" not in result:
+                continue
+            ratio = result["median"] / base["median"] if base["median"] else float("inf")
+            if ratio > 1.0 + threshold and result["min"] > base["median"]:
+                regressions.append({
+                    "function": function,
+                    "n": result["n"],
+                    "baseline_median": base["median"],
+                    "current_median": result["median"],
+                    "ratio": ratio,
+                })
+    return sorted(regressions, key=lambda r: r["ratio"], reverse=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark_gen.compare")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="run generated benchmarks")
+    run_cmd.add_argument("--dir", default="benchmarks")
+    run_cmd.add_argument("--output", default="bench_current.json")
+
+    check_cmd = sub.add_parser("check", help="compare current timings to a baseline")
+    check_cmd.add_argument("baseline")
+    check_cmd.add_argument("current")
+    check_cmd.add_argument("--threshold", type=float, default=0.10)
+    check_cmd.add_argument("--update", action="store_true", help="store current as the new baseline")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.dir, args.output)
+        print(f"📊 Benchmarked {len(results)} function(s) -> {args.output}")
+        return 0
+
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; storing current results as the baseline.")
+        shutil.copyfile(args.current, args.baseline)
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = find_regressions(baseline, current, args.threshold)
+    for r in regressions:
+        print(f"🐢 {r['function']} (n={r['n']}): {r['baseline_median'] * 1e6:.2f}µs -> "
+              f"{r['current_median'] * 1e6:.2f}µs ({r['ratio']:.2f}x)")
+    if not regressions:
+        print("✅ No performance regressions.")
+    if args.update:
+        shutil.copyfile(args.current, args.baseline)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
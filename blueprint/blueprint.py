@@ -0,0 +1,197 @@
+import mmap
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+# Shared, memory-mapped source buffers. Blueprints refer to these by file id
+# and byte span instead of holding their own copy of the function source.
+_buffers: List["SourceBuffer"] = []
+_buffer_ids: Dict[str, int] = {}
+# Pipeline workers build blueprints concurrently; one lock keeps ids and buffers in step
+_registry_lock = threading.Lock()
+
+
+class SourceBuffer:
+    """
+    Read-only, memory-mapped view of one source file.
+    Slices are decoded on demand; if the file has been rewritten or replaced
+    since it was mapped (e.g. by RefactorTriggerAgent) the spans are stale
+    and slice() returns "" so callers fall back to re-reading the file.
+
+    slice() and close() share a lock: a refactor may close the buffer from
+    one pipeline worker while others are still building prompts from it.
+    """
+
+    __slots__ = ("path", "_file", "_mmap", "_stat", "_lock")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+        st = os.fstat(self._file.fileno())
+        self._stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+        # mmap refuses zero-length files; an empty buffer has no functions anyway
+        if self._stat[1]:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = None
+
+    def _signature(self):
+        # Stat the path, not the open file: a file replaced by rename keeps the old inode mapped
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @property
+    def data(self):
+        return self._mmap if self._mmap is not None else b""
+
+    def is_stale(self) -> bool:
+        with self._lock:
+            return self._is_stale()
+
+    def _is_stale(self) -> bool:
+        if self._file.closed:
+            return True
+        return self._signature() != self._stat
+
+    def slice(self, start: int, end: int) -> str:
+        with self._lock:
+            if self._mmap is None or self._is_stale():
+                return ""
+            return self._mmap[start:end].decode("utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._file.close()
+
+
+def register_source(path: str) -> int:
+    """
+    Maps `path` into a shared buffer and returns its file id.
+    Re-registering an unchanged file reuses the existing mapping.
+    """
+    key = os.path.abspath(path)
+    with _registry_lock:
+        file_id = _buffer_ids.get(key)
+        if file_id is not None:
+            buffer = _buffers[file_id]
+            if not buffer.is_stale():
+                return file_id
+            buffer.close()
+            _buffers[file_id] = SourceBuffer(key)
+            return file_id
+
+        _buffers.append(SourceBuffer(key))
+        file_id = len(_buffers) - 1
+        _buffer_ids[key] = file_id
+        return file_id
+
+
+def get_source(file_id: int) -> SourceBuffer:
+    with _registry_lock:
+        return _buffers[file_id]
+
+
+def close_source(path: str):
+    """
+    Releases the mapping for `path` (if any) so the file can be rewritten.
+    Blueprints pointing into it will report empty code until re-registered.
+    """
+    with _registry_lock:
+        file_id = _buffer_ids.get(os.path.abspath(path))
+        buffer = _buffers[file_id] if file_id is not None else None
+    if buffer is not None:
+        buffer.close()
+
+
+class Blueprint(Mapping):
+    """
+    Compact function blueprint: a file id and byte span into a shared source
+    buffer plus interned metadata strings. The function source is only
+    materialized when `code` is read (i.e. when a prompt is built).
+
+    Implements the read-only Mapping protocol with the same keys as the
+    original blueprint dicts, so agents using bp.get("code") or
+    bp["function_name"] keep working unchanged.
+    """
+
+    __slots__ = (
+        "file_id",
+        "start",
+        "end",
+        "function_signature",
+        "function_name",
+        "filename",
+        "test_filename",
+        "import_path",
+        "description",
+        "dependencies",
+    )
+
+    _KEYS = (
+        "function_signature",
+        "function_name",
+        "code",
+        "filename",
+        "test_filename",
+        "import_path",
+        "description",
+        "dependencies",
+    )
+
+    def __init__(
+        self,
+        file_id: int,
+        start: int,
+        end: int,
+        function_signature: str,
+        function_name: str,
+        filename: str,
+        test_filename: str,
+        import_path: str,
+        description: str = "",
+        dependencies: Optional[list] = None,
+    ):
+        self.file_id = file_id
+        self.start = start
+        self.end = end
+        self.function_signature = function_signature
+        self.function_name = sys.intern(function_name)
+        self.filename = sys.intern(filename)
+        self.test_filename = sys.intern(test_filename)
+        self.import_path = sys.intern(import_path)
+        self.description = description
+        self.dependencies = dependencies if dependencies is not None else []
+
+    @property
+    def code(self) -> str:
+        return get_source(self.file_id).slice(self.start, self.end)
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def to_dict(self) -> dict:
+        """Materializes a plain blueprint dict (including the code text)."""
+        return {key: getattr(self, key) for key in self._KEYS}
+
+    def __repr__(self):
+        return (
+            f"Blueprint({self.function_name!r}, file_id={self.file_id}, "
+            f"span=({self.start}, {self.end}))"
+        )
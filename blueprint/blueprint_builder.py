@@ -1,6 +1,9 @@
+import os
 import re
-from typing import List
-from utils.code_parser import split_functions, extract_function_signature
+from typing import List, Optional
+from utils.code_parser import split_function_spans, extract_function_signature
+from blueprint.blueprint import Blueprint, register_source, get_source
+from blueprint.symbol_index import SymbolIndex
 
 def _extract_function_name(signature: str) -> str:
     if not signature:
@@ -8,35 +11,55 @@ def _extract_function_name(signature: str) -> str:
     match = re.match(r"\s*def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(", signature)
     return match.group(1) if match else ""
 
-def build_blueprints_from_file(file_path: str) -> List[dict]:
+def _function_spans(file_path: str, source, index: Optional[SymbolIndex]):
+    """(start, end, signature, function_name) per function, from the index when it matches the mapped file."""
+    if index is not None:
+        entry = index.refresh(file_path)
+        st = os.stat(source.path)
+        # The index is only used if it describes the exact file that was mapped
+        if not source.is_stale() and (entry["size"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return [(f["start"], f["end"], f["signature"], f["name"]) for f in index.functions(file_path)]
+    spans = []
+    for start, end in split_function_spans(source.data):
+        signature = extract_function_signature(source.slice(start, end))
+        spans.append((start, end, signature, _extract_function_name(signature)))
+    return spans
+
+def build_blueprints_from_file(file_path: str, index: Optional[SymbolIndex] = None) -> List[Blueprint]:
     """
-    Reads a Python file, extracts all top-level functions, and builds blueprint dicts for each.
+    Reads a Python file, extracts all top-level functions, and builds blueprints for each.
+
+    The file is memory-mapped once and shared; each Blueprint stores only a byte
+    span into it, so the function source is not copied until a prompt needs it.
 
     Args:
         file_path: Path to the Python file to analyze.
+        index: Optional SymbolIndex; spans and signatures come from it and the
+               file is only re-split if its mtime/size and content hash changed.
 
     Returns:
-        List of blueprint dictionaries, one per function.
+        List of Blueprint objects (dict-compatible), one per function.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        code = f.read()
+    file_id = register_source(file_path)
+    source = get_source(file_id)
 
-    function_blocks = split_functions(code)
+    filename = os.path.basename(file_path)
+    import_path = os.path.splitext(filename)[0]
     blueprints = []
 
-    for func_code in function_blocks:
-        signature = extract_function_signature(func_code)
-        function_name = _extract_function_name(signature)
-        blueprint = {
-            "function_signature": signature,
-            "function_name": function_name,
-            "code": func_code,
-            "filename": "autotest_target_file.py",
-            "test_filename": "test_suite.py",
-            "import_path": "autotest_target_file",
-            "description": "",
-            "dependencies": []
-        }
+    for start, end, signature, function_name in _function_spans(file_path, source, index):
+        blueprint = Blueprint(
+            file_id=file_id,
+            start=start,
+            end=end,
+            function_signature=signature,
+            function_name=function_name,
+            filename=filename,
+            test_filename="test_suite.py",
+            import_path=import_path,
+            description="",
+            dependencies=[]
+        )
         blueprints.append(blueprint)
 
-    return blueprints
\ No newline at end of file
+    return blueprints
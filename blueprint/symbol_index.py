@@ -0,0 +1,286 @@
+"""
+Persistent SQLite index of every top-level function in the target tree.
+
+    python -m blueprint.symbol_index [root] [--index .autotest_index.sqlite]
+
+Each file row keeps (mtime_ns, size, sha256); each function row keeps its
+byte span, signature, content hash, AST fingerprint, call edges, cached
+testability verdict (tagged with the analyzer version that produced it)
+and the hash of the last tests generated for it. A run
+stats every file but re-reads only those whose mtime or size changed, and
+re-splits only those whose content hash changed. Verdicts and test hashes
+of functions whose AST fingerprint is unchanged carry over when their file
+is re-split.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import textwrap
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.code_parser import split_function_spans, extract_function_signature
+
+SCHEMA_VERSION = 2
+_RACY_SECONDS = 2.0
+_NAME_RE = re.compile(r"\s*def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS functions (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    code_sha256 TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    testability TEXT,
+    testability_version TEXT,
+    test_sha256 TEXT,
+    PRIMARY KEY (path, start)
+);
+CREATE INDEX IF NOT EXISTS functions_code ON functions (code_sha256);
+CREATE INDEX IF NOT EXISTS functions_name ON functions (path, name);
+CREATE TABLE IF NOT EXISTS calls (
+    path TEXT NOT NULL,
+    caller TEXT NOT NULL,
+    callee TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_caller ON calls (path, caller);
+CREATE INDEX IF NOT EXISTS calls_callee ON calls (callee);
+"""
+
+_FUNCTION_COLUMNS = ("name", "start", "end", "signature", "code_sha256", "fingerprint", "testability",
+                     "testability_version", "test_sha256")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _function_name(signature: str) -> str:
+    match = _NAME_RE.match(signature)
+    return match.group(1) if match else ""
+
+
+def analyze_function(code: str) -> dict:
+    """
+    AST fingerprint and callee names of one function block.
+
+    The fingerprint hashes the AST without positions, so reformatting and
+    comment edits keep it; unparsable code falls back to a hash of the text.
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(code))
+    except SyntaxError:
+        return {"fingerprint": _sha256(code.encode("utf-8")), "calls": []}
+    calls = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                calls.add(node.func.id)
+            elif isinstance(node.func, ast.Attribute):
+                calls.add(node.func.attr)
+    dump = ast.dump(tree, annotate_fields=False, include_attributes=False)
+    return {"fingerprint": _sha256(dump.encode("utf-8")), "calls": sorted(calls)}
+
+
+class SymbolIndex:
+    """
+    On-disk function index consulted by build_blueprints_from_file and
+    TestabilityAnalyzerAgent. Thread-safe (one connection behind a lock),
+    since pipeline stages run concurrently.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = {"unchanged": 0, "touched": 0, "reindexed": 0, "removed": 0,
+                      "verdict_hits": 0, "verdict_misses": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None or int(row[0]) != SCHEMA_VERSION:
+                # Older layout: it's only a cache, so start over
+                self._db.executescript("DELETE FROM files; DELETE FROM functions; DELETE FROM calls;")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Revalidation ---
+
+    def refresh(self, file_path: str) -> dict:
+        """
+        Brings one file's entries up to date and returns its file row
+        {"path", "mtime_ns", "size", "sha256", "status"}, where status is
+        "unchanged" (stat matched), "touched" (content matched) or "reindexed".
+        """
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._db.execute("SELECT mtime_ns, size, sha256, indexed_at FROM files WHERE path = ?",
+                                   (path,)).fetchone()
+        # A file indexed within the mtime granularity of its last write may have changed unseen ("racy" stat)
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size and row[3] - st.st_mtime > _RACY_SECONDS:
+            with self._lock:
+                self.stats["unchanged"] += 1
+            return {"path": path, "mtime_ns": row[0], "size": row[1], "sha256": row[2], "status": "unchanged"}
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = _sha256(data)
+        with self._lock, self._db:
+            if row and row[2] == digest:
+                self._db.execute("UPDATE files SET mtime_ns = ?, size = ?, indexed_at = ? WHERE path = ?",
+                                 (st.st_mtime_ns, st.st_size, time.time(), path))
+                status = "touched"
+            else:
+                self._reindex(path, data)
+                self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                 (path, st.st_mtime_ns, st.st_size, digest, time.time()))
+                status = "reindexed"
+            self.stats[status] += 1
+        return {"path": path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "status": status}
+
+    def refresh_tree(self, root: str, exclude=(".git", ".venv", "venv", "__pycache__", "node_modules")) -> dict:
+        """Refreshes every .py file under `root` and forgets files that no longer exist."""
+        seen = set()
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in exclude and not d.startswith(".")]
+            for name in files:
+                if name.endswith(".py"):
+                    seen.add(self.refresh(os.path.join(directory, name))["path"])
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self._lock, self._db:
+            indexed = [p for (p,) in self._db.execute("SELECT path FROM files")]
+            for path in indexed:
+                if path.startswith(prefix) and path not in seen:
+                    self._forget(path)
+                    self.stats["removed"] += 1
+        return dict(self.stats)
+
+    def _reindex(self, path: str, data: bytes):
+        # Verdicts and test hashes survive for functions whose AST is unchanged
+        previous = {(name, signature, fingerprint): cached
+                    for name, signature, fingerprint, *cached in self._db.execute(
+                        "SELECT name, signature, fingerprint, testability, testability_version, test_sha256 "
+                        "FROM functions WHERE path = ?", (path,))}
+        self._forget(path)
+        functions, calls = [], []
+        for start, end in split_function_spans(data):
+            code = data[start:end].decode("utf-8", errors="replace")
+            signature = extract_function_signature(code)
+            name = _function_name(signature)
+            info = analyze_function(code)
+            testability, version, test_hash = previous.get((name, signature, info["fingerprint"]), (None, None, None))
+            functions.append((path, name, start, end, signature, _sha256(data[start:end]), info["fingerprint"],
+                              testability, version, test_hash))
+            calls.extend((path, name, callee) for callee in info["calls"])
+        self._db.executemany("INSERT OR REPLACE INTO functions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", functions)
+        self._db.executemany("INSERT INTO calls VALUES (?, ?, ?)", calls)
+
+    def _forget(self, path: str):
+        self._db.execute("DELETE FROM functions WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM calls WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    # --- Queries ---
+
+    def functions(self, file_path: str) -> List[dict]:
+        """Function rows of an already refreshed file, in source order."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(_FUNCTION_COLUMNS)} FROM functions WHERE path = ? ORDER BY start",
+                (os.path.abspath(file_path),)
+            ).fetchall()
+        return [dict(zip(_FUNCTION_COLUMNS, row)) for row in rows]
+
+    def calls(self, file_path: str, function_name: str) -> List[str]:
+        with self._lock:
+            return [callee for (callee,) in self._db.execute(
+                "SELECT callee FROM calls WHERE path = ? AND caller = ? ORDER BY callee",
+                (os.path.abspath(file_path), function_name))]
+
+    def callers(self, function_name: str) -> List[tuple]:
+        """(path, caller) pairs calling `function_name` anywhere in the index."""
+        with self._lock:
+            return self._db.execute("SELECT path, caller FROM calls WHERE callee = ? ORDER BY path, caller",
+                                    (function_name,)).fetchall()
+
+    # --- Cached results ---
+
+    def get_testability(self, code: str, version: str = "") -> Optional[dict]:
+        """
+        Stored verdict for a function with exactly this source, if the same
+        analyzer `version` produced it; verdicts of other versions are stale.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT testability FROM functions WHERE code_sha256 = ? AND testability IS NOT NULL "
+                "AND testability_version = ? LIMIT 1",
+                (_sha256(code.encode("utf-8")), version)
+            ).fetchone()
+            self.stats["verdict_hits" if row else "verdict_misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def set_testability(self, code: str, report: dict, version: str = ""):
+        """Stores `report`, made by analyzer `version`, for every indexed function with exactly this source."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE functions SET testability = ?, testability_version = ? WHERE code_sha256 = ?",
+                             (json.dumps(report), version, _sha256(code.encode("utf-8"))))
+
+    def set_test_hash(self, file_path: str, function_name: str, test_code: str):
+        with self._lock, self._db:
+            self._db.execute("UPDATE functions SET test_sha256 = ? WHERE path = ? AND name = ?",
+                             (_sha256(test_code.encode("utf-8")), os.path.abspath(file_path), function_name))
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            files, = self._db.execute("SELECT COUNT(*) FROM files").fetchone()
+            functions, = self._db.execute("SELECT COUNT(*) FROM functions").fetchone()
+        return dict(self.stats, files=files, functions=functions)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m blueprint.symbol_index")
+    parser.add_argument("root", nargs="?", default=".")
+    parser.add_argument("--index", default=".autotest_index.sqlite")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with SymbolIndex(args.index) as index:
+        index.refresh_tree(args.root)
+        summary = index.summary()
+    print(f"🗂️ Indexed {summary['functions']} function(s) in {summary['files']} file(s) "
+          f"({summary['reindexed']} re-split, {summary['touched']} touched, {summary['unchanged']} unchanged, "
+          f"{summary['removed']} removed) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import json
+import math
+import subprocess
+import sys
+from string import Template
+
+from .utils import *
+from utils.input_synth import param_kinds, kind_of_value, generator_source
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Growth classes, simplest first
+GROWTH_CLASSES = (
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+)
+GROWTH_RANK = {name: rank for rank, (name, _) in enumerate(GROWTH_CLASSES)}
+
+
+def _weighted_fit(xs, ts):
+    """
+    Fits t = a + b*x minimizing relative error (weights 1/t^2), with b >= 0.
+    Returns (a, b, weighted sum of squared relative residuals).
+    """
+    ws = [1.0 / (t * t) for t in ts]
+    sw = sum(ws)
+    sx = sum(w * x for w, x in zip(ws, xs))
+    st = sum(w * t for w, t in zip(ws, ts))
+    sxx = sum(w * x * x for w, x in zip(ws, xs))
+    sxt = sum(w * x * t for w, x, t in zip(ws, xs, ts))
+    denom = sw * sxx - sx * sx
+    b = (sw * sxt - sx * st) / denom if denom > 0 else 0.0
+    if b < 0:
+        b = 0.0
+    a = (st - b * sx) / sw
+    sse = sum(w * (t - a - b * x) ** 2 for w, x, t in zip(ws, xs, ts))
+    return a, b, sse
+
+
+def _log_slope(points) -> float:
+    lx = [math.log(n) for n, _ in points]
+    ly = [math.log(t) for _, t in points]
+    mx, my = sum(lx) / len(lx), sum(ly) / len(ly)
+    var = sum((x - mx) ** 2 for x in lx)
+    return sum((x - mx) * (y - my) for x, y in zip(lx, ly)) / var if var else 0.0
+
+
+def fit_growth(samples: list) -> dict:
+    """
+    Picks the growth class that best explains the timings.
+
+    The log-log slope over the larger half of the sizes (where asymptotic
+    behaviour dominates fixed overhead) narrows the candidates to the classes
+    whose own slope over that range is closest; among those, the least-squares
+    fit on relative error decides. A more complex class only wins if it halves
+    the residual of every simpler candidate, so timing noise on flat functions
+    isn't reported as growth.
+
+    Returns:
+        {"complexity": <class name>, "slope": <log-log slope>, "residuals": {class: sse}}
+    """
+    points = [(s["n"], s["seconds"]) for s in samples if s["seconds"] > 0]
+    if len(points) < 3:
+        return {"complexity": "unknown", "slope": None, "residuals": {}}
+    ns, ts = [p[0] for p in points], [p[1] for p in points]
+
+    tail = points[len(points) // 2:]
+    slope = _log_slope(tail)
+    n_lo, n_hi = tail[0][0], tail[-1][0]
+
+    residuals, distances = {}, {}
+    for name, f in GROWTH_CLASSES:
+        _, _, sse = _weighted_fit([f(n) for n in ns], ts)
+        residuals[name] = sse
+        # The class's own log-log slope over the same size range
+        class_slope = math.log(f(n_hi) / f(n_lo)) / math.log(n_hi / n_lo) if n_hi > n_lo else 0.0
+        distances[name] = abs(class_slope - slope)
+
+    nearest = min(distances.values())
+    best_name, best_sse = None, None
+    for name, _ in GROWTH_CLASSES:
+        if distances[name] > nearest + 0.05:
+            continue
+        if best_sse is None or residuals[name] < best_sse * 0.5:
+            best_name, best_sse = name, residuals[name]
+
+    return {"complexity": best_name, "slope": slope, "residuals": residuals}
+
+
+PINNED_TEST_TEMPLATE = Template('''
+import random
+import time
+from $import_path import $function_name
+
+def _best_time_$function_name(n, repeats=5, number=$number):
+    rng = random.Random(n)
+    args = ($arg_exprs)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            $function_name(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def test_${function_name}_scales_no_worse_than_${label}():
+    # Pinned by ComplexityProbeAgent: measured $complexity (log-log slope $slope).
+    # Growing the input ${factor}x may cost at most ${bound}x (expected ${expected}x, with slack for noise).
+    small = _best_time_$function_name($small)
+    large = _best_time_$function_name($large)
+    assert large / small <= $bound
+''')
+
+
+class ComplexityProbeAgent(Runnable):
+    """
+    Empirically estimates how each function's runtime grows with input size.
+
+    Inputs of geometrically growing size are synthesized from type hints (or
+    observed argument types), the function is timed at each size in an
+    isolated subprocess, and a growth class (O(1) ... O(n^3)) is fitted.
+    Functions fitting worse than `max_complexity` are flagged.
+    """
+
+    def invoke(self, input_dict: dict) -> list:
+        """
+        Args:
+            input_dict: {
+                "blueprints": List[dict],
+                "max_complexity": <str>,                  # (Optional) a GROWTH_CLASSES name, default "O(n log n)"
+                "observed_args": {function_name: tuple},  # (Optional) example args; overrides type hints
+                "sizes": List[int],                       # (Optional) default 8, 16, ..., 16384
+                "call_budget": <float>,                   # (Optional) stop growing past this many s/call
+                "timeout": <float>                        # (Optional) subprocess timeout per function
+            }
+        Returns:
+            List of dicts, one per function:
+            {
+                "function_name": ...,
+                "complexity": "O(n)" | ... | "unknown",
+                "slope": <float>,
+                "samples": [{"n", "seconds"}],
+                "flagged": True/False,
+                "error": <str or None>
+            }
+        """
+        blueprints = input_dict.get("blueprints", [])
+        max_complexity = input_dict.get("max_complexity", "O(n log n)")
+        if max_complexity not in GROWTH_RANK:
+            raise ValueError(f"Unknown max_complexity {max_complexity!r}; expected one of {', '.join(GROWTH_RANK)}")
+        observed = input_dict.get("observed_args", {})
+        sizes = input_dict.get("sizes") or [2 ** k for k in range(3, 15)]
+        call_budget = input_dict.get("call_budget", 0.05)
+        timeout = input_dict.get("timeout", 60.0)
+
+        results = []
+        for bp in blueprints:
+            function_name = bp.get("function_name", "")
+            if function_name in observed:
+                kinds = [kind_of_value(v) for v in observed[function_name]]
+            else:
+                kinds = [kind for _, kind in param_kinds(bp.get("code", ""))]
+
+            request = {
+                "root": ROOT_DIR,
+                "import_path": bp.get("import_path", ""),
+                "function_name": function_name,
+                "kinds": kinds,
+                "sizes": sizes,
+                "call_budget": call_budget,
+            }
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "complexity.probe_worker"],
+                    input=json.dumps(request),
+                    cwd=ROOT_DIR,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout
+                )
+                if proc.returncode == 0:
+                    measured = json.loads(proc.stdout)
+                else:
+                    last_line = (proc.stderr.strip().splitlines() or ["probe failed"])[-1]
+                    measured = {"samples": [], "error": last_line}
+            except subprocess.TimeoutExpired:
+                measured = {"samples": [], "error": f"probe timed out after {timeout}s"}
+
+            fit = fit_growth(measured["samples"])
+            flagged = GROWTH_RANK.get(fit["complexity"], -1) > GROWTH_RANK[max_complexity]
+            results.append({
+                "function_name": function_name,
+                "import_path": bp.get("import_path", ""),
+                "kinds": kinds,
+                "complexity": fit["complexity"],
+                "slope": fit["slope"],
+                "samples": measured["samples"],
+                "flagged": flagged,
+                "error": measured.get("error")
+            })
+        return results
+
+    def pinned_test(self, result: dict, factor: int = 4, slack: float = 3.0) -> str:
+        """
+        Renders a pytest regression test asserting the function keeps scaling
+        no worse than its measured class. Returns "" if nothing was measured.
+        """
+        complexity = result.get("complexity")
+        samples = result.get("samples", [])
+        if complexity not in GROWTH_RANK or len(samples) < 3:
+            return ""
+        f = dict(GROWTH_CLASSES)[complexity]
+        # Pin at the second-largest measured size so the test stays quick
+        small = samples[-2]["n"] // factor or 1
+        large = small * factor
+        expected = f(large) / f(small)
+        seconds = samples[-2]["seconds"]
+        arg_exprs = "".join(f"{generator_source(kind)}, " for kind in result.get("kinds", [])).rstrip(" ")
+        return PINNED_TEST_TEMPLATE.substitute(
+            import_path=result["import_path"],
+            function_name=result["function_name"],
+            label=re.sub(r"[^a-z0-9]+", "_", complexity.lower()).strip("_"),
+            complexity=complexity,
+            slope=f"{result['slope']:.2f}",
+            number=max(1, int(0.01 / max(seconds, 1e-9))),
+            arg_exprs=arg_exprs,
+            factor=factor,
+            expected=f"{expected:.1f}",
+            bound=f"{max(expected * slack, slack):.1f}",
+            small=small,
+            large=large,
+        ).strip() + "\n"
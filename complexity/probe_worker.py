@@ -0,0 +1,57 @@
+"""
+Subprocess side of ComplexityProbeAgent.
+
+Reads {"root", "import_path", "function_name", "kinds", "sizes", "call_budget"}
+as JSON on stdin, times the function at each size and prints
+{"samples": [{"n", "seconds"}], "error": <str or null>} as JSON.
+Growth stops early once a single call exceeds `call_budget` seconds.
+"""
+import importlib
+import json
+import random
+import sys
+import time
+
+
+def time_call(fn, args, min_time: float = 0.02, repeats: int = 5) -> float:
+    """Best-of-`repeats` seconds per call, with the loop count calibrated to `min_time`."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number = int(number * min(10.0, 1.2 * min_time / max(elapsed, 1e-9))) + 1
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    request = json.load(sys.stdin)
+    sys.path.insert(0, request["root"])
+    from utils.input_synth import make_args
+
+    fn = getattr(importlib.import_module(request["import_path"]), request["function_name"])
+    samples, error = [], None
+    for n in request["sizes"]:
+        args = make_args(request["kinds"], n, random.Random(n))
+        try:
+            seconds = time_call(fn, args)
+        except Exception as e:
+            error = f"{type(e).__name__} at n={n}: {e}"
+            break
+        samples.append({"n": n, "seconds": seconds})
+        if seconds > request["call_budget"]:
+            break
+    json.dump({"samples": samples, "error": error}, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
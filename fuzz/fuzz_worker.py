@@ -0,0 +1,32 @@
+"""
+Subprocess side of PropertyFuzzAgent.
+
+Reads {"root", "import_path", "function_name", "kinds", "batch_size", "seed",
+"snapshot_file", "update"} as JSON on stdin, fuzzes the function and prints
+{"mode", "cases", "cases_per_second", "return_kinds", "failures", "snapshot",
+"error"} as JSON.
+"""
+import importlib
+import json
+import sys
+
+
+def main():
+    request = json.load(sys.stdin)
+    sys.path.insert(0, request["root"])
+    from fuzz.property_fuzzer import fuzz_function
+
+    # The target may print; keep stdout for the result alone
+    out, sys.stdout = sys.stdout, sys.stderr
+    try:
+        fn = getattr(importlib.import_module(request["import_path"]), request["function_name"])
+    except Exception as e:
+        json.dump({"error": f"{type(e).__name__}: {e}"}, out)
+        return
+    result = fuzz_function(fn, request["kinds"], request["batch_size"], request["seed"],
+                           request["snapshot_file"], request["update"])
+    json.dump(dict(result, error=None), out)
+
+
+if __name__ == "__main__":
+    main()
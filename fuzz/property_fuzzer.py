@@ -0,0 +1,324 @@
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+import warnings
+from itertools import product
+
+from .utils import *
+from .snapshot import np, snapshot_path, save_snapshot, load_snapshot, compare_batches
+from utils.input_synth import param_kinds, kind_of_value
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NUMERIC_KINDS = ("int", "float", "bool")
+
+# Boundary values tried first (all combinations for up to 3 parameters), then random values.
+# Random ints stay well inside int64 so vectorized products can't silently wrap.
+_EDGES = {
+    "int": [0, 1, -1, 2, -2, 7, -7, 2 ** 31 - 1, -2 ** 31],
+    "float": [0.0, -0.0, 1.0, -1.0, 0.5, -0.5, 1e-12, 1e12, -1e12],
+    "bool": [False, True],
+}
+_RANDOM = {
+    "int": lambda rng: rng.randint(-10 ** 6, 10 ** 6),
+    "float": lambda rng: rng.uniform(-1e6, 1e6),
+    "bool": lambda rng: rng.random() < 0.5,
+}
+
+
+def generate_batch(kinds: list, size: int, seed: int = 0) -> list:
+    """Builds `size` argument rows for numeric `kinds` and returns them as columns (one list per parameter)."""
+    rng = random.Random(seed)
+    rows = list(product(*(_EDGES[k] for k in kinds))) if len(kinds) <= 3 else []
+    rows = rows[:size]
+    while len(rows) < size:
+        rows.append(tuple(_RANDOM[k](rng) for k in kinds))
+    return [list(col) for col in zip(*rows)] if kinds else []
+
+
+def _kind_of(value) -> str:
+    if np is not None and isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return type(value).__name__
+
+
+def _numeric(value) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def call_case(fn, args) -> tuple:
+    """Evaluates one case; returns (out, kind, text) in the snapshot encoding."""
+    try:
+        value = fn(*args)
+    except Exception as e:
+        return math.nan, f"raise:{type(e).__name__}", str(e)[:200]
+    kind = _kind_of(value)
+    if kind in NUMERIC_KINDS:
+        return _numeric(value), kind, ""
+    return math.nan, kind, repr(value)[:200]
+
+
+def _evaluate_loop(fn, columns: list) -> dict:
+    out, kinds, texts = [], [], []
+    for args in zip(*columns):
+        o, k, t = call_case(fn, args)
+        out.append(o)
+        kinds.append(k)
+        texts.append(t)
+    return {"out": out, "kind": kinds, "text": texts}
+
+
+def _evaluate_vectorized(fn, columns: list, n: int, spot_checks: int = 1024):
+    """
+    Calls `fn` once on whole NumPy arrays. Returns None unless the function
+    accepts arrays, returns one numeric value per case without any floating
+    point error, and agrees with scalar calls on the leading (boundary) rows
+    plus as many random ones.
+    """
+    if np is None or not columns:
+        return None
+    arrays = [np.asarray(col) for col in columns]
+    try:
+        with np.errstate(all="raise"), warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = fn(*arrays)
+    except Exception:
+        return None
+    if not isinstance(result, np.ndarray) or result.shape != (n,) or result.dtype.kind not in "biuf":
+        return None
+
+    kind = {"b": "bool", "i": "int", "u": "int", "f": "float"}[result.dtype.kind]
+    batch = {"out": result.astype(np.float64).tolist(), "kind": [kind] * n, "text": [""] * n}
+    rng = random.Random(n)
+    sample = set(range(min(n, spot_checks))) | set(rng.sample(range(n), min(n, spot_checks)))
+    for i in sample:
+        o, k, t = call_case(fn, [col[i] for col in columns])
+        if k != kind or t or not (o == batch["out"][i] or math.isclose(o, batch["out"][i], rel_tol=1e-12)):
+            return None
+    return batch
+
+
+def evaluate_batch(fn, columns: list, n: int) -> tuple:
+    """Evaluates all cases, vectorized when possible. Returns (batch, mode)."""
+    batch = _evaluate_vectorized(fn, columns, n)
+    if batch is not None:
+        return batch, "vectorized"
+    return _evaluate_loop(fn, columns), "loop"
+
+
+def _shrink_candidates(value):
+    if isinstance(value, bool):
+        return [False] if value else []
+    if isinstance(value, int):
+        candidates = [0, 1, -1, value // 2 if value > 0 else -(-value // 2), value - 1 if value > 0 else value + 1]
+        return [c for c in candidates if abs(c) < abs(value) or (abs(c) == abs(value) and c > value)]
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return [0.0, 1.0]
+        candidates = [0.0, 1.0, -1.0, float(math.trunc(value)), value / 2]
+        return [c for c in candidates if abs(c) < abs(value)]
+    return []
+
+
+def minimize_case(fn, args: list, still_fails, max_steps: int = 200) -> list:
+    """
+    Greedily shrinks each argument towards 0/1/-1 (halving, truncating) while
+    `still_fails(out, kind, text)` keeps holding for the shrunk case.
+    """
+    args = list(args)
+    steps = 0
+    changed = True
+    while changed and steps < max_steps:
+        changed = False
+        for i, value in enumerate(args):
+            for candidate in _shrink_candidates(value):
+                steps += 1
+                trial = args[:i] + [candidate] + args[i + 1:]
+                if still_fails(*call_case(fn, trial)):
+                    args = trial
+                    changed = True
+                    break
+    return args
+
+
+def find_failures(fn, columns: list, batch: dict) -> list:
+    """
+    Groups failing cases (exceptions, and returns whose type differs from the
+    function's usual return type) and minimizes one representative per group.
+    """
+    groups = {}
+    for i, kind in enumerate(batch["kind"]):
+        groups.setdefault(kind, []).append(i)
+    returned = {k: len(v) for k, v in groups.items() if not k.startswith("raise:")}
+    usual = max(returned, key=returned.get) if returned else None
+    # int and float results mix freely in numeric code (e.g. 0 * 1.5 vs 2 * 3)
+    numeric = {"int", "float"}
+
+    failures = []
+    for kind, indices in groups.items():
+        if kind.startswith("raise:"):
+            reason = "exception"
+        elif usual is not None and kind != usual and not {kind, usual} <= numeric:
+            reason = "return_type"
+        else:
+            continue
+        first = indices[0]
+        args = minimize_case(fn, [col[first] for col in columns], lambda o, k, t, kind=kind: k == kind)
+        _, _, text = call_case(fn, args)
+        failures.append({
+            "reason": reason,
+            "kind": kind,
+            "expected_kind": usual,
+            "count": len(indices),
+            "args": args,
+            "detail": text,
+        })
+    return failures
+
+
+def check_snapshot(fn, path: str, columns: list, batch: dict, update: bool) -> dict:
+    stored = None if update else load_snapshot(path)
+    # A different parameter count means the signature changed; start over
+    if stored is None or len(stored[0]) != len(columns):
+        save_snapshot(path, columns, batch)
+        return {"path": path, "status": "recorded", "mismatches": []}
+
+    stored_columns, expected = stored
+    n = len(expected["kind"])
+    actual, _ = evaluate_batch(fn, stored_columns, n)
+    mismatches = compare_batches(stored_columns, expected, actual)
+    return {"path": path, "status": "changed" if mismatches else "matched", "mismatches": mismatches}
+
+
+def fuzz_function(fn, kinds: list, batch_size: int, seed: int = 0, snapshot_file: str = None,
+                  update: bool = False) -> dict:
+    """
+    Evaluates `fn` over one generated batch, minimizes failures and checks the
+    snapshot. Runs inside fuzz.fuzz_worker, never in the pipeline process.
+
+    Returns:
+        {"mode", "cases", "cases_per_second", "return_kinds", "failures", "snapshot"}
+    """
+    columns = generate_batch(kinds, batch_size, seed)
+    start = time.perf_counter()
+    batch, mode = evaluate_batch(fn, columns, batch_size)
+    elapsed = time.perf_counter() - start
+
+    return_kinds = {}
+    for kind in batch["kind"]:
+        return_kinds[kind] = return_kinds.get(kind, 0) + 1
+    return {
+        "mode": mode,
+        "cases": batch_size,
+        "cases_per_second": batch_size / elapsed if elapsed > 0 else float("inf"),
+        "return_kinds": return_kinds,
+        "failures": find_failures(fn, columns, batch),
+        "snapshot": check_snapshot(fn, snapshot_file, columns, batch, update) if snapshot_file else None,
+    }
+
+
+class PropertyFuzzAgent(Runnable):
+    """
+    Batch-fuzzes numeric functions (every parameter int/float/bool, from type
+    hints, numeric-sounding names, arithmetic on it in the body or observed
+    arguments; anything else is skipped rather than guessed).
+
+    Each function is evaluated over a large generated batch: boundary values
+    first, then random ones. When NumPy is installed and the function works
+    on arrays, the whole batch runs as one vectorized call (spot-checked
+    against scalar calls); otherwise a tight scalar loop is used. Every
+    function runs in its own subprocess under a timeout, so a hang, crash or
+    side effect in the target can't take the pipeline down with it.
+
+    Exceptions and return types that differ from the function's usual one are
+    reported as minimized failing cases. Inputs and outputs are snapshotted
+    (`.npz`, or `.json.gz` without NumPy); later runs replay the stored inputs
+    and report any case whose output changed.
+    """
+
+    def invoke(self, input_dict: dict) -> list:
+        """
+        Args:
+            input_dict: {
+                "blueprints": List[dict],
+                "snapshot_dir": <str>,                    # (Optional) where snapshots live; no snapshots if omitted
+                "update_snapshots": <bool>,               # (Optional) re-record instead of comparing
+                "batch_size": <int>,                      # (Optional) cases per function, default 4096
+                "seed": <int>,                            # (Optional) default 0
+                "observed_args": {function_name: tuple},  # (Optional) example args; overrides type hints
+                "timeout": <float>                        # (Optional) subprocess timeout per function, default 60
+            }
+        Returns:
+            List of dicts, one per numeric function:
+            {
+                "function_name": ...,
+                "mode": "vectorized" | "loop",
+                "cases": <int>,
+                "cases_per_second": <float>,
+                "return_kinds": {kind: count},
+                "failures": [{"reason", "kind", "expected_kind", "count", "args", "detail"}],
+                "snapshot": {"path", "status": "recorded" | "matched" | "changed", "mismatches"} or None,
+                "error": <str or None>
+            }
+        """
+        blueprints = input_dict.get("blueprints", [])
+        snapshot_dir = input_dict.get("snapshot_dir")
+        update = input_dict.get("update_snapshots", False)
+        batch_size = input_dict.get("batch_size", 4096)
+        seed = input_dict.get("seed", 0)
+        observed = input_dict.get("observed_args", {})
+        timeout = input_dict.get("timeout", 60.0)
+
+        results = []
+        for bp in blueprints:
+            function_name = bp.get("function_name", "")
+            import_path = bp.get("import_path", "")
+            if function_name in observed:
+                kinds = [kind_of_value(v, default=None) for v in observed[function_name]]
+            else:
+                kinds = [kind for _, kind in param_kinds(bp.get("code", ""), default=None)]
+            if not kinds or any(k not in NUMERIC_KINDS for k in kinds):
+                continue
+
+            result = {"function_name": function_name, "mode": None, "cases": 0, "cases_per_second": 0.0,
+                      "return_kinds": {}, "failures": [], "snapshot": None, "error": None}
+            results.append(result)
+            request = {
+                "root": ROOT_DIR,
+                "import_path": import_path,
+                "function_name": function_name,
+                "kinds": kinds,
+                "batch_size": batch_size,
+                "seed": seed,
+                "snapshot_file": snapshot_path(snapshot_dir, import_path, function_name) if snapshot_dir else None,
+                "update": update,
+            }
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "fuzz.fuzz_worker"],
+                    input=json.dumps(request),
+                    cwd=ROOT_DIR,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout
+                )
+            except subprocess.TimeoutExpired:
+                result["error"] = f"fuzzing timed out after {timeout}s"
+                continue
+            if proc.returncode != 0:
+                result["error"] = (proc.stderr.strip().splitlines() or [f"fuzz worker exited {proc.returncode}"])[-1]
+                continue
+            result.update(json.loads(proc.stdout))
+        return results
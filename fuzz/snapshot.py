@@ -0,0 +1,95 @@
+"""
+Compact input/output snapshots for PropertyFuzzAgent.
+
+A snapshot holds the argument columns of a fuzz batch plus, per case, the
+numeric output (NaN when not numeric), a kind code ("int", "float", "str",
+"raise:ZeroDivisionError", ...) and a text form for non-numeric outputs.
+With NumPy installed snapshots are compressed `.npz` files; without it they
+fall back to gzipped JSON with the same fields.
+"""
+import gzip
+import json
+import math
+import os
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+SNAPSHOT_EXT = ".npz" if np is not None else ".json.gz"
+
+
+def snapshot_path(snapshot_dir: str, import_path: str, function_name: str) -> str:
+    return os.path.join(snapshot_dir, f"{import_path}.{function_name}{SNAPSHOT_EXT}")
+
+
+def save_snapshot(path: str, columns: list, batch: dict):
+    """Writes argument `columns` and the evaluated `batch` ({"out", "kind", "text"}) to `path`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if np is not None:
+        arrays = {f"arg{i}": np.asarray(col) for i, col in enumerate(columns)}
+        np.savez_compressed(
+            path,
+            out=np.asarray(batch["out"], dtype=np.float64),
+            kind=np.asarray(batch["kind"], dtype=str),
+            text=np.asarray(batch["text"], dtype=str),
+            **arrays
+        )
+        return
+    payload = {
+        "args": [list(col) for col in columns],
+        # JSON has no NaN/inf; store them as null/strings
+        "out": [None if math.isnan(v) else (repr(v) if math.isinf(v) else v) for v in batch["out"]],
+        "kind": list(batch["kind"]),
+        "text": list(batch["text"]),
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+
+
+def load_snapshot(path: str):
+    """Returns (columns, {"out", "kind", "text"}) with plain Python values, or None if missing."""
+    if not os.path.exists(path):
+        return None
+    if path.endswith(".npz"):
+        if np is None:
+            return None
+        with np.load(path) as data:
+            arg_names = sorted((k for k in data.files if k.startswith("arg")), key=lambda k: int(k[3:]))
+            columns = [data[k].tolist() for k in arg_names]
+            batch = {"out": data["out"].tolist(), "kind": data["kind"].tolist(), "text": data["text"].tolist()}
+        return columns, batch
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    out = [float("nan") if v is None else (float(v) if isinstance(v, str) else v) for v in payload["out"]]
+    return payload["args"], {"out": out, "kind": payload["kind"], "text": payload["text"]}
+
+
+def _same_output(expected: float, actual: float, rel_tol: float, abs_tol: float) -> bool:
+    if math.isnan(expected) or math.isnan(actual):
+        return math.isnan(expected) and math.isnan(actual)
+    return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+
+
+def compare_batches(columns: list, expected: dict, actual: dict, rel_tol: float = 1e-9,
+                    abs_tol: float = 1e-12, limit: int = 10) -> list:
+    """
+    Lists cases whose kind, numeric output or text changed between two
+    evaluations of the same inputs, simplest inputs first.
+
+    Returns:
+        [{"args": [...], "expected": <str>, "actual": <str>}], at most `limit` entries.
+    """
+    mismatches = []
+    for i, (kind, out, text) in enumerate(zip(expected["kind"], expected["out"], expected["text"])):
+        new_kind, new_out, new_text = actual["kind"][i], actual["out"][i], actual["text"][i]
+        if kind == new_kind and text == new_text and _same_output(out, new_out, rel_tol, abs_tol):
+            continue
+        mismatches.append({
+            "args": [col[i] for col in columns],
+            "expected": f"{kind}: {text or out!r}",
+            "actual": f"{new_kind}: {new_text or new_out!r}",
+        })
+    mismatches.sort(key=lambda m: sum(abs(float(a)) for a in m["args"]))
+    return mismatches[:limit]
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.runnables import Runnable
+
+from .cache_server import SIGNATURE_HEADER, content_hash, sign_entry
+
+
+def cache_key(prompt: str, model: str, temperature: float) -> str:
+    """Cache key for one generation: SHA-256 over prompt, model and temperature."""
+    payload = json.dumps([prompt, model, float(temperature)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCacheClient:
+    """
+    Client for GenerationCacheServer.
+
+    Every call fails soft: network errors, timeouts and bad responses count as
+    misses, and after one the server is skipped for `retry_after` seconds, so
+    an unreachable cache costs at most one timeout before generation carries
+    on locally. Responses whose content hash doesn't match are ignored.
+
+    PUTs are signed with `secret` when given. A `read_only` client never
+    writes, and a client whose PUT is refused (403) turns read-only.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0, retry_after: float = 30.0, secret: str = None,
+                 read_only: bool = False):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.secret = secret or None
+        self.read_only = read_only
+        self.stats = {"hits": 0, "misses": 0, "puts": 0, "errors": 0, "integrity_failures": 0,
+                      "invalid_not_stored": 0}
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None, headers: Optional[dict] = None):
+        """Returns (status, payload), or None if the server is unreachable."""
+        if not self.available:
+            return None
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json", **(headers or {})})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, {}
+        except (OSError, ValueError):
+            self._count("errors")
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+
+    def _verified(self, entry: dict) -> Optional[str]:
+        response = entry.get("response")
+        if not isinstance(response, str) or content_hash(response) != entry.get("sha256"):
+            self._count("integrity_failures")
+            return None
+        return response
+
+    def get(self, key: str) -> Optional[str]:
+        result = self._request("GET", f"/v1/entries/{key}")
+        response = self._verified(result[1]) if result and result[0] == 200 else None
+        self._count("hits" if response is not None else "misses")
+        return response
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Batched lookup: one round trip for all `keys`; returns only the hits."""
+        if not keys:
+            return {}
+        result = self._request("POST", "/v1/lookup", {"keys": list(keys)})
+        hits = {}
+        if result and result[0] == 200:
+            for key, entry in result[1].get("hits", {}).items():
+                response = self._verified(entry)
+                if response is not None:
+                    hits[key] = response
+        self._count("hits", len(hits))
+        self._count("misses", len(keys) - len(hits))
+        return hits
+
+    def put(self, key: str, response: str) -> bool:
+        if self.read_only:
+            return False
+        digest = content_hash(response)
+        headers = {SIGNATURE_HEADER: sign_entry(self.secret, key, digest)} if self.secret else None
+        result = self._request("PUT", f"/v1/entries/{key}", {"response": response, "sha256": digest}, headers)
+        if result and result[0] == 403:
+            self.read_only = True  # the server wants a (different) secret; stop trying
+        stored = bool(result and result[0] == 200)
+        if stored:
+            self._count("puts")
+        return stored
+
+
+def _prompt_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if hasattr(value, "to_string"):  # PromptValue
+        return value.to_string()
+    return repr(value)
+
+
+def _response_text(value) -> str:
+    return getattr(value, "content", value) if not isinstance(value, str) else value
+
+
+class CachingLLM(Runnable):
+    """
+    Wraps an LLM Runnable with the shared generation cache.
+
+    Returns the response text (a str) for both hits and misses, which the
+    agents already accept from completion models. `batch` looks up all
+    prompts in one request and only sends the misses to the wrapped LLM.
+
+    Fresh responses are only stored if `validate(text)` accepts them (e.g.
+    the agent's own check that it parses into usable tests), so one bad
+    generation isn't replayed to every runner.
+    """
+
+    def __init__(self, llm, client: GenerationCacheClient, model: str, temperature: float = 0,
+                 validate: Optional[Callable[[str], bool]] = None):
+        self.llm = llm
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.validate = validate
+
+    def _key(self, value) -> str:
+        return cache_key(_prompt_text(value), self.model, self.temperature)
+
+    def _store(self, key: str, text: str):
+        if self.validate is not None:
+            try:
+                valid = self.validate(text)
+            except Exception:
+                valid = False
+            if not valid:
+                self.client._count("invalid_not_stored")
+                return
+        self.client.put(key, text)
+
+    def invoke(self, input, config=None, **kwargs) -> str:
+        key = self._key(input)
+        cached = self.client.get(key)
+        if cached is not None:
+            return cached
+        text = _response_text(self.llm.invoke(input, config, **kwargs))
+        self._store(key, text)
+        return text
+
+    def batch(self, inputs, config=None, **kwargs) -> List[str]:
+        keys = [self._key(value) for value in inputs]
+        hits = self.client.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in hits]
+        if missing:
+            fresh = self.llm.batch([inputs[i] for i in missing], None if isinstance(config, list) else config, **kwargs)
+            for i, value in zip(missing, fresh):
+                hits[keys[i]] = _response_text(value)
+                if isinstance(hits[keys[i]], str):  # not an exception from return_exceptions=True
+                    self._store(keys[i], hits[keys[i]])
+        return [hits[key] for key in keys]
@@ -0,0 +1,282 @@
+"""
+Shared generation cache, served over HTTP so CI runners and developer
+machines generating tests for the same repository reuse each other's LLM
+responses.
+
+    python -m llm.cache_server --port 8765 --max-mb 256 --dir .autotest_cache [--secret ...]
+
+Endpoints (JSON):
+    GET  /v1/entries/<key>   -> {"key", "response", "sha256"} or 404
+    PUT  /v1/entries/<key>   <- {"response", "sha256"}; 400 if the hash doesn't match,
+                                403 if the signature doesn't
+    POST /v1/lookup          <- {"keys": [...]} -> {"hits": {key: {"response", "sha256"}}}
+    GET  /v1/stats
+
+Writes are what a shared cache has to guard: whoever can PUT decides what
+code every other runner gets back for a prompt. With a shared secret
+(`--secret` or $AUTOTEST_CACHE_SECRET) the server only accepts PUTs carrying
+an HMAC-SHA256 of "<key>:<sha256>" under that secret in the
+X-Autotest-Signature header; clients without the secret are read-only.
+Without a secret, PUTs are open, so the server refuses to listen on anything
+but a loopback address (`--host` other than 127.0.0.1/::1/localhost requires
+a secret). Reads are never authenticated.
+
+Responses are stored zlib-compressed together with the SHA-256 of the
+uncompressed text, which is re-checked on every read; corrupt entries are
+dropped. When the compressed total exceeds `max_bytes`, least recently used
+entries are evicted.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+_ENTRY_PATH = re.compile(r"^/v1/entries/([^/]+)$")
+_LOOPBACK = ("127.0.0.1", "::1", "localhost")
+SIGNATURE_HEADER = "X-Autotest-Signature"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sign_entry(secret: str, key: str, digest: str) -> str:
+    """HMAC-SHA256 authorizing a PUT of the response hashing to `digest` under `key`."""
+    return hmac.new(secret.encode("utf-8"), f"{key}:{digest}".encode("ascii", "replace"), hashlib.sha256).hexdigest()
+
+
+class GenerationCacheStore:
+    """
+    Size-bounded LRU of compressed responses, keyed by the client's
+    prompt/model/temperature hash. With `cache_dir`, entries are also written
+    to disk (one file per key) and reloaded on start.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, cache_dir: str = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.stats = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0, "corrupt": 0, "rejected": 0,
+                      "unauthorized": 0}
+        self._entries = OrderedDict()  # key -> (sha256, compressed bytes)
+        self._size = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _load(self):
+        files = [f for f in os.listdir(self.cache_dir) if _KEY_RE.match(f)]
+        # Oldest first, so the most recently written entries end up most recently used
+        for name in sorted(files, key=lambda f: os.path.getmtime(self._file(f))):
+            with open(self._file(name), "rb") as f:
+                data = f.read()
+            digest, _, blob = data.partition(b"\n")
+            self._insert(name, digest.decode("ascii", "replace"), blob, persist=False)
+
+    def _insert(self, key: str, digest: str, blob: bytes, persist: bool = True):
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key)[1])
+        self._entries[key] = (digest, blob)
+        self._size += len(blob)
+        if persist and self.cache_dir:
+            with open(self._file(key), "wb") as f:
+                f.write(digest.encode("ascii") + b"\n" + blob)
+        while self._size > self.max_bytes and self._entries:
+            old_key, (_, old_blob) = self._entries.popitem(last=False)
+            self._size -= len(old_blob)
+            self.stats["evictions"] += 1
+            self._discard_file(old_key)
+
+    def _discard_file(self, key: str):
+        if self.cache_dir and os.path.exists(self._file(key)):
+            os.remove(self._file(key))
+
+    def get(self, key: str):
+        """Returns (response, sha256) or None. Entries failing the hash check are dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            digest, blob = entry
+            try:
+                response = zlib.decompress(blob).decode("utf-8")
+            except (zlib.error, UnicodeDecodeError):
+                response = None
+            if response is None or content_hash(response) != digest:
+                self._size -= len(self._entries.pop(key)[1])
+                self._discard_file(key)
+                self.stats["corrupt"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return response, digest
+
+    def put(self, key: str, response: str, digest: str) -> bool:
+        """Stores `response` if `digest` is its SHA-256; returns False otherwise."""
+        if not _KEY_RE.match(key) or content_hash(response) != digest:
+            with self._lock:
+                self.stats["rejected"] += 1
+            return False
+        blob = zlib.compress(response.encode("utf-8"), 6)
+        with self._lock:
+            self._insert(key, digest, blob)
+            self.stats["puts"] += 1
+        return True
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+class GenerationCacheServer:
+    """
+    HTTP front end for GenerationCacheStore. With `secret`, PUTs must be
+    signed (see sign_entry); without one, only loopback hosts are allowed.
+
+    Usage:
+        with GenerationCacheServer(max_bytes=64 * 1024 * 1024) as server:
+            client = GenerationCacheClient(server.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_bytes: int = 256 * 1024 * 1024,
+                 cache_dir: str = None, secret: str = None):
+        if not secret and host not in _LOOPBACK:
+            raise ValueError(f"refusing to accept unauthenticated writes on {host}; set a shared secret")
+        self.secret = secret or None
+        self.store = GenerationCacheStore(max_bytes=max_bytes, cache_dir=cache_dir)
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(server):
+        store = server.store
+        secret = server.secret
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+
+            def do_GET(self):
+                if self.path == "/v1/stats":
+                    self._reply(200, store.summary())
+                    return
+                match = _ENTRY_PATH.match(self.path)
+                if not match:
+                    self._reply(404, {"error": "not found"})
+                    return
+                entry = store.get(match.group(1))
+                if entry is None:
+                    self._reply(404, {"error": "miss"})
+                    return
+                self._reply(200, {"key": match.group(1), "response": entry[0], "sha256": entry[1]})
+
+            def do_PUT(self):
+                match = _ENTRY_PATH.match(self.path)
+                payload = self._read_json()
+                if not match or not isinstance(payload.get("response"), str):
+                    self._reply(400, {"error": "bad request"})
+                    return
+                if secret is not None:
+                    expected = sign_entry(secret, match.group(1), str(payload.get("sha256", "")))
+                    if not hmac.compare_digest(expected, self.headers.get(SIGNATURE_HEADER, "")):
+                        with store._lock:
+                            store.stats["unauthorized"] += 1
+                        self._reply(403, {"error": "missing or invalid signature"})
+                        return
+                if not store.put(match.group(1), payload["response"], payload.get("sha256", "")):
+                    self._reply(400, {"error": "key or content hash mismatch"})
+                    return
+                self._reply(200, {"stored": True})
+
+            def do_POST(self):
+                if self.path != "/v1/lookup":
+                    self._reply(404, {"error": "not found"})
+                    return
+                hits = {}
+                for key in self._read_json().get("keys", []):
+                    entry = store.get(key)
+                    if entry is not None:
+                        hits[key] = {"response": entry[0], "sha256": entry[1]}
+                self._reply(200, {"hits": hits})
+
+            def _read_json(self) -> dict:
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return {}
+                return payload if isinstance(payload, dict) else {}
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # keep CI output quiet
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m llm.cache_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-mb", type=float, default=256)
+    parser.add_argument("--dir", default=None, help="persist entries in this directory")
+    parser.add_argument("--secret", default=os.getenv("AUTOTEST_CACHE_SECRET"),
+                        help="shared secret clients must sign PUTs with (required unless --host is loopback)")
+    args = parser.parse_args(argv)
+    if not args.secret and args.host not in _LOOPBACK:
+        parser.error(f"--host {args.host} accepts writes from the network; set --secret or AUTOTEST_CACHE_SECRET")
+
+    server = GenerationCacheServer(args.host, args.port, int(args.max_mb * 1024 * 1024), args.dir, args.secret)
+    mode = "signed writes" if server.secret else "loopback only"
+    print(f"🗄️ Generation cache listening on {server.url} ({mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import ast
+
+_BRANCH_NODES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.Try,
+                 ast.With, ast.AsyncWith, ast.BoolOp, ast.ExceptHandler, ast.comprehension)
+
+
+def _call_name(node: ast.Call) -> str:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return ""
+
+
+def complexity_metrics(code: str) -> dict:
+    """
+    Cheap static size/complexity metrics for a function's source.
+
+    Returns:
+        {
+            "lines": <int>,       # non-blank source lines
+            "ast_nodes": <int>,   # total AST nodes
+            "branches": <int>,    # decision points (if/loops/try/boolean ops/...)
+            "fan_out": <int>,     # distinct callees
+            "score": <float>      # single number combining the above, used for routing
+        }
+    Unparseable code gets a high score so it is routed to a strong model.
+    """
+    lines = sum(1 for line in code.splitlines() if line.strip())
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {"lines": lines, "ast_nodes": 0, "branches": 0, "fan_out": 0, "score": float("inf")}
+
+    ast_nodes = branches = 0
+    callees = set()
+    for node in ast.walk(tree):
+        ast_nodes += 1
+        if isinstance(node, _BRANCH_NODES):
+            branches += 1
+        elif isinstance(node, ast.Call):
+            callees.add(_call_name(node))
+    callees.discard("")
+
+    score = ast_nodes / 50.0 + branches + len(callees) / 2.0
+    return {
+        "lines": lines,
+        "ast_nodes": ast_nodes,
+        "branches": branches,
+        "fan_out": len(callees),
+        "score": score,
+    }
@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import Callable, List, Optional
+
+from .complexity import complexity_metrics
+from .cache_client import CachingLLM, GenerationCacheClient
+
+
+def default_chat_factory(model: str, temperature: float = 0):
+    # Imported lazily so routing (and stubbed tiers) work without the provider SDK
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=temperature, openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+
+class ModelTier:
+    """
+    One model tier. `min_score` is the complexity score from which functions
+    are routed straight to this tier. `factory` builds the LLM (any Runnable);
+    pass a stub factory to run the pipeline offline.
+    """
+
+    def __init__(self, name: str, model: str, min_score: float = 0.0,
+                 factory: Optional[Callable[[], object]] = None, temperature: float = 0):
+        self.name = name
+        self.model = model
+        self.min_score = min_score
+        self.temperature = temperature
+        self.factory = factory or (lambda: default_chat_factory(model, temperature))
+
+    def __repr__(self):
+        return f"ModelTier({self.name!r}, {self.model!r}, min_score={self.min_score})"
+
+
+def default_tiers() -> List[ModelTier]:
+    """
+    Fast tier for small functions, strong tier for complex ones or escalations.
+    Models can be overridden with AUTOTEST_FAST_MODEL / AUTOTEST_STRONG_MODEL.
+    """
+    return [
+        ModelTier("fast", os.getenv("AUTOTEST_FAST_MODEL", "gpt-3.5-turbo-0125"), min_score=0.0),
+        ModelTier("strong", os.getenv("AUTOTEST_STRONG_MODEL", "gpt-4o"), min_score=12.0),
+    ]
+
+
+class ModelRouter:
+    """
+    Picks a model tier per function from complexity metrics (AST size, branch
+    count, call fan-out) and escalates to the next tier when the cheaper
+    tier's output fails validation or its tests fail.
+
+    Tiers are ordered cheapest first. LLMs are built lazily, once per tier,
+    and agents built on them are cached per (tier, agent class). With a
+    `cache` client, every tier's LLM goes through the shared generation cache,
+    which only stores responses passing the agent class's
+    `validate_response(text)`, if it has one.
+    """
+
+    def __init__(self, tiers: Optional[List[ModelTier]] = None, cache: Optional[GenerationCacheClient] = None):
+        self.tiers = tiers or default_tiers()
+        self.cache = cache
+        self._llms = {}
+        self._agents = {}
+        self._lock = threading.Lock()
+        self.decisions = []    # {"function_name", "tier", "metrics"}
+        self.escalations = []  # {"function_name", "from", "to", "reason"}
+
+    def route(self, function_name: str, code: str) -> int:
+        """Returns the index of the tier to start `function_name` on."""
+        metrics = complexity_metrics(code)
+        tier = 0
+        for index, candidate in enumerate(self.tiers):
+            if metrics["score"] >= candidate.min_score:
+                tier = index
+        with self._lock:
+            self.decisions.append({
+                "function_name": function_name,
+                "tier": self.tiers[tier].name,
+                "metrics": metrics
+            })
+        return tier
+
+    def escalate(self, function_name: str, tier: int, reason: str) -> Optional[int]:
+        """Returns the next tier after `tier`, or None if already at the top."""
+        if tier + 1 >= len(self.tiers):
+            return None
+        with self._lock:
+            self.escalations.append({
+                "function_name": function_name,
+                "from": self.tiers[tier].name,
+                "to": self.tiers[tier + 1].name,
+                "reason": reason
+            })
+        return tier + 1
+
+    def llm(self, tier: int, validate: Optional[Callable[[str], bool]] = None):
+        with self._lock:
+            if tier not in self._llms:
+                self._llms[tier] = self.tiers[tier].factory()
+            llm = self._llms[tier]
+        if self.cache is not None:
+            llm = CachingLLM(llm, self.cache, self.tiers[tier].model, self.tiers[tier].temperature, validate)
+        return llm
+
+    def agent(self, tier: int, agent_cls):
+        """An `agent_cls(llm=...)` instance bound to the tier's model."""
+        with self._lock:
+            agent = self._agents.get((tier, agent_cls))
+        if agent is not None:
+            return agent
+        llm = self.llm(tier, getattr(agent_cls, "validate_response", None))
+        with self._lock:
+            return self._agents.setdefault((tier, agent_cls), agent_cls(llm=llm))
+
+    def summary(self) -> dict:
+        """Routing decisions and escalation rate, for the run report."""
+        with self._lock:
+            routed = {tier.name: 0 for tier in self.tiers}
+            for decision in self.decisions:
+                routed[decision["tier"]] += 1
+            escalated = {e["function_name"] for e in self.escalations}
+            return {
+                "tiers": {tier.name: tier.model for tier in self.tiers},
+                "initial_routing": routed,
+                "escalations": list(self.escalations),
+                "escalation_rate": len(escalated) / len(self.decisions) if self.decisions else 0.0
+            }
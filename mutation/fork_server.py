@@ -0,0 +1,235 @@
+"""
+pytest plugin loaded by MutationTestingAgent (`-p mutation.fork_server`).
+
+Replaces pytest's run loop with a fork server. The test module(s), the
+target module and every mutant's code object are loaded once in this
+process; each mutant then runs in a forked child that swaps the function's
+`__code__` and runs only the tests covering the mutated statement, fastest
+first, stopping at the first failure. No interpreter or import cost is paid
+per mutant.
+
+Every child is capped like a generated test run (run.test_runner's
+rlimits): `memory_mb` of address space, and CPU seconds just past its
+wall-clock timeout, so a mutant that allocates or spins without bound dies
+on its own rather than starving its siblings.
+
+Reads $AUTOTEST_MUTATION_REQUEST (JSON):
+    {"source_path", "import_path", "functions", "workers", "timeout_factor",
+     "min_timeout", "max_mutants", "memory_mb", "results_file"}
+and writes {"baseline": [...], "mutants": [...], "error"} to results_file.
+"""
+import importlib
+import inspect
+import json
+import os
+import select
+import signal
+import sys
+import time
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from mutation.mutators import list_mutants, build_mutant
+from run.test_runner import apply_rlimits
+
+
+def _run_item(item) -> bool:
+    reports = runtestprotocol(item, log=False, nextitem=None)
+    return all(not r.failed for r in reports) and any(r.when == "call" and r.passed for r in reports)
+
+
+def _forked(work, memory_mb: int = 0, cpu_seconds: float = 0):
+    """
+    Starts `work()` in a child limited to `memory_mb` / `cpu_seconds` (0 = no
+    limit); returns (pid, read_fd). The child writes work()'s JSON result.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        code = 2
+        try:
+            apply_rlimits(memory_mb, cpu_seconds)
+            payload, code = work()
+            os.write(write_fd, json.dumps(payload).encode("utf-8"))
+        except BaseException:
+            pass
+        finally:
+            os._exit(code)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def _read_all(fd) -> bytes:
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(fd)
+    return b"".join(chunks)
+
+
+def _baseline(items, source_path: str, memory_mb: int = 0) -> list:
+    """Runs every test once, unmutated, in a child; records outcome, duration and covered target lines."""
+    def work():
+        results = []
+        for item in items:
+            lines = set()
+
+            def tracer(frame, event, arg):
+                if frame.f_code.co_filename != source_path:
+                    return None
+
+                def local(frame, event, arg):
+                    if event == "line":
+                        lines.add(frame.f_lineno)
+                    return local
+                return local
+
+            start = time.perf_counter()
+            sys.settrace(tracer)
+            try:
+                passed = _run_item(item)
+            finally:
+                sys.settrace(None)
+            results.append({"nodeid": item.nodeid, "passed": passed,
+                            "duration": time.perf_counter() - start, "lines": sorted(lines)})
+        return results, 0
+
+    pid, fd = _forked(work, memory_mb)
+    data = _read_all(fd)
+    os.waitpid(pid, 0)
+    return json.loads(data) if data else []
+
+
+def _mutant_code(module, source: str, source_path: str, function_name: str, index: int):
+    namespace = dict(vars(module))
+    exec(compile(build_mutant(source, function_name, index), source_path, "exec"), namespace)
+    return namespace[function_name].__code__
+
+
+def _run_mutants(jobs: list, workers: int, memory_mb: int = 0) -> list:
+    """
+    Runs up to `workers` forked mutants at once, each under `memory_mb` and a
+    CPU cap of its timeout.
+
+    Each job: {"mutant": dict, "function": fn, "code": code object, "items": [...], "timeout": s}
+    """
+    pending = list(reversed(jobs))
+    running = {}  # pid -> (job, fd, deadline)
+    results = []
+
+    def start(job):
+        def work():
+            job["function"].__code__ = job["code"]
+            for item in job["items"]:
+                if not _run_item(item):
+                    return {"killed_by": item.nodeid}, 1
+            return {}, 0
+        pid, fd = _forked(work, memory_mb, job["timeout"])
+        running[pid] = (job, fd, time.monotonic() + job["timeout"])
+
+    while pending or running:
+        while pending and len(running) < workers:
+            start(pending.pop())
+        # Sleep until a child finishes (its pipe closes) or the nearest deadline
+        now = time.monotonic()
+        wait = max(0.0, min(deadline for _, _, deadline in running.values()) - now)
+        select.select([fd for _, fd, _ in running.values()], [], [], wait)
+
+        for pid, (job, fd, deadline) in list(running.items()):
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            mutant = dict(job["mutant"])
+            if finished:
+                payload = _read_all(fd)
+                code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+                if code == 1:
+                    mutant.update(status="killed", **json.loads(payload or b"{}"))
+                elif code == 0:
+                    mutant["status"] = "survived"
+                else:
+                    mutant["status"] = "killed"
+                    mutant["killed_by"] = "crash"
+            elif time.monotonic() >= deadline:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                os.close(fd)
+                mutant["status"] = "timeout"
+            else:
+                continue
+            del running[pid]
+            results.append(mutant)
+    return results
+
+
+def _serve(session, request: dict) -> dict:
+    source_path = os.path.abspath(request["source_path"])
+    with open(source_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    module = importlib.import_module(request["import_path"])
+
+    memory_mb = request.get("memory_mb") or 0
+    baseline = _baseline(session.items, source_path, memory_mb)
+    usable = {b["nodeid"]: b for b in baseline if b["passed"]}
+    items = {item.nodeid: item for item in session.items}
+
+    jobs, results = [], []
+    for function_name in request["functions"]:
+        function = getattr(module, function_name, None)
+        if function is None or not inspect.isfunction(inspect.unwrap(function)):
+            continue
+        function = inspect.unwrap(function)
+        mutants = list_mutants(source, function_name)[:request.get("max_mutants") or None]
+        for m in mutants:
+            mutant = {"id": f"{function_name}:{m['index']}", "function_name": function_name,
+                      "lineno": m["lineno"], "description": m["description"]}
+            first, last = m["lines"]
+            selected = sorted((b for b in usable.values() if any(first <= n <= last for n in b["lines"])),
+                              key=lambda b: b["duration"])
+            if not selected:
+                results.append(dict(mutant, status="no_coverage"))
+                continue
+            try:
+                code = _mutant_code(module, source, source_path, function_name, m["index"])
+                # __code__ can only be swapped for one with the same closure variables
+                if code.co_freevars != function.__code__.co_freevars:
+                    raise ValueError("mutant changes the function's closure")
+            except Exception as e:
+                results.append(dict(mutant, status="error", error=f"{type(e).__name__}: {e}"))
+                continue
+            jobs.append({
+                "mutant": mutant,
+                "function": function,
+                "code": code,
+                "items": [items[b["nodeid"]] for b in selected],
+                "timeout": max(request.get("min_timeout", 1.0),
+                               request.get("timeout_factor", 10.0) * sum(b["duration"] for b in selected)),
+            })
+
+    results.extend(_run_mutants(jobs, max(1, request.get("workers") or 1), memory_mb))
+    order = {name: i for i, name in enumerate(request["functions"])}
+    results.sort(key=lambda m: (order[m["function_name"]], int(m["id"].rsplit(":", 1)[1])))
+    return {"baseline": baseline, "mutants": results, "error": None}
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    request_path = os.getenv("AUTOTEST_MUTATION_REQUEST")
+    if not request_path:
+        return None  # not a mutation run; let pytest run normally
+    with open(request_path, "r", encoding="utf-8") as f:
+        request = json.load(f)
+
+    if not hasattr(os, "fork"):
+        output = {"baseline": [], "mutants": [], "error": "mutation testing needs os.fork (POSIX)"}
+    else:
+        try:
+            output = _serve(session, request)
+        except Exception as e:
+            output = {"baseline": [], "mutants": [], "error": f"{type(e).__name__}: {e}"}
+    with open(request["results_file"], "w", encoding="utf-8") as f:
+        json.dump(output, f)
+    return True
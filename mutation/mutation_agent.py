@@ -0,0 +1,132 @@
+import json
+import subprocess
+import sys
+import tempfile
+
+from .utils import *
+
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def survivor_feedback(summary: dict, limit: int = 8) -> str:
+    """Describes surviving mutants so a regenerated suite can target them."""
+    lines = [f"- line {m['lineno']}: {m['description']}" for m in summary.get("survivors", [])[:limit]]
+    if not lines:
+        return ""
+    return ("The previous tests still passed after each of these changes to the function, "
+            "so add asserts that would fail for them:\n" + "\n".join(lines))
+
+
+class MutationTestingAgent(Runnable):
+    """
+    Scores generated tests by how many small injected bugs they catch.
+
+    Every function is mutated at the AST level (operator swaps, constant
+    tweaks, dropped negations, returns replaced by None). A single pytest
+    process, extended with the `mutation.fork_server` plugin, collects the
+    tests once and forks one child per mutant. Each child runs only the tests
+    covering the mutated statement and stops at the first failure. A mutant
+    is killed when a test fails, crashes or times out.
+
+    A function is weak when its mutation score (killed / mutants) is below
+    `threshold`.
+    """
+
+    def invoke(self, input_dict: dict) -> dict:
+        """
+        Args:
+            input_dict: {
+                "source_filename": <str>,        # file containing the functions under test
+                "test_filename": <str>,          # tests to score
+                "functions": List[str],          # functions to mutate
+                "import_path": <str>,            # (Optional) module name of source_filename
+                "cwd": <str>,                    # (Optional) where to run pytest
+                "threshold": <float>,            # (Optional) minimum acceptable score, default 0.6
+                "workers": <int>,                # (Optional) mutants run in parallel, default CPU count;
+                                                 #            concurrent runs should each pass their share
+                "memory_mb": <int>,              # (Optional) address-space cap per forked mutant
+                "max_mutants": <int>,            # (Optional) per function
+                "timeout_factor": <float>,       # (Optional) mutant timeout as a multiple of baseline time
+                "session_timeout": <float>       # (Optional) for the whole pytest process
+            }
+        Returns:
+            {
+                "status": "done" | <error>,
+                "functions": {
+                    function_name: {
+                        "score": <float or None>, "mutants", "killed", "survived", "timeouts",
+                        "no_coverage", "errors", "weak": bool,
+                        "survivors": [{"lineno", "description", "status"}]
+                    }
+                },
+                "mutants": List[dict]
+            }
+        """
+        source_path = os.path.abspath(input_dict["source_filename"])
+        test_path = input_dict["test_filename"]
+        functions = list(input_dict.get("functions", []))
+        import_path = input_dict.get("import_path") or os.path.splitext(os.path.basename(source_path))[0]
+        cwd = input_dict.get("cwd") or os.path.dirname(source_path)
+        threshold = input_dict.get("threshold", 0.6)
+
+        fd, request_file = tempfile.mkstemp(prefix="autotest_mutation_", suffix=".json")
+        os.close(fd)
+        results_file = request_file[:-len(".json")] + "_results.json"
+        with open(request_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "source_path": source_path,
+                "import_path": import_path,
+                "functions": functions,
+                "workers": input_dict.get("workers") or os.cpu_count() or 1,
+                "memory_mb": input_dict.get("memory_mb"),
+                "max_mutants": input_dict.get("max_mutants"),
+                "timeout_factor": input_dict.get("timeout_factor", 10.0),
+                "min_timeout": 1.0,
+                "results_file": results_file,
+            }, f)
+
+        env = dict(os.environ)
+        env["AUTOTEST_MUTATION_REQUEST"] = request_file
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (_PACKAGE_ROOT, os.path.dirname(source_path), env.get("PYTHONPATH", "")) if p)
+        output = {"baseline": [], "mutants": [], "error": None}
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "mutation.fork_server",
+                 test_path],
+                cwd=cwd, env=env, capture_output=True, text=True,
+                timeout=input_dict.get("session_timeout", 900.0)
+            )
+            if os.path.exists(results_file):
+                with open(results_file, "r", encoding="utf-8") as f:
+                    output = json.load(f)
+            else:
+                tail = (proc.stdout.strip().splitlines() or ["no output"])[-1]
+                output["error"] = f"pytest exited with {proc.returncode}: {tail}"
+        except subprocess.TimeoutExpired:
+            output["error"] = "mutation run timed out"
+        finally:
+            for path in (request_file, results_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        summaries = {}
+        for name in functions:
+            mutants = [m for m in output["mutants"] if m["function_name"] == name]
+            counts = {s: sum(1 for m in mutants if m["status"] == s)
+                      for s in ("killed", "survived", "timeout", "no_coverage", "error")}
+            scored = len(mutants) - counts["error"]
+            score = (counts["killed"] + counts["timeout"]) / scored if scored else None
+            summaries[name] = {
+                "score": score,
+                "mutants": len(mutants),
+                "killed": counts["killed"],
+                "survived": counts["survived"],
+                "timeouts": counts["timeout"],
+                "no_coverage": counts["no_coverage"],
+                "errors": counts["error"],
+                "weak": score is not None and score < threshold,
+                "survivors": [{"lineno": m["lineno"], "description": m["description"], "status": m["status"]}
+                              for m in mutants if m["status"] in ("survived", "no_coverage")],
+            }
+        return {"status": output["error"] or "done", "functions": summaries, "mutants": output["mutants"]}
@@ -0,0 +1,139 @@
+"""
+AST mutation operators for MutationTestingAgent.
+
+Each mutant changes exactly one site in one function: an operator swap
+(`+` -> `-`, `<` -> `<=`, `and` -> `or`, ...), a constant tweak (`n` -> `n + 1`,
+`True` -> `False`), a dropped `not`/unary minus, or a return value replaced
+by None. Sites are numbered in a fixed traversal order, so mutant `k` can be
+rebuilt from the source alone.
+"""
+import ast
+import copy
+from typing import List
+
+_BINOP_SWAPS = {
+    ast.Add: ast.Sub, ast.Sub: ast.Add,
+    ast.Mult: ast.Div, ast.Div: ast.Mult,
+    ast.FloorDiv: ast.Div, ast.Mod: ast.FloorDiv, ast.Pow: ast.Mult,
+    ast.BitAnd: ast.BitOr, ast.BitOr: ast.BitAnd,
+    ast.LShift: ast.RShift, ast.RShift: ast.LShift,
+}
+_CMPOP_SWAPS = {
+    ast.Eq: ast.NotEq, ast.NotEq: ast.Eq,
+    ast.Lt: ast.LtE, ast.LtE: ast.Lt, ast.Gt: ast.GtE, ast.GtE: ast.Gt,
+    ast.Is: ast.IsNot, ast.IsNot: ast.Is,
+    ast.In: ast.NotIn, ast.NotIn: ast.In,
+}
+_BOOLOP_SWAPS = {ast.And: ast.Or, ast.Or: ast.And}
+
+
+def _replaced(node, **changes):
+    new = copy.copy(node)
+    for name, value in changes.items():
+        setattr(new, name, value)
+    return new
+
+
+def _mutations(node, docstrings: set) -> list:
+    """[(new_node_factory), ...] for every mutation applicable at `node` itself."""
+    out = []
+    if isinstance(node, (ast.BinOp, ast.AugAssign)) and type(node.op) in _BINOP_SWAPS:
+        out.append(lambda: _replaced(node, op=_BINOP_SWAPS[type(node.op)]()))
+    elif isinstance(node, ast.Compare):
+        for i, op in enumerate(node.ops):
+            if type(op) in _CMPOP_SWAPS:
+                out.append(lambda i=i: _replaced(
+                    node, ops=node.ops[:i] + [_CMPOP_SWAPS[type(node.ops[i])]()] + node.ops[i + 1:]))
+    elif isinstance(node, ast.BoolOp):
+        out.append(lambda: _replaced(node, op=_BOOLOP_SWAPS[type(node.op)]()))
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        out.append(lambda: node.operand)
+    elif isinstance(node, ast.Constant) and id(node) not in docstrings:
+        value = node.value
+        if isinstance(value, bool):
+            out.append(lambda: ast.copy_location(ast.Constant(not value), node))
+        elif isinstance(value, (int, float)):
+            out.append(lambda: ast.copy_location(ast.Constant(value + 1), node))
+        elif isinstance(value, str):
+            out.append(lambda: ast.copy_location(ast.Constant("" if value else "mutant"), node))
+    elif isinstance(node, ast.Return) and node.value is not None and not (
+            isinstance(node.value, ast.Constant) and node.value.value is None):
+        out.append(lambda: _replaced(node, value=ast.copy_location(ast.Constant(None), node.value)))
+    return out
+
+
+class _Mutator(ast.NodeTransformer):
+    """Numbers mutation sites in pre-order; with `target` set, applies only that one."""
+
+    def __init__(self, docstrings: set, target: int = -1):
+        self.docstrings = docstrings
+        self.target = target
+        self.sites = []  # (node lineno, statement first line, statement last line, before, after)
+        self._statements = []
+
+    def visit(self, node):
+        if isinstance(node, ast.stmt):
+            self._statements.append(node)
+        try:
+            for make in _mutations(node, self.docstrings):
+                index = len(self.sites)
+                statement = self._statements[-1] if self._statements else node
+                new = make()
+                self.sites.append((
+                    getattr(node, "lineno", statement.lineno), statement.lineno, statement.end_lineno,
+                    ast.unparse(node), ast.unparse(new)
+                ))
+                if index == self.target:
+                    return new
+            return self.generic_visit(node)
+        finally:
+            if isinstance(node, ast.stmt):
+                self._statements.pop()
+
+
+def _docstring_ids(func: ast.AST) -> set:
+    ids = set()
+    for node in ast.walk(func):
+        body = getattr(node, "body", None)
+        if isinstance(body, list) and body and isinstance(body[0], ast.Expr) \
+                and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+            ids.add(id(body[0].value))
+    return ids
+
+
+def find_function(tree: ast.Module, function_name: str):
+    return next((n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+                 and n.name == function_name), None)
+
+
+def list_mutants(source: str, function_name: str) -> List[dict]:
+    """
+    Enumerates the mutants of top-level `function_name` in `source`.
+
+    Returns:
+        [{"index", "lineno", "lines": (first, last), "description"}]
+        where `lines` is the enclosing statement (used for coverage-based test selection).
+    """
+    func = find_function(ast.parse(source), function_name)
+    if func is None:
+        return []
+    mutator = _Mutator(_docstring_ids(func))
+    for statement in func.body:
+        mutator.visit(statement)
+    return [
+        {"index": i, "lineno": lineno, "lines": (first, last), "description": f"`{before}` -> `{after}`"}
+        for i, (lineno, first, last, before, after) in enumerate(mutator.sites)
+    ]
+
+
+def build_mutant(source: str, function_name: str, index: int) -> ast.Module:
+    """
+    A module containing only the mutated function (decorators dropped, original
+    line numbers kept), ready for compile().
+    """
+    func = copy.deepcopy(find_function(ast.parse(source), function_name))
+    mutator = _Mutator(_docstring_ids(func), target=index)
+    func.body = [mutator.visit(statement) for statement in func.body]
+    func.decorator_list = []
+    module = ast.Module(body=[func], type_ignores=[])
+    return ast.fix_missing_locations(module)
@@ -0,0 +1,3 @@
+import os
+import re
+from langchain_core.runnables import Runnable
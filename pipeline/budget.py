@@ -0,0 +1,157 @@
+import math
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from llm.complexity import complexity_metrics
+from scheduler.rate_limiter import estimate_tokens
+
+# Prompt template overhead and expected output per generation call, in estimated tokens
+PROMPT_OVERHEAD_TOKENS = 600
+OUTPUT_TOKENS_PER_CODE_TOKEN = 2.0
+
+
+class BudgetExhausted(Exception):
+    """Raised when the deadline or token budget leaves no room for the next step."""
+
+
+class RunBudget:
+    """
+    Wall-clock deadline plus token budget for one "anytime" run.
+
+    Steps call reserve() before spending tokens; a reservation is refused once
+    the deadline has passed or the estimate would exceed what is left, so the
+    run stops starting new work instead of overrunning. Either limit may be
+    None (unlimited). Thread-safe.
+    """
+
+    def __init__(self, deadline_seconds: Optional[float] = None, token_budget: Optional[int] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_seconds if deadline_seconds else None
+        self.token_budget = token_budget
+        self.tokens_reserved = 0
+        self.refused = []  # (what, reason)
+        self._lock = threading.Lock()
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def reserve(self, tokens: int, what: str = "") -> Optional[str]:
+        """Reserves `tokens`; returns None on success, else the reason it was refused."""
+        with self._lock:
+            if self.expired():
+                reason = "deadline reached"
+            elif self.token_budget is not None and self.tokens_reserved + tokens > self.token_budget:
+                reason = "token budget exhausted"
+            else:
+                self.tokens_reserved += tokens
+                return None
+            self.refused.append((what, reason))
+            return reason
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "deadline_seconds": None if self.deadline is None else self.deadline - self.started,
+                "elapsed_seconds": time.monotonic() - self.started,
+                "token_budget": self.token_budget,
+                "tokens_reserved": self.tokens_reserved,
+                "refused": len(self.refused),
+            }
+
+
+def generation_cost(code: str) -> int:
+    """Estimated tokens for one generation call on `code` (prompt + template + output)."""
+    code_tokens = estimate_tokens(code)
+    return int(PROMPT_OVERHEAD_TOKENS + code_tokens * (1 + OUTPUT_TOKENS_PER_CODE_TOKEN))
+
+
+def _line_ages(path: str) -> Dict[int, float]:
+    """{line: age in days} from `git blame`; uncommitted lines are age 0. Empty if not in git."""
+    try:
+        proc = subprocess.run(
+            ["git", "blame", "--line-porcelain", os.path.basename(path)],
+            cwd=os.path.dirname(os.path.abspath(path)), capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    if proc.returncode != 0:
+        return {}
+    ages, line, now = {}, None, time.time()
+    for row in proc.stdout.splitlines():
+        parts = row.split(" ")
+        if len(parts) >= 3 and len(parts[0]) == 40 and parts[1].isdigit():
+            line = int(parts[2])
+            # The all-zero hash marks uncommitted changes
+            if set(parts[0]) == {"0"}:
+                ages[line] = 0.0
+        elif row.startswith("committer-time ") and line is not None and line not in ages:
+            ages[line] = max(0.0, (now - int(row.split(" ", 1)[1])) / 86400.0)
+    return ages
+
+
+def rank_functions(blueprints: List[dict], source_path: str = "", previous: Optional[dict] = None,
+                   recency_days: float = 30.0) -> List[dict]:
+    """
+    Orders functions by expected value per estimated token.
+
+    Value grows with
+      - complexity (AST size / branches / fan-out: more logic worth testing),
+      - lack of coverage, from the previous run report: untested or failing
+        functions count fully, otherwise 1 - mutation score,
+      - recent change, from `git blame` of `source_path` (uncommitted = newest).
+    Cost is the estimated prompt plus output tokens for generating its tests.
+
+    Args:
+        previous: {"functions": {name: {...}}} from the last autotest_report.json.
+    Returns:
+        [{"function_name", "value", "cost", "score", "signals"}], best first.
+    """
+    previous_functions = (previous or {}).get("functions", {})
+    source = ""
+    if source_path and os.path.exists(source_path):
+        with open(source_path, "r", encoding="utf-8") as f:
+            source = f.read()
+    ages = _line_ages(source_path) if source else {}
+
+    ranked = []
+    for bp in blueprints:
+        name = bp.get("function_name", "")
+        code = bp.get("code", "")
+        metrics = complexity_metrics(code)
+        complexity = 1.0 + math.log1p(min(metrics["score"], 1e6))
+
+        history = previous_functions.get(name)
+        if not history or not history.get("tests_passed"):
+            gap = 1.0
+        elif history.get("mutation_score") is not None:
+            gap = 1.0 - history["mutation_score"]
+        else:
+            gap = 0.5
+
+        recency = 0.0
+        offset = source.find(code) if code else -1
+        if offset >= 0 and ages:
+            first = source.count("\n", 0, offset) + 1
+            span = [ages[n] for n in range(first, first + code.count("\n") + 1) if n in ages]
+            if span:
+                recency = math.exp(-min(span) / recency_days)
+
+        value = complexity * (0.25 + gap) * (1.0 + recency)
+        cost = generation_cost(code)
+        ranked.append({
+            "function_name": name,
+            "value": value,
+            "cost": cost,
+            "score": value / cost * 1000.0,
+            "signals": {"complexity": metrics["score"], "coverage_gap": gap, "recency": recency},
+        })
+    ranked.sort(key=lambda r: r["score"], reverse=True)
+    return ranked
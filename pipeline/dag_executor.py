@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+class TaskResult:
+    __slots__ = ("task_id", "status", "value", "error", "started", "finished")
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.status = "pending"  # pending | done | failed | upstream_failed
+        self.value = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def __repr__(self):
+        return f"TaskResult({self.task_id!r}, {self.status}, {self.duration:.3f}s)"
+
+
+class DAGExecutor:
+    """
+    Runs a dependency graph of tasks on a thread pool. A task starts as soon
+    as all of its dependencies have finished, so independent chains overlap
+    and total latency is set by the critical path rather than by per-phase
+    barriers.
+
+    Each task function receives a dict {dep_id: dep_value} of its dependencies'
+    results. If a task raises, everything downstream of it is marked
+    "upstream_failed" and the rest of the graph keeps running.
+
+    Usage:
+        dag = DAGExecutor(max_workers=8)
+        dag.add_task("a", lambda deps: 1)
+        dag.add_task("b", lambda deps: deps["a"] + 1, deps=["a"])
+        results = dag.run()
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._tasks: Dict[str, Callable[[dict], object]] = {}
+        self._deps: Dict[str, Tuple[str, ...]] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self.results: Dict[str, TaskResult] = {}
+
+    def add_task(self, task_id: str, fn: Callable[[dict], object], deps: Iterable[str] = ()) -> str:
+        if task_id in self._tasks:
+            raise ValueError(f"Duplicate task id: {task_id}")
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"Task '{task_id}' depends on unknown task '{dep}'")
+        self._tasks[task_id] = fn
+        self._deps[task_id] = deps
+        self._dependents[task_id] = []
+        for dep in deps:
+            self._dependents[dep].append(task_id)
+        return task_id
+
+    def run(self) -> Dict[str, TaskResult]:
+        """Executes every task once; returns {task_id: TaskResult}."""
+        self.results = {task_id: TaskResult(task_id) for task_id in self._tasks}
+        remaining = {task_id: len(deps) for task_id, deps in self._deps.items()}
+        outstanding = len(self._tasks)
+        lock = threading.Lock()
+        all_done = threading.Event()
+        if not outstanding:
+            return self.results
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag")
+
+        def finish(task_id):
+            # Called with `lock` held; returns the dependents that became ready
+            nonlocal outstanding
+            outstanding -= 1
+            ready = []
+            for child in self._dependents[task_id]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+            return ready
+
+        def run_task(task_id):
+            result = self.results[task_id]
+            failed_dep = next(
+                (d for d in self._deps[task_id] if self.results[d].status != "done"), None
+            )
+            result.started = time.monotonic()
+            if failed_dep is not None:
+                result.status = "upstream_failed"
+                result.error = f"dependency '{failed_dep}' did not complete"
+            else:
+                try:
+                    result.value = self._tasks[task_id](
+                        {d: self.results[d].value for d in self._deps[task_id]}
+                    )
+                    result.status = "done"
+                except Exception as e:
+                    result.status = "failed"
+                    result.error = e
+            result.finished = time.monotonic()
+
+            with lock:
+                ready = finish(task_id)
+                if outstanding == 0:
+                    all_done.set()
+            for child in ready:
+                pool.submit(run_task, child)
+
+        # Snapshot the roots first: once they start, workers decrement `remaining` concurrently
+        roots = [task_id for task_id, count in remaining.items() if count == 0]
+        try:
+            for task_id in roots:
+                pool.submit(run_task, task_id)
+            all_done.wait()
+        finally:
+            pool.shutdown(wait=True)
+        return self.results
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        The chain of tasks that determined total latency: starting from the
+        last task to finish, repeatedly step to the dependency that finished
+        last. Returns (task ids in execution order, wall-clock span in seconds).
+        """
+        finished = [r for r in self.results.values() if r.finished is not None]
+        if not finished:
+            return [], 0.0
+        current = max(finished, key=lambda r: r.finished)
+        end = current.finished
+        path = [current.task_id]
+        while self._deps[current.task_id]:
+            current = max((self.results[d] for d in self._deps[current.task_id]),
+                          key=lambda r: r.finished or 0.0)
+            path.append(current.task_id)
+        path.reverse()
+        return path, end - current.started
@@ -0,0 +1,207 @@
+import ast
+from typing import Iterable, List, Optional
+
+# Calls that make a statement CLI-bound (or otherwise unsafe to move into a pure function)
+_CLI_CALLS = {"input", "print", "exit", "quit"}
+_CLI_ATTRS = {("sys", "stdin"), ("sys", "stdout"), ("sys", "stderr"), ("sys", "exit"), ("sys", "argv")}
+# Wrappers allowed around input(): x = int(input("..."))
+_CONVERTERS = {"int", "float", "str", "bool", "complex"}
+
+
+def _is_call_to(node, names) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in names
+
+
+def _input_binding(stmt) -> Optional[str]:
+    """Returns the bound name if `stmt` is `x = input(...)` or `x = int(input(...))`."""
+    if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name)):
+        return None
+    value = stmt.value
+    if _is_call_to(value, _CONVERTERS) and len(value.args) == 1 and not value.keywords:
+        value = value.args[0]
+    if _is_call_to(value, {"input"}):
+        return stmt.targets[0].id
+    return None
+
+
+def _is_plain_print(stmt) -> bool:
+    return (
+        isinstance(stmt, ast.Expr)
+        and _is_call_to(stmt.value, {"print"})
+        and not stmt.value.keywords
+        and not any(isinstance(arg, ast.Starred) for arg in stmt.value.args)
+    )
+
+
+def _is_pure(stmt) -> bool:
+    """True if `stmt` can move into a pure function unchanged."""
+    for node in ast.walk(stmt):
+        if isinstance(node, (ast.Return, ast.Yield, ast.YieldFrom, ast.Await, ast.Global, ast.Nonlocal,
+                             ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return False
+        if _is_call_to(node, _CLI_CALLS):
+            return False
+        if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                and (node.value.id, node.attr) in _CLI_ATTRS):
+            return False
+    return True
+
+
+def _function_def(**fields) -> ast.FunctionDef:
+    """ast.FunctionDef from the fields this Python knows (type_params only exists on 3.12+)."""
+    return ast.FunctionDef(**{k: v for k, v in fields.items() if k in ast.FunctionDef._fields})
+
+
+def unique_name(base: str, taken: Iterable[str]) -> str:
+    """`base`, or `base_2`, `base_3`, ... if that name is already defined."""
+    taken = set(taken)
+    name, n = base, 2
+    while name in taken:
+        name, n = f"{base}_{n}", n + 1
+    return name
+
+
+def module_names(code: str) -> set:
+    """Names bound at the top level of `code` (functions, classes, assignments, imports)."""
+    try:
+        module = ast.parse(code)
+    except SyntaxError:
+        return set()
+    names = set()
+    for node in module.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((a.asname or a.name).split(".")[0] for a in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+    return names
+
+
+def refactor_cli_function(code: str, taken: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Deterministically refactors a CLI-bound function of the shape
+
+        def main():
+            a = int(input("a: "))      # input() bindings
+            b = input("b: ")
+            total = a + len(b)         # pure computation
+            print("Total:", total)     # trailing print()s
+
+    into a pure `main_logic(a, b)` that returns the printed values and a
+    `main()` wrapper that gathers the inputs, calls it and prints the results.
+
+    Only handles functions it can prove safe: input bindings first, then
+    statements free of I/O, returns and scope changes, then plain print()
+    calls. Returns None for anything else so the caller can fall back to
+    the LLM. If `main_logic` is among `taken` (names already defined in the
+    module), the pure function becomes `main_logic_2` and so on.
+
+    Returns:
+        A dict with the same keys as parse_refactor_response():
+        refactored_code, pure_function_signature, original_cli_function,
+        refactor_successful, notes
+    """
+    try:
+        module = ast.parse(code)
+    except SyntaxError:
+        return None
+    if len(module.body) != 1 or not isinstance(module.body[0], ast.FunctionDef):
+        return None
+    func = module.body[0]
+    args = func.args
+    if args.vararg or args.kwarg or args.kwonlyargs or args.posonlyargs:
+        return None
+
+    body = list(func.body)
+    docstring = None
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        docstring = body.pop(0)
+
+    # --- Split the body into input bindings / computation / prints ---
+    inputs: List[ast.stmt] = []
+    input_names: List[str] = []
+    while body and _input_binding(body[0]):
+        name = _input_binding(body[0])
+        if name in input_names:
+            return None  # rebinding an input; order of prompts would matter
+        input_names.append(name)
+        inputs.append(body.pop(0))
+
+    prints: List[ast.Expr] = []
+    while body and _is_plain_print(body[-1]):
+        prints.insert(0, body.pop())
+
+    compute = body
+    if not all(_is_pure(stmt) for stmt in compute):
+        return None
+
+    # Printed expressions are computed in the pure function; literals stay in the wrapper
+    returned = [arg for p in prints for arg in p.value.args if not isinstance(arg, ast.Constant)]
+    if not returned or not (inputs or prints):
+        return None
+    if not compute and all(isinstance(e, ast.Name) and e.id in input_names for e in returned):
+        return None  # just echoes its input; nothing worth extracting
+    for expr in returned:
+        if not _is_pure(expr):
+            return None
+
+    # --- Build the pure function ---
+    param_names = [a.arg for a in args.args] + input_names
+    if len(set(param_names)) != len(param_names):
+        return None
+    pure_name = unique_name(f"{func.name}_logic", set(taken) | {func.name})
+    return_value = returned[0] if len(returned) == 1 else ast.Tuple(elts=returned, ctx=ast.Load())
+    pure = _function_def(
+        name=pure_name,
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=n) for n in param_names], vararg=None,
+                           kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[]),
+        body=[
+            ast.Expr(ast.Constant(f"Pure logic extracted from {func.name}().")),
+            *compute,
+            ast.Return(value=return_value),
+        ],
+        decorator_list=[],
+        returns=None,
+        type_params=[],
+    )
+
+    # --- Build the CLI wrapper ---
+    result_names = ["result"] if len(returned) == 1 else [f"result_{i}" for i in range(len(returned))]
+    call = ast.Call(func=ast.Name(pure_name, ast.Load()),
+                    args=[ast.Name(n, ast.Load()) for n in param_names], keywords=[])
+    target = (ast.Name(result_names[0], ast.Store()) if len(result_names) == 1
+              else ast.Tuple(elts=[ast.Name(n, ast.Store()) for n in result_names], ctx=ast.Store()))
+    results = iter(result_names)
+    wrapper_prints = [
+        ast.Expr(ast.Call(
+            func=ast.Name("print", ast.Load()),
+            args=[arg if isinstance(arg, ast.Constant) else ast.Name(next(results), ast.Load())
+                  for arg in p.value.args],
+            keywords=[],
+        ))
+        for p in prints
+    ]
+    wrapper = _function_def(
+        name=func.name,
+        args=func.args,
+        body=([docstring] if docstring else []) + inputs + [ast.Assign(targets=[target], value=call)] + wrapper_prints,
+        decorator_list=func.decorator_list,
+        returns=func.returns,
+        type_params=getattr(func, "type_params", []),
+    )
+
+    refactored = ast.Module(body=[pure, wrapper], type_ignores=[])
+    ast.fix_missing_locations(refactored)
+    pure_code = ast.unparse(pure)
+    wrapper_code = ast.unparse(wrapper)
+    return {
+        "refactored_code": f"{pure_code}\n\n{wrapper_code}",
+        "pure_function_signature": pure_code.splitlines()[0],
+        "original_cli_function": wrapper_code.splitlines()[len(func.decorator_list)],
+        "refactor_successful": True,
+        "notes": "Refactored locally (AST): input() bindings became parameters, printed values became return values."
+    }
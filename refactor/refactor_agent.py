@@ -1,4 +1,7 @@
+import ast
 import os
+import re
+from concurrent.futures import CancelledError, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -7,6 +10,9 @@ from langchain_openai import OpenAI
 from langchain_core.runnables import Runnable
 from langchain_core.runnables import RunnableLambda
 
+from refactor.ast_refactorer import refactor_cli_function, module_names, unique_name
+from utils.code_parser import extract_function_code
+
 PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "prompts", "refactor_agent_prompt.txt")
 with open(PROMPT_PATH, "r", encoding="utf-8") as f:
     refactor_prompt = f.read()
@@ -23,7 +29,7 @@ refactor_prompt_template = PromptTemplate(
     template=refactor_prompt
 )
 
-llm = OpenAI(
+default_llm = OpenAI(
     model="gpt-3.5-turbo-instruct",
     temperature=0,
     openai_api_key=os.getenv("OPENAI_API_KEY")
@@ -59,16 +65,102 @@ def parse_refactor_response(response: str) -> dict:
             "notes": f"Failed to parse LLM response: {e}"
         }
 
+def _definition_source(lines: list, node) -> str:
+    # A def's own lineno skips its decorators
+    start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+    return "".join(lines[start - 1:node.end_lineno])
+
+
+def select_refactored_functions(refactored_code: str, wrapper_name: str, pure_name: str,
+                                module_code: str = "") -> tuple:
+    """
+    Keeps only what an LLM refactor may splice in place of the original
+    function: the pure function, the CLI wrapper, and any import the module
+    doesn't already have. Other helpers the model re-emitted are dropped so
+    they don't duplicate definitions in the module. If `pure_name` clashes
+    with a name the module already defines, it is renamed along with the
+    wrapper's calls to it.
+
+    Returns:
+        (code, pure_name), with code "" if either function is missing.
+    """
+    try:
+        tree = ast.parse(refactored_code)
+    except SyntaxError:
+        return "", pure_name
+    defs = {node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    if wrapper_name not in defs or pure_name not in defs or wrapper_name == pure_name:
+        return "", pure_name
+
+    try:
+        existing_imports = {ast.unparse(node) for node in ast.parse(module_code).body
+                            if isinstance(node, (ast.Import, ast.ImportFrom))}
+    except SyntaxError:
+        existing_imports = set()
+    imports = [ast.unparse(node) + "\n" for node in tree.body
+               if isinstance(node, (ast.Import, ast.ImportFrom)) and ast.unparse(node) not in existing_imports]
+    lines = refactored_code.splitlines(keepends=True)
+    pure_code = _definition_source(lines, defs[pure_name])
+    wrapper_code = _definition_source(lines, defs[wrapper_name])
+
+    # --- Don't clobber a name the module already defines ---
+    new_name = unique_name(pure_name, module_names(module_code) | {wrapper_name})
+    if new_name != pure_name:
+        rename = re.compile(rf"\b{re.escape(pure_name)}\b")
+        pure_code = rename.sub(new_name, pure_code)
+        wrapper_code = rename.sub(new_name, wrapper_code)
+        pure_name = new_name
+
+    code = "".join(imports) + ("\n" if imports else "") + pure_code.rstrip() + "\n\n\n" + wrapper_code.rstrip() + "\n"
+    return code, pure_name
+
+
 class RefactorAgent(Runnable):
     """
     LangChain-compatible agent for refactoring CLI-heavy Python functions
     by extracting internal logic into a pure function.
     """
 
-    def __init__(self):
-        self.chain = refactor_prompt_template | llm | RunnableLambda(lambda x: {"output": x})
+    def __init__(self, llm=None):
+        # Chat models (e.g. routed tiers) return messages; completion models return strings
+        self.chain = (
+            refactor_prompt_template
+            | (llm if llm is not None else default_llm)
+            | RunnableLambda(lambda x: {"output": getattr(x, "content", x)})
+        )
+
+    @staticmethod
+    def validate_response(text: str) -> bool:
+        """True if the raw LLM response is a successful refactor whose code parses (gates the shared cache)."""
+        parsed = parse_refactor_response(text)
+        code = parsed.get("refactored_code", "") if isinstance(parsed, dict) else ""
+        if not isinstance(code, str) or not code.strip() or not parsed.get("refactor_successful", False):
+            return False
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            return False
+        return True
 
     def invoke(self, input_dict: dict) -> dict:
+        """
+        Args:
+            input_dict: {
+                "function_signature": <str>,
+                "description": <str>,
+                "code": <str>,
+                "filename": <str>,
+                "test_filename": <str>,
+                "dependencies": List[str],
+                "module_code": <str>,             # (Optional) source of the whole module; read from filename if omitted
+                "import_path": <str>,             # (Optional) module, for the scheduler's priority function
+                "scheduler": <LLMScheduler>,      # (Optional) rate-limits the LLM call
+                "priority": <float>,              # (Optional) explicit scheduler priority (lower runs first)
+                "timeout": <float>                # (Optional) max seconds to wait for a scheduled call
+            }
+        Returns:
+            {"new_function_blueprint": dict, "updated_cli_code": <str>, "replace_original": <bool>}
+        """
         # Extract required fields from input_dict
         function_signature = input_dict.get("function_signature", "")
         description = input_dict.get("description", "")
@@ -76,6 +168,13 @@ class RefactorAgent(Runnable):
         filename = input_dict.get("filename", "")
         test_filename = input_dict.get("test_filename", "")
         dependencies = input_dict.get("dependencies", [])
+        module_code = input_dict.get("module_code")
+        if module_code is None:
+            try:
+                with open(filename, "r", encoding="utf-8") as f:
+                    module_code = f.read()
+            except (OSError, TypeError):
+                module_code = ""
 
         # Compose suggestion for the LLM
         suggestion = (
@@ -92,23 +191,55 @@ class RefactorAgent(Runnable):
                 "replace_original": False
             }
 
-        # Prepare LLM input
-        llm_input = {
-            "code": code,
-            "function_signature": function_signature,
-            "function_name": function_signature.split("(")[0].replace("def ", "").strip(),
-            "source_filename": filename,
-            "test_filename": test_filename,
-            "suggestion": suggestion
-        }
+        # Try the deterministic AST refactor first; only patterns it can't prove safe go to the LLM
+        function_name = function_signature.split("(")[0].replace("def ", "").strip()
+        parsed = refactor_cli_function(code, taken=module_names(module_code))
+        from_llm = parsed is None
+        if from_llm:
+            # Prepare LLM input
+            llm_input = {
+                "code": code,
+                "function_signature": function_signature,
+                "function_name": function_name,
+                "source_filename": filename,
+                "test_filename": test_filename,
+                "suggestion": suggestion
+            }
 
-        # Call the LLM
-        result = self.chain.invoke(llm_input)
-        response = result.get("output", "")
-        parsed = parse_refactor_response(response)
+            # Call the LLM, through the scheduler's rate limits when there is one
+            scheduler = input_dict.get("scheduler")
+            if scheduler is not None:
+                priority = input_dict.get("priority")
+                future = scheduler.submit(
+                    lambda: self.chain.invoke(llm_input), prompt=refactor_prompt_template.format(**llm_input),
+                    module=input_dict.get("import_path", ""),
+                    **({"priority": float(priority)} if priority is not None else {})
+                )
+                try:
+                    result = future.result(timeout=input_dict.get("timeout"))
+                except (FuturesTimeoutError, CancelledError):
+                    # Out of time (e.g. the run's deadline); a late response is simply discarded
+                    future.cancel()
+                    return {
+                        "new_function_blueprint": {},
+                        "updated_cli_code": "",
+                        "replace_original": False
+                    }
+            else:
+                result = self.chain.invoke(llm_input)
+            response = result.get("output", "")
+            parsed = parse_refactor_response(response)
+
+        # The refactored code (pure function + CLI wrapper) replaces the original
+        # function as a whole, so it must at least parse
+        refactored_code = parsed.get("refactored_code", "").strip()
+        try:
+            ast.parse(refactored_code)
+        except SyntaxError:
+            refactored_code = ""
 
-        # If the LLM didn't return a valid refactor, mark as unsuccessful
-        if not parsed.get("refactor_successful", False):
+        # If the refactor wasn't valid, mark as unsuccessful
+        if not parsed.get("refactor_successful", False) or not refactored_code:
             return {
                 "new_function_blueprint": {},
                 "updated_cli_code": "",
@@ -117,31 +248,35 @@ class RefactorAgent(Runnable):
 
         # Build the new function blueprint
         new_fn_sig = parsed.get("pure_function_signature", "")
+        new_fn_name = re.match(r"\s*(?:def\s+)?([a-zA-Z_][a-zA-Z0-9_]*)", new_fn_sig or "")
+        new_fn_name = new_fn_name.group(1) if new_fn_name else ""
+
+        # The model may have re-emitted imports or other helpers; splice only the two functions
+        if from_llm:
+            refactored_code, renamed = select_refactored_functions(refactored_code, function_name, new_fn_name,
+                                                                   module_code)
+            if not refactored_code:
+                return {
+                    "new_function_blueprint": {},
+                    "updated_cli_code": "",
+                    "replace_original": False
+                }
+            if renamed != new_fn_name:
+                new_fn_sig = re.sub(rf"\b{re.escape(new_fn_name)}\b", renamed, new_fn_sig, count=1)
+                new_fn_name = renamed
         new_fn_desc = f"Pure logic extracted from {function_signature}."
         new_fn_blueprint = {
             "function_signature": new_fn_sig,
+            "function_name": new_fn_name,
+            "code": extract_function_code(refactored_code, new_fn_name) if new_fn_name else "",
             "description": new_fn_desc,
             "filename": filename,
             "test_filename": test_filename,
             "dependencies": []
         }
 
-        updated_cli_code = ""
-        # Try to extract the updated CLI function from the refactored_code
-        refactored_code = parsed.get("refactored_code", "")
-        cli_fn_sig = parsed.get("original_cli_function", "")
-        if cli_fn_sig and refactored_code:
-            # Extract the CLI function code block
-            import re
-            pattern = rf"({cli_fn_sig}\s*:[\s\S]+?)(?=\ndef |\Z)"
-            match = re.search(pattern, refactored_code)
-            if match:
-                updated_cli_code = match.group(1).rstrip()
-            else:
-                updated_cli_code = ""  # fallback
-
         return {
             "new_function_blueprint": new_fn_blueprint,
-            "updated_cli_code": updated_cli_code,
+            "updated_cli_code": refactored_code,
             "replace_original": True
-        }
\ No newline at end of file
+        }
@@ -1,21 +1,99 @@
+import functools
+import json
 import os
 import sys
-import subprocess
 
 # === Setup Paths ===
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TARGET_FILE = os.path.join(ROOT_DIR, "autotest_target_file.py")
 TEST_SUITE_FILE = os.path.join(ROOT_DIR, "test_suite.py")
+RUNS_DIR = os.path.join(ROOT_DIR, ".autotest_runs")
+REPORT_FILE = os.path.join(ROOT_DIR, "autotest_report.json")
+MANIFEST_FILE = os.path.join(ROOT_DIR, "test_manifest.json")
+BENCHMARKS_DIR = os.path.join(ROOT_DIR, "benchmarks")
+COMPLEXITY_TEST_FILE = os.path.join(ROOT_DIR, "test_complexity_regression.py")
+FUZZ_SNAPSHOT_DIR = os.path.join(ROOT_DIR, "fuzz_snapshots")
+EXTENDED_TEST_SUITE_FILE = os.path.join(ROOT_DIR, "extended_test_suite.py")
+INDEX_FILE = os.path.join(ROOT_DIR, ".autotest_index.sqlite")
 
 # Ensure root is in sys.path for module imports
 sys.path.insert(0, ROOT_DIR)
 
 # === Import Pipeline Agents ===
 from blueprint.blueprint_builder import build_blueprints_from_file
+from blueprint.symbol_index import SymbolIndex
 from testability.testability_analyzer import TestabilityAnalyzerAgent
 from testability.refactor_trigger import RefactorTriggerAgent
 from refactor.refactor_agent import RefactorAgent
-from test_suite_gen.test_suite_coordinator import TestSuiteCoordinatorAgent
+from testability.testability_coordinator import TestabilityCoordinatorAgent
+from test_suite_gen.test_suite_gen import TestSuiteGenAgent
+from test_suite_gen.test_suite_cleaner import TestSuiteCleanerAgent
+from test_suite_gen.test_suite_writer import TestSuiteWriterAgent
+from test_suite_gen.suite_minimizer import TestSuiteMinimizerAgent
+from scheduler.llm_scheduler import LLMScheduler
+from llm.model_router import ModelRouter
+from llm.cache_client import GenerationCacheClient
+from run.run_report import RunReport
+from run.test_runner import TestLimits, run_tests_with_limits
+from benchmark_gen.benchmark_gen import BenchmarkGenAgent
+from complexity.complexity_probe import ComplexityProbeAgent, GROWTH_RANK
+from fuzz.property_fuzzer import PropertyFuzzAgent
+from mutation.mutation_agent import MutationTestingAgent, survivor_feedback
+from pipeline.budget import RunBudget, rank_functions
+
+# Provider limits for the LLM scheduler (override per account tier)
+LLM_RPM = int(os.getenv("AUTOTEST_LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("AUTOTEST_LLM_TPM", "60000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("AUTOTEST_LLM_MAX_CONCURRENCY", "8"))
+
+# Persistent symbol index: unchanged files/functions skip re-splitting and re-analysis (0 disables)
+USE_INDEX = os.getenv("AUTOTEST_INDEX", "1") == "1"
+
+# Optional "anytime" mode: stop starting LLM work after AUTOTEST_DEADLINE seconds or once
+# AUTOTEST_TOKEN_BUDGET estimated tokens are spent; the most valuable functions go first
+DEADLINE_SECONDS = float(os.getenv("AUTOTEST_DEADLINE", "0")) or None
+TOKEN_BUDGET = int(os.getenv("AUTOTEST_TOKEN_BUDGET", "0")) or None
+
+# Optional: shared generation cache (`python -m llm.cache_server`); unset or unreachable = generate locally.
+# Writes are signed with AUTOTEST_CACHE_SECRET if the server requires one; AUTOTEST_CACHE_READ_ONLY=1 never writes
+CACHE_URL = os.getenv("AUTOTEST_CACHE_URL", "")
+CACHE_SECRET = os.getenv("AUTOTEST_CACHE_SECRET", "")
+CACHE_READ_ONLY = os.getenv("AUTOTEST_CACHE_READ_ONLY", "0") == "1"
+
+# Optional: score each function's tests by mutation testing; weak ones are regenerated once
+MUTATION_TESTING = os.getenv("AUTOTEST_MUTATION", "0") == "1"
+MIN_MUTATION_SCORE = float(os.getenv("AUTOTEST_MIN_MUTATION_SCORE", "0.6"))
+# Forked mutants per function; functions are scored concurrently, so by default they split the CPUs
+MUTATION_WORKERS = (int(os.getenv("AUTOTEST_MUTATION_WORKERS", "0"))
+                    or max(1, (os.cpu_count() or 1) // LLM_MAX_CONCURRENCY))
+# Seconds for one function's whole mutation run (never past the anytime deadline)
+MUTATION_SESSION_TIMEOUT = float(os.getenv("AUTOTEST_MUTATION_TIMEOUT", "900"))
+
+# Optional: trim the consolidated suite to a coverage-equivalent subset (the rest goes to EXTENDED_TEST_SUITE_FILE);
+# with AUTOTEST_MUTATION, every mutant some test killed also stays killed
+MINIMIZE_SUITE = os.getenv("AUTOTEST_MINIMIZE", "0") == "1"
+
+# Optional: also emit performance benchmarks for every tested function
+GENERATE_BENCHMARKS = os.getenv("AUTOTEST_BENCHMARKS", "0") == "1"
+
+# Optional: estimate each function's growth class and flag anything worse than MAX_COMPLEXITY;
+# PIN_COMPLEXITY also writes regression tests that fail if the scaling gets worse
+PROBE_COMPLEXITY = os.getenv("AUTOTEST_COMPLEXITY", "0") == "1"
+MAX_COMPLEXITY = os.getenv("AUTOTEST_MAX_COMPLEXITY", "O(n log n)")
+PIN_COMPLEXITY = os.getenv("AUTOTEST_PIN_COMPLEXITY", "0") == "1"
+
+# Optional: batch-fuzz numeric functions and diff against stored input/output snapshots
+FUZZ = os.getenv("AUTOTEST_FUZZ", "0") == "1"
+FUZZ_UPDATE_SNAPSHOTS = os.getenv("AUTOTEST_FUZZ_UPDATE", "0") == "1"
+FUZZ_BATCH_SIZE = int(os.getenv("AUTOTEST_FUZZ_BATCH_SIZE", "4096"))
+
+# Bounds for each generated test (seconds / MB)
+TEST_LIMITS = TestLimits(
+    test_timeout=float(os.getenv("AUTOTEST_TEST_TIMEOUT", "10")),
+    test_cpu=float(os.getenv("AUTOTEST_TEST_CPU", "10")),
+    memory_mb=int(os.getenv("AUTOTEST_TEST_MEMORY_MB", "1024")),
+    session_timeout=float(os.getenv("AUTOTEST_TEST_SESSION_TIMEOUT", "120"))
+)
 
 
 def load_target_code(path: str) -> str:
@@ -31,68 +109,267 @@ def clear_test_suite_file(path: str):
         f.write("")  # Clear previous test suite
 
 
-def run_pytest(path: str):
+def run_function_tests(function_name: str, test_code: str, budget: RunBudget = None) -> dict:
+    """
+    Runs one function's generated tests in their own pytest process, so each
+    function can be executed as soon as its tests exist. Tests that exceed
+    the per-test limits are quarantined (skipped) and listed in the manifest.
+    With a deadline in `budget`, the run never outlasts it.
+    """
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = os.path.join(RUNS_DIR, f"test_{function_name}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(test_code)
+    result = run_tests_with_limits(path, cwd=ROOT_DIR, limits=TEST_LIMITS, manifest_path=MANIFEST_FILE,
+                                   deadline=budget.deadline if budget is not None else None)
+    # Hand back the (possibly quarantined) tests so the consolidated suite matches what ran
+    with open(path, "r", encoding="utf-8") as f:
+        result["test_code"] = f.read()
+    return result
+
+
+def run_mutation_tests(function_name: str, test_code: str, budget: RunBudget = None) -> dict:
+    """
+    Mutation score for one function's tests (run in their own file so reruns
+    don't clash). With a deadline in `budget`, the run never outlasts it.
+    """
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = os.path.join(RUNS_DIR, f"mutation_test_{function_name}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(test_code)
+    session_timeout = MUTATION_SESSION_TIMEOUT
+    remaining = budget.remaining_seconds() if budget is not None else None
+    if remaining is not None:
+        session_timeout = min(session_timeout, remaining)
+    scored = MutationTestingAgent().invoke({
+        "source_filename": TARGET_FILE,
+        "test_filename": path,
+        "functions": [function_name],
+        "cwd": ROOT_DIR,
+        "threshold": MIN_MUTATION_SCORE,
+        "workers": MUTATION_WORKERS,
+        "memory_mb": TEST_LIMITS.memory_mb,
+        "session_timeout": session_timeout
+    })
+    summary = dict(scored["functions"].get(function_name, {}), status=scored["status"])
+    if scored["status"] == "mutation run timed out" and session_timeout < MUTATION_SESSION_TIMEOUT:
+        summary["unfinished"] = "deadline reached during mutation testing"
+    summary["feedback"] = survivor_feedback(summary)
+    # {test (nodeid without the file): [mutant ids]}, so the minimizer keeps every killed mutant killed
+    kills = {}
+    for mutant in scored["mutants"]:
+        killer = mutant.get("killed_by", "")
+        if mutant.get("status") == "killed" and "::" in killer:
+            kills.setdefault(killer.split("::", 1)[1], []).append(mutant["id"])
+    summary["kills"] = kills
+    return summary
+
+
+def load_previous_report(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
     try:
-        subprocess.run(
-            [sys.executable, "-m", "pytest", path],
-            cwd=ROOT_DIR,
-            capture_output=False
-        )
-    except Exception as e:
-        print(f"❌ Failed to run pytest: {e}")
-        sys.exit(1)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
 
 def main():
+    if PROBE_COMPLEXITY and MAX_COMPLEXITY not in GROWTH_RANK:
+        # Fail before spending anything rather than silently flagging nothing at the end
+        print(f"❌ Unknown AUTOTEST_MAX_COMPLEXITY {MAX_COMPLEXITY!r}; expected one of {', '.join(GROWTH_RANK)}")
+        sys.exit(1)
     print("🧠 Analyzing functions...")
+    report = RunReport()
 
     # Step 1: Load code
-    code = load_target_code(TARGET_FILE)
-
-    # Step 2: Extract function blueprints
-    blueprints = build_blueprints_from_file(TARGET_FILE)
-
-    # Step 3: Analyze testability
-    analyzer = TestabilityAnalyzerAgent()
-    testability_reports = analyzer.invoke({"code": code, "filename": TARGET_FILE})
-
-    # Step 4: Refactor (if needed)
-    if any(r.get("action") == "refactor_required" for r in testability_reports):
-        print("🔁 Refactoring required functions...")
-        refactor_trigger = RefactorTriggerAgent()
-        refactor_agent = RefactorAgent()
-
-        # Filter only refactor-needed items
-        refactor_map = {
-            r["function_name"]: r
-            for r in testability_reports if r.get("action") == "refactor_required"
-        }
-        refactor_blueprints = [bp for bp in blueprints if bp["function_name"] in refactor_map]
-        updated = refactor_trigger.invoke({
-            "reports": list(refactor_map.values()),
-            "blueprints": refactor_blueprints,
-            "refactor_agent": refactor_agent
-        })
+    load_target_code(TARGET_FILE)
+
+    # Step 2: Extract function blueprints (from the symbol index when the file is unchanged)
+    index = SymbolIndex(INDEX_FILE) if USE_INDEX else None
+    blueprints = build_blueprints_from_file(TARGET_FILE, index=index)
 
-        # Merge back into full blueprint set
-        blueprints = [
-            bp for bp in blueprints if bp["function_name"] not in refactor_map
-        ] + updated
+    # Step 2b (optional): Rank functions by value per token for the deadline / token budget
+    budget, ranking = None, []
+    if DEADLINE_SECONDS or TOKEN_BUDGET:
+        budget = RunBudget(deadline_seconds=DEADLINE_SECONDS, token_budget=TOKEN_BUDGET)
+        ranking = rank_functions(blueprints, TARGET_FILE, load_previous_report(REPORT_FILE))
+        print(f"⏳ Anytime mode (deadline {DEADLINE_SECONDS or '-'}s, token budget {TOKEN_BUDGET or '-'}); "
+              f"order: {', '.join(r['function_name'] for r in ranking)}")
+
+    # Step 3: Analyze, refactor, generate and run tests per function.
+    # Each function moves through the phases independently, so they overlap.
+    print("🛠️ Building and running test suite...")
+    coordinator = TestabilityCoordinatorAgent()
+    cache = GenerationCacheClient(CACHE_URL, secret=CACHE_SECRET, read_only=CACHE_READ_ONLY) if CACHE_URL else None
+    router = ModelRouter(cache=cache)
+    scheduler = LLMScheduler(rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY)
+    try:
+        outcome = coordinator.invoke({
+            "blueprints": blueprints,
+            "analyzer": TestabilityAnalyzerAgent(index=index),
+            "refactor_trigger": RefactorTriggerAgent(),
+            "refactor_agent": RefactorAgent(),
+            "test_suite_gen_agent": TestSuiteGenAgent(),
+            "cleaner_agent": TestSuiteCleanerAgent(),
+            "run_tests": functools.partial(run_function_tests, budget=budget),
+            "scheduler": scheduler,
+            "router": router,
+            "mutation_test": functools.partial(run_mutation_tests, budget=budget) if MUTATION_TESTING else None,
+            "budget": budget,
+            "priorities": {r["function_name"]: r["score"] for r in ranking}
+        })
+    finally:
+        if budget is not None and budget.expired():
+            # Past the deadline: drop queued calls and don't wait for in-flight ones
+            scheduler.cancel_pending()
+            scheduler.shutdown(wait=False)
+        else:
+            scheduler.shutdown(wait=True)
+    report.set("scheduler", scheduler.metrics())
+    report.set("critical_path", outcome["critical_path"])
+    report.set("model_routing", router.summary())
+    if cache is not None:
+        report.set("generation_cache", dict(cache.stats, url=CACHE_URL))
 
-    # Step 5: Clear test suite
+    # Step 4: Write the consolidated test suite, in source order
     clear_test_suite_file(TEST_SUITE_FILE)
+    writer = TestSuiteWriterAgent()
+    runtimes, quarantined, unfinished = [], [], []
+    # Past the deadline, per-function steps and optional stages are skipped and reported
+    skipped_stages = []
+    mutation_kills = {}  # consolidated-suite nodeid -> mutant ids it kills
+    suite_name = os.path.relpath(TEST_SUITE_FILE, ROOT_DIR)
+    for result in outcome["results"]:
+        if result.get("unfinished"):
+            unfinished.append({"function_name": result["function_name"], "reason": result["unfinished"]})
+            report.record_function(result["function_name"], unfinished=result["unfinished"])
+        skipped_stages.extend(f"{step}:{result['function_name']}" for step in result.get("skipped", []))
+        writer.invoke({
+            "test_code": result["test_code"],
+            "test_filename": os.path.join(ROOT_DIR, result["test_filename"] or "test_suite.py"),
+            "function_name": result["function_name"]
+        })
+        run = result.get("outcome") or {}
+        passed = run.get("returncode") == 0
+        runtimes.extend(run.get("tests", []))
+        quarantined.extend(run.get("quarantined", []))
+        report.record_function(result["function_name"], status=result["status"], tests_passed=passed,
+                               model_tier=result.get("tier"), quarantined=run.get("quarantined", []),
+                               test_stats=run.get("stats"))
+        print(f"{'✅' if passed else '❌'} {result['function_name']}: {result['status']}")
+        if index is not None and result["test_code"]:
+            index.set_test_hash(TARGET_FILE, result["function_name"], result["test_code"])
+        mutation = result.get("mutation")
+        if mutation:
+            for test, mutants in mutation.get("kills", {}).items():
+                mutation_kills.setdefault(f"{suite_name}::{test}", []).extend(mutants)
+            report.record_function(result["function_name"], mutation_score=mutation.get("score"),
+                                   mutation_weak=mutation.get("weak"),
+                                   surviving_mutants=mutation.get("survivors", []))
+            if mutation.get("score") is not None:
+                print(f"{'🧬' if not mutation.get('weak') else '⚠️'} {result['function_name']}: "
+                      f"mutation score {mutation['score']:.0%} ({mutation['killed'] + mutation['timeouts']}"
+                      f"/{mutation['mutants']} mutants killed)")
 
-    # Step 6: Generate test suite
-    print("🛠️ Building test suite...")
-    coordinator = TestSuiteCoordinatorAgent()
-    coordinator.invoke({
-        "blueprints": blueprints,
-        "testability_reports": testability_reports
+    report.set("test_runtime", {
+        "total_duration": sum(t["duration"] for t in runtimes),
+        "slowest": sorted(runtimes, key=lambda t: t["duration"], reverse=True)[:10],
+        "quarantined": len(quarantined),
+        "timeouts": sum(1 for q in quarantined if q["reason"] in ("timeout", "cpu"))
     })
 
-    # Step 7: Run tests
-    print("🚀 Running tests...")
-    run_pytest(TEST_SUITE_FILE)
+    def stage_allowed(stage: str) -> bool:
+        if budget is None or not budget.expired():
+            return True
+        skipped_stages.append(stage)
+        print(f"⌛ Skipping {stage}: deadline reached")
+        return False
+
+    # Step 4b (optional): Minimize the suite, keeping line/branch coverage of the target
+    if MINIMIZE_SUITE and stage_allowed("suite_minimization"):
+        minimized = TestSuiteMinimizerAgent().invoke({
+            "test_filename": TEST_SUITE_FILE,
+            "targets": [TARGET_FILE],
+            "extended_filename": EXTENDED_TEST_SUITE_FILE,
+            "mutation_kills": mutation_kills,
+            "cwd": ROOT_DIR
+        })
+        report.set("suite_minimization", minimized)
+        if minimized["status"] == "minimized":
+            print(f"✂️ Kept {len(minimized['kept'])} of {len(minimized['kept']) + len(minimized['moved'])} tests "
+                  f"({minimized['minimized_duration']:.2f}s of {minimized['original_duration']:.2f}s); "
+                  f"the rest moved to {EXTENDED_TEST_SUITE_FILE}")
+
+    # Step 5 (optional): Generate benchmarks alongside the tests
+    if GENERATE_BENCHMARKS and stage_allowed("benchmarks"):
+        tested = {r["function_name"] for r in outcome["results"] if r["status"] == "generated"}
+        benchmarks = BenchmarkGenAgent().invoke({
+            "blueprints": [bp for bp in outcome["blueprints"] if bp.get("function_name") in tested],
+            "output_dir": BENCHMARKS_DIR
+        })
+        report.set("benchmarks", benchmarks)
+        print(f"📊 Wrote {sum(b['status'] == 'written' for b in benchmarks)} benchmark module(s) to {BENCHMARKS_DIR}; "
+              "run them with `python -m benchmark_gen.compare run`")
+
+    # Step 6 (optional): Probe empirical complexity
+    if PROBE_COMPLEXITY and stage_allowed("complexity"):
+        tested = {r["function_name"] for r in outcome["results"] if r["status"] == "generated"}
+        probe = ComplexityProbeAgent()
+        complexities = probe.invoke({
+            "blueprints": [bp for bp in outcome["blueprints"] if bp.get("function_name") in tested],
+            "max_complexity": MAX_COMPLEXITY
+        })
+        report.set("complexity", {"max_complexity": MAX_COMPLEXITY, "functions": complexities})
+        for c in complexities:
+            report.record_function(c["function_name"], complexity=c["complexity"], complexity_flagged=c["flagged"])
+            if c["flagged"]:
+                print(f"🐢 {c['function_name']} scales as {c['complexity']} (limit {MAX_COMPLEXITY})")
+        if PIN_COMPLEXITY:
+            pinned = [probe.pinned_test(c) for c in complexities if not c["flagged"]]
+            with open(COMPLEXITY_TEST_FILE, "w", encoding="utf-8") as f:
+                f.write("\n\n".join(t for t in pinned if t))
+            print(f"📌 Pinned {sum(1 for t in pinned if t)} complexity regression test(s) in {COMPLEXITY_TEST_FILE}")
+
+    # Step 7 (optional): Property-fuzz numeric functions
+    if FUZZ and stage_allowed("fuzz"):
+        fuzzed = PropertyFuzzAgent().invoke({
+            "blueprints": outcome["blueprints"],
+            "snapshot_dir": FUZZ_SNAPSHOT_DIR,
+            "update_snapshots": FUZZ_UPDATE_SNAPSHOTS,
+            "batch_size": FUZZ_BATCH_SIZE
+        })
+        report.set("fuzz", fuzzed)
+        for f in fuzzed:
+            snapshot = f["snapshot"] or {}
+            report.record_function(f["function_name"], fuzz_failures=len(f["failures"]),
+                                   fuzz_snapshot=snapshot.get("status"))
+            for failure in f["failures"]:
+                print(f"💥 {f['function_name']}{tuple(failure['args'])} -> {failure['kind']} "
+                      f"({failure['count']} of {f['cases']} cases)")
+            if snapshot.get("status") == "changed":
+                print(f"🔀 {f['function_name']}: outputs changed since the last snapshot ({snapshot['path']})")
+
+    if budget is not None:
+        report.set("anytime", {
+            "budget": budget.summary(),
+            "ranking": ranking,
+            "unfinished": unfinished,
+            "skipped_stages": skipped_stages
+        })
+        for u in unfinished:
+            print(f"⌛ {u['function_name']}: unfinished ({u['reason']}); rerun to continue")
+
+    if index is not None:
+        report.set("symbol_index", index.summary())
+        index.close()
+
+    if quarantined:
+        print(f"🚧 Quarantined {len(quarantined)} slow/hanging test(s); see {MANIFEST_FILE}")
+    report.save(REPORT_FILE)
+    print(f"⏱️ Critical path: {' -> '.join(outcome['critical_path']['tasks'])} "
+          f"({outcome['critical_path']['seconds']:.1f}s)")
     print("✅ All tests complete!")
 
 
@@ -0,0 +1,78 @@
+"""
+pytest plugin loaded by test_suite_gen.suite_minimizer (`-p run.pytest_coverage`).
+
+Records, per test, which lines and arcs of the target files
+($AUTOTEST_COVERAGE_TARGETS, os.pathsep-separated) it executes, using
+sys.settrace. Only frames from target files get a line tracer, so the rest
+of the test run stays at near-normal speed. One JSON line per test goes to
+$AUTOTEST_COVERAGE_FILE:
+    {"nodeid", "outcome", "duration", "lines": [[file, line]], "arcs": [[file, from, to]]}
+Arcs follow coverage.py's convention: entering a code object at line L is
+(-first_line, L), leaving it from line L is (L, -first_line).
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+_targets = frozenset(
+    os.path.abspath(p) for p in os.getenv("AUTOTEST_COVERAGE_TARGETS", "").split(os.pathsep) if p
+)
+_reports = {}
+
+
+def _tracer(lines: set, arcs: set):
+    def global_trace(frame, event, arg):
+        filename = frame.f_code.co_filename
+        if filename not in _targets:
+            return None
+        entry = -frame.f_code.co_firstlineno
+        last = [entry]
+
+        def local_trace(frame, event, arg):
+            if event == "line":
+                lines.add((filename, frame.f_lineno))
+                arcs.add((filename, last[0], frame.f_lineno))
+                last[0] = frame.f_lineno
+            elif event == "return":
+                arcs.add((filename, last[0], entry))
+            return local_trace
+
+        return local_trace
+
+    return global_trace
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    lines, arcs = set(), set()
+    previous = sys.gettrace()
+    start = time.perf_counter()
+    sys.settrace(_tracer(lines, arcs))
+    try:
+        yield
+    finally:
+        sys.settrace(previous)
+    duration = time.perf_counter() - start
+
+    path = os.getenv("AUTOTEST_COVERAGE_FILE")
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "nodeid": item.nodeid,
+            "outcome": _reports.pop(item.nodeid, "passed"),
+            "duration": duration,
+            "lines": sorted(lines),
+            "arcs": sorted(arcs),
+        }) + "\n")
+
+
+def pytest_runtest_logreport(report):
+    # Worst outcome across setup/call/teardown
+    if report.failed:
+        _reports[report.nodeid] = "failed"
+    elif report.skipped and _reports.get(report.nodeid) != "failed":
+        _reports[report.nodeid] = "skipped"
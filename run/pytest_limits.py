@@ -0,0 +1,89 @@
+"""
+pytest plugin loaded by run.test_runner (`-p run.pytest_limits`).
+
+Caps the pytest process's memory and total CPU at startup, enforces
+per-test wall-clock and CPU limits with interval timers, and records every test's start, outcome and duration as JSON lines in
+$AUTOTEST_RESULTS_FILE. A "start" record without a matching result tells
+the runner which test was running when the process hung or was killed.
+"""
+import json
+import os
+import signal
+import time
+
+import pytest
+
+from run.test_runner import apply_rlimits
+
+
+class TestLimitExceeded(BaseException):
+    """
+    Raised inside a test that ran past its limit. Derives from BaseException
+    so generated tests catching Exception can't swallow it.
+    """
+
+    __test__ = False  # not a test class
+
+
+def _limit(name: str) -> float:
+    return float(os.getenv(name, "0") or 0)
+
+
+def _record(entry: dict):
+    path = os.getenv("AUTOTEST_RESULTS_FILE")
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def _on_timer(kind):
+    def handler(signum, frame):
+        raise TestLimitExceeded(f"{kind} limit exceeded")
+    return handler
+
+
+def pytest_configure(config):
+    apply_rlimits(_limit("AUTOTEST_MEMORY_MB"), _limit("AUTOTEST_PROCESS_CPU"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    wall = _limit("AUTOTEST_TEST_TIMEOUT")
+    cpu = _limit("AUTOTEST_TEST_CPU")
+    timers = hasattr(signal, "setitimer")
+    if timers and wall:
+        signal.signal(signal.SIGALRM, _on_timer("wall-clock"))
+        signal.setitimer(signal.ITIMER_REAL, wall)
+    if timers and cpu:
+        signal.signal(signal.SIGVTALRM, _on_timer("cpu"))
+        signal.setitimer(signal.ITIMER_VIRTUAL, cpu)
+    try:
+        yield
+    finally:
+        if timers:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+
+
+def pytest_runtest_logstart(nodeid, location):
+    _record({"nodeid": nodeid, "event": "start", "time": time.time()})
+
+
+def pytest_runtest_logreport(report):
+    # One record per test: the call phase, or setup if the test never got that far
+    if report.when == "call" or (report.when == "setup" and not report.passed):
+        violation = None
+        if report.failed:
+            text = str(report.longrepr)
+            if "TestLimitExceeded" in text:
+                violation = "cpu" if "cpu limit" in text else "timeout"
+            elif "MemoryError" in text:
+                violation = "memory"
+        _record({
+            "nodeid": report.nodeid,
+            "event": "result",
+            "outcome": report.outcome,
+            "duration": report.duration,
+            "violation": violation,
+        })
@@ -0,0 +1,44 @@
+import json
+import threading
+import time
+
+
+class RunReport:
+    """
+    Collects per-run results from the pipeline stages into one JSON report.
+
+    Stages write into named sections; per-function data goes through
+    record_function() so every stage's findings for a function end up
+    side by side. Thread-safe, since pipeline stages run concurrently.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.sections = {}
+        self.functions = {}
+        self._lock = threading.Lock()
+
+    def set(self, section: str, value):
+        with self._lock:
+            self.sections[section] = value
+
+    def update(self, section: str, **values):
+        with self._lock:
+            self.sections.setdefault(section, {}).update(values)
+
+    def record_function(self, function_name: str, **values):
+        with self._lock:
+            self.functions.setdefault(function_name, {}).update(values)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration": time.time() - self.started_at,
+                "functions": {name: dict(data) for name, data in self.functions.items()},
+                **{name: value for name, value in self.sections.items()},
+            }
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
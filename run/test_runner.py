@@ -0,0 +1,264 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource  # POSIX only; limits are best-effort elsewhere
+except ImportError:
+    resource = None
+
+QUARANTINE_REASON = "autotest quarantine"
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLimits:
+    """
+    Resource limits for one generated test run.
+
+    Args:
+        test_timeout: Wall-clock seconds allowed per test.
+        test_cpu: CPU seconds allowed per test.
+        memory_mb: Address-space cap for the pytest process (RLIMIT_AS).
+        session_timeout: Wall-clock seconds for the whole pytest process; the
+                         backstop for hangs the per-test timers can't interrupt.
+    """
+
+    __test__ = False  # not a test class
+
+    def __init__(self, test_timeout: float = 10.0, test_cpu: float = 10.0,
+                 memory_mb: int = 1024, session_timeout: float = 120.0):
+        self.test_timeout = test_timeout
+        self.test_cpu = test_cpu
+        self.memory_mb = memory_mb
+        self.session_timeout = session_timeout
+
+
+def apply_rlimits(memory_mb: int, cpu_seconds: float):
+    """
+    Caps the calling process's address space and total CPU time. Called at
+    startup inside the process being limited (the pytest plugin, a forked
+    mutant), never via preexec_fn, which isn't safe with the runner's threads.
+    """
+    if resource is None:
+        return
+    if memory_mb:
+        memory = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if cpu_seconds:
+        cpu = int(cpu_seconds) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+
+
+def _read_records(path: str) -> list:
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # torn final line from a killed process
+    except OSError:
+        pass
+    return records
+
+
+def quarantine_tests(test_path: str, offenders: dict) -> list:
+    """
+    Marks each offending test in `test_path` with @pytest.mark.skip.
+
+    Args:
+        test_path: Test module to rewrite.
+        offenders: {nodeid: reason}
+    Returns:
+        The test function names that were marked.
+    """
+    with open(test_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    wanted = {}
+    for nodeid, reason in offenders.items():
+        # "file.py::Class::test_name[param]" -> "test_name"
+        wanted[nodeid.split("::")[-1].split("[")[0]] = reason
+
+    # (line index of the def or its first decorator, indent, name, reason)
+    targets = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in wanted:
+            if any(QUARANTINE_REASON in ast.unparse(d) for d in node.decorator_list):
+                continue
+            first = min([d.lineno for d in node.decorator_list] + [node.lineno]) - 1
+            targets.append((first, node.col_offset, node.name, wanted[node.name]))
+
+    lines = source.splitlines()
+    # Insert bottom-up so earlier line numbers stay valid
+    for first, indent, name, reason in sorted(targets, reverse=True):
+        message = f"{QUARANTINE_REASON}: {reason}".replace('"', "'")
+        lines.insert(first, " " * indent + f'@pytest.mark.skip(reason="{message}")')
+    if targets and not any(isinstance(n, ast.Import) and any(a.name == "pytest" for a in n.names)
+                           for n in tree.body):
+        lines.insert(0, "import pytest")
+
+    with open(test_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return [name for _, _, name, _ in targets]
+
+
+_manifest_lock = threading.Lock()
+
+
+def update_manifest(manifest_path: str, test_path: str, entries: list):
+    """Records quarantined tests for `test_path` in the JSON manifest."""
+    with _manifest_lock:
+        manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except ValueError:
+                manifest = {}
+        quarantined = manifest.setdefault("quarantined", {})
+        known = {e["test"]: e for e in quarantined.get(test_path, [])}
+        for entry in entries:
+            known[entry["test"]] = entry
+        quarantined[test_path] = list(known.values())
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+
+def run_tests_with_limits(test_path: str, cwd: str, limits: TestLimits = None,
+                          manifest_path: str = None, max_rounds: int = 5, deadline: float = None) -> dict:
+    """
+    Runs a generated test module under per-test wall-clock/CPU limits and a
+    process memory cap, quarantining offenders.
+
+    A test that exceeds a limit (or hangs / crashes the pytest process) is
+    marked skipped with a reason in the test file, recorded in the manifest,
+    and the module is re-run so the final result reflects the bounded suite.
+
+    With a `deadline` (time.monotonic() value), no pytest process outlives it
+    and no round starts after it; a run cut short that way quarantines
+    nothing and reports why in "unfinished".
+
+    Returns:
+        {
+            "returncode": <int>,
+            "output": <str>,                # tail of pytest output
+            "tests": [{"nodeid", "outcome", "duration"}],
+            "quarantined": [{"test", "reason", "duration"}],
+            "stats": {"total_duration", "slowest", "timeouts", "memory", "crashes"},
+            "unfinished": <str or None>     # why the deadline cut the run short
+        }
+    """
+    limits = limits or TestLimits()
+    env = dict(os.environ)
+    env["AUTOTEST_TEST_TIMEOUT"] = str(limits.test_timeout)
+    env["AUTOTEST_TEST_CPU"] = str(limits.test_cpu)
+    # Process-wide caps, applied by the plugin itself at startup
+    env["AUTOTEST_MEMORY_MB"] = str(limits.memory_mb)
+    env["AUTOTEST_PROCESS_CPU"] = str(limits.session_timeout)
+    # Make the plugin importable whatever `cwd` is
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_PACKAGE_ROOT, env.get("PYTHONPATH", "")) if p)
+
+    quarantined = []
+    stats = {"timeouts": 0, "memory": 0, "crashes": 0}
+    returncode, output, tests = 1, "", []
+    # First-run durations: later rounds re-run quarantined tests as near-instant skips
+    first_runs = {}
+    unfinished = None
+
+    for round_index in range(max_rounds):
+        timeout = limits.session_timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                unfinished = ("deadline reached before re-running quarantined tests" if round_index
+                              else "deadline reached before running tests")
+                break
+            timeout = min(timeout, remaining)
+        fd, results_file = tempfile.mkstemp(prefix="autotest_results_", suffix=".jsonl")
+        os.close(fd)
+        env["AUTOTEST_RESULTS_FILE"] = results_file
+        crashed = False
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+                 "-p", "run.pytest_limits", test_path],
+                cwd=cwd,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+            returncode, output = proc.returncode, proc.stdout[-2000:]
+            # Negative return code: killed by a signal (e.g. SIGXCPU, SIGKILL from the OOM killer)
+            crashed = proc.returncode < 0
+        except subprocess.TimeoutExpired as e:
+            returncode, crashed = -1, True
+            if timeout < limits.session_timeout:
+                # Killed by the deadline, not the session limit: nothing to blame on a test
+                unfinished = "deadline reached while running tests"
+            output = (e.stdout or b"")[-2000:].decode("utf-8", "replace") if isinstance(e.stdout, bytes) \
+                else (e.stdout or "")[-2000:]
+
+        records = _read_records(results_file)
+        os.remove(results_file)
+
+        finished = {r["nodeid"]: r for r in records if r["event"] == "result"}
+        tests = [{"nodeid": r["nodeid"], "outcome": r["outcome"], "duration": r["duration"]}
+                 for r in finished.values()]
+        for t in tests:
+            first_runs.setdefault(t["nodeid"], t)
+        if unfinished:
+            break
+
+        offenders = {}
+        for r in finished.values():
+            if r.get("violation"):
+                offenders[r["nodeid"]] = (r["violation"], r["duration"])
+        if crashed:
+            started = [r["nodeid"] for r in records if r["event"] == "start"]
+            unfinished = [n for n in started if n not in finished]
+            if unfinished:
+                offenders[unfinished[-1]] = ("crashed or hung the test process", None)
+            stats["crashes"] += 1
+
+        if not offenders:
+            break
+
+        for nodeid, (reason, duration) in offenders.items():
+            if reason in ("timeout", "cpu"):
+                stats["timeouts"] += 1
+            elif reason == "memory":
+                stats["memory"] += 1
+        marked = quarantine_tests(test_path, {n: reason for n, (reason, _) in offenders.items()})
+        if not marked:
+            break  # nothing we can mark; don't loop on the same failure
+        entries = [
+            {"test": nodeid.split("::")[-1], "reason": reason, "duration": duration}
+            for nodeid, (reason, duration) in offenders.items()
+            if nodeid.split("::")[-1].split("[")[0] in marked
+        ]
+        quarantined.extend(entries)
+        if manifest_path:
+            update_manifest(manifest_path, os.path.relpath(test_path, cwd), entries)
+
+    stats["total_duration"] = sum(t["duration"] for t in first_runs.values())
+    stats["slowest"] = sorted(first_runs.values(), key=lambda t: t["duration"], reverse=True)[:5]
+    return {
+        "returncode": returncode,
+        "output": output,
+        "tests": tests,
+        "quarantined": quarantined,
+        "stats": stats,
+        "unfinished": unfinished
+    }
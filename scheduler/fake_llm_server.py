@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .llm_scheduler import RateLimitError
+from .rate_limiter import estimate_tokens
+
+
+class FakeThrottlingLLMServer:
+    """
+    Local stand-in for an LLM provider, for exercising LLMScheduler offline.
+
+    POST /v1/completions with {"prompt": "..."} returns {"text": ...} after
+    `latency` seconds, or HTTP 429 (with Retry-After) once more than `rpm`
+    requests or `tpm` estimated tokens arrive within a sliding 60s window,
+    or more than `max_concurrent` requests are in flight at once.
+
+    Usage:
+        with FakeThrottlingLLMServer(rpm=60, max_concurrent=2) as server:
+            text = fake_completion(server.url, "hello")
+            print(server.stats)
+    """
+
+    def __init__(self, rpm: int = 60, tpm: int = 100000, max_concurrent: int = 4,
+                 latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrent = max_concurrent
+        self.latency = latency
+        self.stats = {"accepted": 0, "throttled": 0, "peak_concurrency": 0}
+
+        self._lock = threading.Lock()
+        self._window = deque()  # (timestamp, tokens)
+        self._in_flight = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self, tokens: int) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] > 60.0:
+                self._window.popleft()
+            used = sum(t for _, t in self._window)
+            if (len(self._window) >= self.rpm or used + tokens > self.tpm
+                    or self._in_flight >= self.max_concurrent):
+                self.stats["throttled"] += 1
+                return False
+            self._window.append((now, tokens))
+            self._in_flight += 1
+            self.stats["accepted"] += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._in_flight)
+            return True
+
+    def _done(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _make_handler(server):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    payload = {}
+                prompt = payload.get("prompt", "")
+                if not server._admit(estimate_tokens(prompt)):
+                    self._reply(429, {"error": "rate limit exceeded"}, {"Retry-After": "1"})
+                    return
+                try:
+                    time.sleep(server.latency)
+                    self._reply(200, {"text": f"echo: {prompt[:50]}"})
+                finally:
+                    server._done()
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # keep test output quiet
+
+        return Handler
+
+
+def fake_completion(url: str, prompt: str, timeout: float = 10.0) -> str:
+    """
+    Minimal client for FakeThrottlingLLMServer. Raises RateLimitError on 429
+    and TimeoutError on timeouts, which LLMScheduler treats as back-off signals.
+    """
+    request = urllib.request.Request(
+        url,
+        data=json.dumps({"prompt": prompt}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())["text"]
+    except urllib.error.HTTPError as e:
+        if e.code == 429:
+            raise RateLimitError(f"429 from {url}") from e
+        raise
+    except OSError as e:
+        if "timed out" in str(e):
+            raise TimeoutError(str(e)) from e
+        raise
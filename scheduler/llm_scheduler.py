@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Iterable, Optional
+
+from .rate_limiter import RateLimiter, estimate_tokens
+
+
+class RateLimitError(Exception):
+    """Raised by LLM callables (or the fake server client) on an HTTP 429."""
+
+    status_code = 429
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """
+    True if `exc` means "slow down": a 429 / rate-limit error or a timeout.
+    Recognizes OpenAI client errors by status code and class name so the
+    scheduler does not need to import the provider SDK.
+    """
+    if isinstance(exc, (RateLimitError, TimeoutError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    if status == 429:
+        return True
+    name = type(exc).__name__.lower()
+    if "ratelimit" in name or "timeout" in name:
+        return True
+    message = str(exc).lower()
+    return "429" in message or "rate limit" in message or "timed out" in message
+
+
+# --- Priority helpers: lower value runs first ---
+
+def shortest_job_first(est_tokens: int, **_) -> float:
+    return float(est_tokens)
+
+
+def critical_modules_first(critical_modules: Iterable[str]) -> Callable[..., float]:
+    """
+    Returns a priority function that runs jobs for `critical_modules` before
+    everything else, shortest job first within each group.
+    """
+    critical = set(critical_modules)
+
+    def priority(est_tokens: int, module: str = "", **_) -> float:
+        return (0.0 if module in critical else 1e12) + est_tokens
+
+    return priority
+
+
+class _Job:
+    __slots__ = ("fn", "est_tokens", "future", "attempts", "submitted_at")
+
+    def __init__(self, fn, est_tokens):
+        self.fn = fn
+        self.est_tokens = est_tokens
+        self.future = Future()
+        self.attempts = 0
+        self.submitted_at = time.monotonic()
+
+
+class LLMScheduler:
+    """
+    Runs LLM calls on a worker pool under provider rate limits.
+
+    - Token buckets enforce both requests/minute and tokens/minute, using the
+      estimated prompt size of each job.
+    - Jobs are dequeued by priority (shortest job first by default).
+    - Concurrency is adapted AIMD-style: every success adds 1/limit to the
+      limit (about +1 per round of requests); a 429 or timeout halves it and
+      the job is retried after a backoff.
+
+    Usage:
+        with LLMScheduler(rpm=500, tpm=60000) as scheduler:
+            future = scheduler.submit(lambda: chain.invoke(x), prompt=text)
+            result = future.result()
+    """
+
+    def __init__(
+        self,
+        rpm: int = 500,
+        tpm: int = 60000,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        priority: Callable[..., float] = shortest_job_first,
+    ):
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.priority = priority
+
+        self._limit = float(initial_concurrency or max(min_concurrency, max_concurrency // 2))
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._pending_retries = 0
+        self._shutdown = False
+
+        # --- Metrics ---
+        self._started_at = time.monotonic()
+        self._completions = deque()  # (timestamp, tokens) within the last minute
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "throttled": 0, "retries": 0,
+                        "cancelled": 0}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"llm-scheduler-{i}", daemon=True)
+            for i in range(max_concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # --- Public API ---
+
+    def submit(self, fn: Callable[[], object], prompt: str = "", est_tokens: Optional[int] = None,
+               priority: Optional[float] = None, **priority_args) -> Future:
+        """
+        Queues `fn` (a zero-argument callable performing one LLM request).
+
+        Args:
+            fn: The call to make.
+            prompt: Prompt text, used to estimate token cost when est_tokens is not given.
+            est_tokens: Explicit token estimate.
+            priority: Explicit priority (lower runs first); otherwise computed by
+                      self.priority(est_tokens=..., **priority_args).
+        Returns:
+            A Future resolved with fn's return value (or its final exception).
+        """
+        tokens = est_tokens if est_tokens is not None else estimate_tokens(prompt)
+        job = _Job(fn, tokens)
+        if priority is None:
+            priority = self.priority(est_tokens=tokens, **priority_args)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("LLMScheduler has been shut down")
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._counts["submitted"] += 1
+            self._cond.notify()
+        return job.future
+
+    def map(self, fns, prompts=None):
+        """Submits each callable and returns the results in order."""
+        prompts = prompts or [""] * len(fns)
+        futures = [self.submit(fn, prompt=p) for fn, p in zip(fns, prompts)]
+        return [f.result() for f in futures]
+
+    def metrics(self) -> dict:
+        """Live snapshot of queue depth, concurrency and throughput."""
+        with self._cond:
+            now = time.monotonic()
+            self._trim_window(now)
+            window = min(60.0, max(now - self._started_at, 1e-9))
+            return {
+                "queue_depth": len(self._heap),
+                "in_flight": self._in_flight,
+                "concurrency_limit": int(self._limit),
+                **self._counts,
+                "requests_per_minute": len(self._completions) * 60.0 / window,
+                "tokens_per_minute": sum(t for _, t in self._completions) * 60.0 / window,
+            }
+
+    def cancel_pending(self) -> int:
+        """
+        Cancels every queued job that hasn't started (e.g. when a deadline
+        hits); their futures raise CancelledError. Returns how many were cancelled.
+        """
+        with self._cond:
+            jobs = [job for _, _, job in self._heap if job.attempts == 0]
+            self._heap = [entry for entry in self._heap if entry[2].attempts > 0]
+            heapq.heapify(self._heap)
+            self._counts["cancelled"] += len(jobs)
+            self._cond.notify_all()
+        for job in jobs:
+            job.future.cancel()
+        return len(jobs)
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+
+    # --- Internals ---
+
+    def _trim_window(self, now: float):
+        while self._completions and now - self._completions[0][0] > 60.0:
+            self._completions.popleft()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._in_flight >= int(self._limit):
+                    if self._shutdown and not self._heap and not self._pending_retries:
+                        return  # shut down and drained
+                    self._cond.wait()
+                _, _, job = heapq.heappop(self._heap)
+                self._in_flight += 1
+
+            if job.attempts == 0 and not job.future.set_running_or_notify_cancel():
+                self._release()
+                continue
+
+            self.limiter.acquire(job.est_tokens)
+            try:
+                result = job.fn()
+            except Exception as exc:
+                self._on_error(job, exc)
+            except BaseException:
+                # KeyboardInterrupt/SystemExit aren't failed calls: free the slot and let them propagate
+                self._release()
+                raise
+            else:
+                self._on_success(job, result)
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _on_success(self, job: _Job, result):
+        with self._cond:
+            self._in_flight -= 1
+            self._limit = min(float(self.max_concurrency), self._limit + 1.0 / max(self._limit, 1.0))
+            self._counts["completed"] += 1
+            now = time.monotonic()
+            self._completions.append((now, job.est_tokens))
+            self._trim_window(now)
+            self._cond.notify_all()
+        job.future.set_result(result)
+
+    def _on_error(self, job: _Job, exc: BaseException):
+        throttled = is_throttle_error(exc)
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._counts["throttled"] += 1
+                self._limit = max(float(self.min_concurrency), self._limit / 2.0)
+            retry = throttled and job.attempts < self.max_retries
+            if retry:
+                self._pending_retries += 1
+            else:
+                self._counts["failed"] += 1
+            self._cond.notify_all()
+
+        if not retry:
+            job.future.set_exception(exc)
+            return
+
+        job.attempts += 1
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (job.attempts - 1)))
+        # Requeue after the backoff without holding a worker slot
+        threading.Timer(delay, self._requeue, args=(job,)).start()
+
+    def _requeue(self, job: _Job):
+        with self._cond:
+            self._pending_retries -= 1
+            self._counts["retries"] += 1
+            # Retries jump the queue: they have already waited their turn once
+            heapq.heappush(self._heap, (float("-inf"), next(self._seq), job))
+            self._cond.notify()
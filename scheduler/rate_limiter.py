@@ -0,0 +1,77 @@
+import threading
+import time
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough prompt-size estimate (~4 characters per token for English/code).
+    Good enough for budgeting; providers count the real number server-side.
+    """
+    if not text:
+        return 1
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `capacity` tokens, refilled continuously at
+    `refill_rate` tokens per second.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.refill_rate)
+        self._last = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Takes `amount` tokens if available. Returns 0.0 on success, otherwise
+        the number of seconds to wait before they will be.
+        """
+        # A single request larger than the bucket would never fit; let it drain the bucket instead
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.refill_rate
+
+    def acquire(self, amount: float = 1.0):
+        """Blocks until `amount` tokens have been taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter.
+    A call to acquire(tokens) blocks until both budgets allow the request.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+
+    def acquire(self, tokens: int):
+        # Take the request slot first; the token wait is usually the longer one
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
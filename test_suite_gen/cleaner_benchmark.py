@@ -0,0 +1,143 @@
+"""
+Throughput benchmark for TestSuiteCleanerAgent on multi-megabyte responses.
+
+    python -m test_suite_gen.cleaner_benchmark [--sizes 1 4 16] [--chunk 64] [--max-slowdown 2.0]
+
+Synthetic responses mix prose, fenced code, parametrized tests, multi-line
+strings, broken statements (top-level and inside classes), one large class
+of broken methods taking a quarter of the response (a single statement, so
+per-statement work must stay linear too) and a truncated tail. Each size is cleaned both in one piece and streamed in
+`--chunk`-character pieces. Exits with status 1 if time per MB at the
+largest size exceeds `--max-slowdown` times that at the smallest, i.e. if
+cleaning stopped being linear.
+"""
+import argparse
+import random
+import sys
+import time
+
+from test_suite_gen.test_suite_cleaner import StreamingTestCleaner
+
+_TESTS = [
+    "def test_add_{i}():\n"
+    "    assert add({i}, 1) == {j}\n"
+    "    assert add(-{i}, {i}) == 0\n",
+
+    "@pytest.mark.parametrize(\"a,b,expected\", [\n"
+    "    ({i}, 2, {k}),\n"
+    "    (0, 0, 0),\n"
+    "])\n"
+    "def test_add_param_{i}(a, b, expected):\n"
+    "    \"\"\"Checks add on\n"
+    "def-looking text inside a docstring.\n"
+    "    \"\"\"\n"
+    "    assert add(a, b) == expected\n",
+
+    "class TestAdd{i}:\n"
+    "    def test_types(self):\n"
+    "        with pytest.raises(TypeError):\n"
+    "            add(\"x\", {i})\n"
+    "\n"
+    "    def test_value(self):\n"
+    "        assert add({i}, {i}) == {d}  # doubled\n",
+
+    # Broken: unclosed call swallowing the next line
+    "def test_broken_{i}():\n"
+    "    assert add({i},\n"
+    "    result = add(1, 2\n",
+
+    # Broken: invalid expression mid-body
+    "def test_invalid_{i}():\n"
+    "    x = add({i}, 1)\n"
+    "    assert x == = {j}\n"
+    "    assert x > 0\n",
+
+    # Broken: unclosed call inside a class, resynced at the next method
+    "class TestBroken{i}:\n"
+    "    def test_ok(self):\n"
+    "        assert add({i}, 0) == {i}\n"
+    "\n"
+    "    def test_unclosed(self):\n"
+    "        assert add({i},\n"
+    "    def test_after(self):\n"
+    "        assert add(0, {i}) == {i}\n",
+]
+
+# One class making up a quarter of the response, all broken methods that lose their
+# only check, so the repair has to drop each of them from the same statement
+_BIG_CLASS = "class TestMany:\n"
+_BIG_CLASS_METHODS = [
+    "    def test_invalid_{i}(self):\n"
+    "        x = add({i}, 1)\n"
+    "        assert x == = {j}\n",
+
+    "    def test_unclosed_{i}(self):\n"
+    "        assert add({i},\n",
+]
+
+
+def synthetic_response(size: int, seed: int = 0) -> str:
+    """About `size` characters of LLM-style output, ending mid-statement."""
+    rng = random.Random(seed)
+    parts = ["Here's a thorough test suite for `add` (it covers edge cases):\n\n```python\n",
+             "import pytest\nfrom autotest_target_file import add\n\n\n"]
+    total, i = sum(len(p) for p in parts), 0
+    parts.append(_BIG_CLASS)
+    while total < size // 4:
+        part = _BIG_CLASS_METHODS[i % len(_BIG_CLASS_METHODS)].format(i=i, j=i + 1) + "\n"
+        parts.append(part)
+        total += len(part)
+        i += 1
+    parts.append("\n")
+    while total < size:
+        template = _TESTS[rng.choice((0, 0, 1, 1, 2, 3, 4, 5))]
+        part = template.format(i=i, j=i + 1, k=i + 2, d=2 * i) + "\n\n"
+        parts.append(part)
+        total += len(part)
+        i += 1
+    parts.append("def test_truncated():\n    assert add(1, 2) == 3\n    assert add(2,")
+    return "".join(parts)
+
+
+def clean(text: str, chunk: int = 0) -> tuple:
+    """Returns (seconds, cleaned size, statements kept, repairs)."""
+    cleaner = StreamingTestCleaner()
+    start = time.perf_counter()
+    if chunk:
+        out = [cleaner.feed(text[i:i + chunk]) for i in range(0, len(text), chunk)]
+    else:
+        out = [cleaner.feed(text)]
+    out.append(cleaner.finish())
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(o) for o in out), cleaner.statements, len(cleaner.repairs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m test_suite_gen.cleaner_benchmark")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="response sizes in MB")
+    parser.add_argument("--chunk", type=int, default=64, help="characters per streamed chunk")
+    parser.add_argument("--max-slowdown", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    per_mb = []
+    for mb in sorted(args.sizes):
+        text = synthetic_response(int(mb * 1024 * 1024))
+        whole, size, statements, repairs = clean(text)
+        streamed, streamed_size, _, _ = clean(text, args.chunk)
+        if streamed_size != size:
+            print(f"❌ {mb:g} MB: streamed output differs from one-shot output")
+            return 1
+        per_mb.append(max(whole, streamed) / mb)
+        print(f"🧹 {mb:g} MB: {whole:.2f}s whole ({mb / whole:.1f} MB/s), {streamed:.2f}s in {args.chunk}-char "
+              f"chunks; kept {statements} statements, {repairs} repairs")
+
+    slowdown = per_mb[-1] / per_mb[0]
+    if slowdown > args.max_slowdown:
+        print(f"🐢 Time per MB grew {slowdown:.2f}x from {min(args.sizes):g} MB to {max(args.sizes):g} MB")
+        return 1
+    print(f"✅ Linear: time per MB grew {slowdown:.2f}x across sizes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
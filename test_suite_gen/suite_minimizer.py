@@ -0,0 +1,279 @@
+import ast
+import json
+import subprocess
+import sys
+import tempfile
+
+from .utils import *
+
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _unit_name(nodeid: str) -> str:
+    """'test_suite.py::TestX::test_y[1]' -> 'TestX::test_y'; 'test_suite.py::test_y[1]' -> 'test_y'."""
+    parts = nodeid.split("[")[0].split("::")
+    return "::".join(parts[1:3]) if len(parts) > 1 else nodeid
+
+
+def _bound_definitions(body: list) -> dict:
+    """
+    {name: node} for the functions/classes a module or class body actually
+    binds: a later definition with the same name shadows (and is what pytest
+    collects instead of) an earlier one.
+    """
+    nodes = {}
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            nodes[node.name] = node
+    return nodes
+
+
+def collect_coverage(test_path: str, targets: list, cwd: str, timeout: float = 600.0) -> list:
+    """
+    Runs `test_path` once under the run.pytest_coverage plugin.
+
+    Returns:
+        One record per test: {"nodeid", "outcome", "duration", "lines", "arcs"}
+    """
+    fd, coverage_file = tempfile.mkstemp(prefix="autotest_coverage_", suffix=".jsonl")
+    os.close(fd)
+    env = dict(os.environ)
+    env["AUTOTEST_COVERAGE_TARGETS"] = os.pathsep.join(os.path.abspath(t) for t in targets)
+    env["AUTOTEST_COVERAGE_FILE"] = coverage_file
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_PACKAGE_ROOT, env.get("PYTHONPATH", "")) if p)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "run.pytest_coverage", test_path],
+            cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout
+        )
+        records = []
+        with open(coverage_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+        return records
+    except subprocess.TimeoutExpired:
+        return []
+    finally:
+        os.remove(coverage_file)
+
+
+def greedy_cover(elements: dict, costs: dict, required: set = None) -> list:
+    """
+    Weighted greedy set cover: repeatedly keeps the unit covering the most
+    still-uncovered elements per unit of cost, until `required` (default: the
+    union of all elements) is covered. A final pass drops any kept unit whose
+    elements the others already cover.
+
+    Args:
+        elements: {unit: set of coverage elements}
+        costs: {unit: cost (e.g. seconds)}
+    Returns:
+        Kept units, in the order they were picked.
+    """
+    target = set(required) if required is not None else set().union(*elements.values())
+    uncovered = set(target)
+    candidates = dict(elements)
+    chosen = []
+    while uncovered and candidates:
+        best = max(candidates, key=lambda u: (len(candidates[u] & uncovered) / max(costs.get(u, 0.0), 1e-6),
+                                              len(candidates[u] & uncovered)))
+        gain = candidates.pop(best) & uncovered
+        if not gain:
+            break
+        chosen.append(best)
+        uncovered -= gain
+
+    # Later picks can make earlier ones redundant; try dropping the most expensive first
+    for unit in sorted(chosen, key=lambda u: costs.get(u, 0.0), reverse=True):
+        rest = [u for u in chosen if u != unit]
+        if target <= set().union(*(elements[u] for u in rest)):
+            chosen = rest
+    return chosen
+
+
+def split_suite(test_path: str, moved: set, extended_path: str) -> int:
+    """
+    Moves the tests named in `moved` (units as from _unit_name: "test_y" or
+    "TestX::test_y") from `test_path` into `extended_path`, together with
+    copies of the module's imports, fixtures and helpers so the extended
+    module runs on its own. Names resolve to the definition pytest runs, so
+    a shadowed duplicate stays where it is. A class loses only the moved
+    methods; the extended module gets a copy of the class with those methods
+    and its non-test members (or the whole class, if every test moves).
+
+    Returns:
+        Number of test functions/methods/classes moved.
+    """
+    with open(test_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    lines = source.splitlines()
+
+    def span(node):
+        first = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+        return first - 1, node.end_lineno
+
+    top = _bound_definitions(tree.body)
+    whole, members = [], {}
+    for unit in moved:
+        owner, _, member = unit.partition("::")
+        node = top.get(owner)
+        if node is None:
+            continue
+        if member and isinstance(node, ast.ClassDef):
+            members.setdefault(owner, set()).add(member)
+        elif not member:
+            whole.append(node)
+
+    # (class, moved members or None for the whole class)
+    moved_nodes = [(node, None) for node in whole]
+    for owner, names in members.items():
+        cls = top[owner]
+        bound = _bound_definitions(cls.body)
+        chosen = [bound[n] for n in names if n in bound]
+        if not any(_is_test_node(n) and n.name not in names for n in bound.values()):
+            moved_nodes.append((cls, None))
+        elif chosen:
+            moved_nodes.append((cls, sorted(chosen, key=lambda n: n.lineno)))
+    moved_nodes.sort(key=lambda entry: entry[0].lineno)
+
+    shared = []
+    for node in tree.body:
+        if not _is_test_node(node):
+            start, end = span(node)
+            # Imports stay grouped; anything else gets a blank line before it
+            gap = "" if isinstance(node, (ast.Import, ast.ImportFrom)) or not shared else "\n"
+            shared.append(gap + "\n".join(lines[start:end]))
+
+    extended_tests, skip, count = [], set(), 0
+    for node, chosen in moved_nodes:
+        start, end = span(node)
+        if chosen is None:
+            extended_tests.append("\n".join(lines[start:end]))
+            skip.update(range(start, end))
+            count += 1
+            continue
+        # Class header (decorators, bases) plus its non-test members and the moved tests
+        class_header = "\n".join(lines[start:span(node.body[0])[0]]).rstrip()
+        body = []
+        for member in node.body:
+            if not _is_test_node(member) or member in chosen:
+                member_start, member_end = span(member)
+                body.append("\n".join(lines[member_start:member_end]))
+                if member in chosen:
+                    skip.update(range(member_start, member_end))
+        extended_tests.append(class_header + "\n" + "\n\n".join(body))
+        count += len(chosen)
+    kept_lines = [line for i, line in enumerate(lines) if i not in skip]
+
+    header = [
+        f"# Tests moved out of {os.path.basename(test_path)} by TestSuiteMinimizerAgent: they add no",
+        "# line/branch coverage beyond the minimized suite. Run explicitly:",
+        f"#     pytest {os.path.basename(extended_path)}",
+    ]
+    extended = "\n".join(header) + "\n\n" + "\n".join(shared) \
+        + "\n\n\n" + "\n\n\n".join(extended_tests) + "\n"
+
+    with open(test_path, "w", encoding="utf-8") as f:
+        f.write(re.sub(r"\n{4,}", "\n\n\n", "\n".join(kept_lines)).rstrip() + "\n")
+    with open(extended_path, "w", encoding="utf-8") as f:
+        f.write(extended)
+    return count
+
+
+def _is_test_node(node) -> bool:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return node.name.startswith("test")
+    if isinstance(node, ast.ClassDef):
+        return node.name.startswith("Test")
+    return False
+
+
+class TestSuiteMinimizerAgent(Runnable):
+    """
+    Shrinks a generated test suite to a subset with the same coverage.
+
+    The suite runs once with per-test line and arc (branch) tracing of the
+    target files; greedy set cover, weighted by test duration, then picks a
+    small subset preserving the union coverage (and, optionally, every
+    mutant some test kills). The remaining passing tests are moved to an
+    "extended" module that pytest only runs when asked to. Failing and
+    skipped tests always stay in the main suite.
+    """
+
+    __test__ = False  # not a test class
+
+    def invoke(self, input_dict: dict) -> dict:
+        """
+        Args:
+            input_dict: {
+                "test_filename": <str>,                   # suite to minimize, rewritten in place
+                "targets": List[str],                     # source files whose coverage must be preserved
+                "extended_filename": <str>,               # (Optional) default extended_<test_filename>
+                "mutation_kills": {nodeid: List[str]},    # (Optional) also keep every killed mutant killed
+                "cwd": <str>                              # (Optional) where to run pytest
+            }
+        Returns:
+            {
+                "status": "minimized" | "unchanged" | "no_coverage",
+                "kept": List[str],
+                "moved": List[str],
+                "coverage": {"lines", "arcs", "mutants"},
+                "original_duration": <float>,
+                "minimized_duration": <float>,
+                "extended_filename": <str>
+            }
+        """
+        test_path = input_dict["test_filename"]
+        targets = input_dict.get("targets", [])
+        cwd = input_dict.get("cwd") or os.path.dirname(os.path.abspath(test_path))
+        extended_path = input_dict.get("extended_filename") or os.path.join(
+            os.path.dirname(test_path), "extended_" + os.path.basename(test_path))
+        kills = input_dict.get("mutation_kills", {})
+
+        records = collect_coverage(test_path, targets, cwd)
+        result = {"status": "no_coverage", "kept": [], "moved": [],
+                  "coverage": {"lines": 0, "arcs": 0, "mutants": 0},
+                  "original_duration": 0.0, "minimized_duration": 0.0, "extended_filename": ""}
+        if not records:
+            return result
+
+        # Parametrized cases move as one unit with their function; class methods move on their own
+        elements, costs, pinned = {}, {}, set()
+        for r in records:
+            unit = _unit_name(r["nodeid"])
+            covered = elements.setdefault(unit, set())
+            covered.update(("line", *line) for line in r["lines"])
+            covered.update(("arc", *arc) for arc in r["arcs"])
+            covered.update(("mutant", m) for m in kills.get(r["nodeid"], []))
+            costs[unit] = costs.get(unit, 0.0) + r["duration"]
+            if r["outcome"] != "passed":
+                pinned.add(unit)
+
+        universe = set().union(*elements.values())
+        result["coverage"] = {
+            "lines": sum(1 for e in universe if e[0] == "line"),
+            "arcs": sum(1 for e in universe if e[0] == "arc"),
+            "mutants": sum(1 for e in universe if e[0] == "mutant"),
+        }
+        result["original_duration"] = sum(costs.values())
+
+        # Pinned tests stay regardless, so cover only what they leave uncovered
+        already = set().union(*(elements[u] for u in pinned)) if pinned else set()
+        candidates = {u: e for u, e in elements.items() if u not in pinned}
+        kept = list(pinned) + greedy_cover(candidates, costs, universe - already)
+        moved = sorted(u for u in elements if u not in kept)
+
+        result["kept"] = sorted(kept)
+        result["moved"] = moved
+        result["minimized_duration"] = sum(costs[u] for u in kept)
+        if moved:
+            split_suite(test_path, set(moved), extended_path)
+            result["status"] = "minimized"
+            result["extended_filename"] = extended_path
+        else:
+            result["status"] = "unchanged"
+        return result
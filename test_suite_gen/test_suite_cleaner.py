@@ -1,11 +1,475 @@
+import ast
+import bisect
+import tokenize
+
 from .utils import *
 
+# --- tokenize's own token/string-end patterns, driven line by line so scanning can resume per chunk ---
+_PSEUDO_TOKEN = re.compile(tokenize.PseudoToken)
+_STRING_END = {prefix: re.compile(pattern) for prefix, pattern in tokenize.endpats.items() if pattern}
+_NUMBER_START = "0123456789"
+_SPECIAL = re.compile(r"['\"#\\]")
+
+# A def/class/decorator/import at or left of the indentation of the line that opened
+# a bracket cannot continue the bracketed expression, so it resynchronizes the scanner
+_RESYNC = re.compile(r"(?:async\s+def|def|class)\s+\w|@\w|(?:import|from)\s+[\w.]")
+_CLAUSE = re.compile(r"(?:else|elif|except|finally)\b")
+_DEFINITION = re.compile(r"(?:async\s+def|def|class)\s|@")
+_WORD = re.compile(r"\w*")
+
+PLACEHOLDER = (
+    "import pytest\n\n"
+    "@pytest.mark.skip(reason=\"LLM failed to generate test code.\")\n"
+    "def test_placeholder():\n"
+    "    pass\n"
+)
+
+
+class _Line:
+    __slots__ = ("text", "lineno", "indent", "logical", "header", "blank")
+
+    def __init__(self, text: str, lineno: int, indent: int, logical: bool, blank: bool):
+        self.text = text
+        self.lineno = lineno
+        self.indent = indent
+        self.logical = logical  # first physical line of a logical line
+        self.header = False     # logical line ends with ":" (opens a block)
+        self.blank = blank      # blank or comment-only, outside any statement
+
+
+class StreamingTestCleaner:
+    """
+    Incremental, linear-time cleaner for LLM-generated test code.
+
+    Text is fed in arbitrary chunks. Complete lines are scanned once with
+    tokenize's token patterns (string, bracket and continuation state
+    carried across lines and chunks) and grouped into top-level statements.
+    Each statement is compiled with `ast` once, as soon as the next one
+    starts. A statement that doesn't parse is repaired rather than
+    truncating the suite, one logical line at a time: each is parsed on its
+    own once, a broken one is dropped together with the block under it (just
+    the line, when the next one is at the same indentation), lines left out
+    of place are dropped, then blocks left without a body and tests left
+    without an assert. Every valid test is kept, and no line is parsed more
+    than a few times however many repairs a statement needs.
+
+    Markdown fences are stripped; once a fence has been seen, prose outside
+    fenced blocks is ignored.
+
+    Usage:
+        cleaner = StreamingTestCleaner()
+        for chunk in chunks:
+            emit(cleaner.feed(chunk))
+        emit(cleaner.finish())
+    """
+
+    def __init__(self):
+        self.repairs = []           # "line N: ..." for everything dropped or cut
+        self.statements = 0         # top-level statements emitted
+        self._partial = []          # pieces of the current incomplete line
+        self._carriage = False      # chunk ended in "\r" (maybe half of "\r\n")
+        self._lineno = 0
+        self._fenced = False        # a ``` fence has been seen
+        self._in_fence = False
+        self._dedent = None         # indentation of the block's first code line, stripped from each line
+        self._statement = []        # lines of the current top-level statement
+        self._trivia = []           # blank/comment lines not yet attached to a statement
+        self._reset_scanner()
+
+    # --- Public API ---
+
+    def feed(self, chunk: str) -> str:
+        """Consumes `chunk`; returns the code of every statement completed by it."""
+        if not chunk:
+            return ""
+        if self._carriage:
+            chunk = "\r" + chunk
+            self._carriage = False
+        if chunk.endswith("\r"):
+            chunk, self._carriage = chunk[:-1], True
+        if "\r" in chunk:
+            chunk = chunk.replace("\r\n", "\n").replace("\r", "\n")
+
+        out = []
+        start = 0
+        newline = chunk.find("\n")
+        while newline != -1:
+            self._partial.append(chunk[start:newline + 1])
+            self._line("".join(self._partial), out)
+            self._partial = []
+            start = newline + 1
+            newline = chunk.find("\n", start)
+        if start < len(chunk):
+            self._partial.append(chunk[start:])
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Flushes the last (possibly truncated) statement; returns its code."""
+        out = []
+        if self._carriage:
+            self._carriage = False
+            self._partial.append("\n")
+        if self._partial:
+            line = "".join(self._partial)
+            self._partial = []
+            self._line(line if line.endswith("\n") else line + "\n", out)
+        self._flush_statement(out)
+        if self._string_end is not None:
+            self.repairs.append(f"line {self._lineno}: unterminated string at end of response")
+        # Trailing comments are harmless; trailing blank lines are dropped
+        out.append("".join(t.text for t in self._trivia if t.text.strip()))
+        self._trivia = []
+        return "".join(out)
+
+    # --- Scanning ---
+
+    def _reset_scanner(self):
+        self._string_end = None  # end pattern while inside a multi-line string
+        self._depth = 0          # open brackets
+        self._continued = False  # previous line ended with a backslash
+        self._open = None        # _Line starting the current logical line
+
+    def _line(self, text: str, out: list):
+        self._lineno += 1
+        if "\x00" in text:
+            text = text.replace("\x00", "")
+        stripped = text.lstrip()
+
+        # --- Markdown fences (never inside a string literal) ---
+        if self._string_end is None and stripped.startswith("```"):
+            opening = not self._in_fence or stripped[3:].strip() != ""
+            # Whatever was open before the fence is complete (or broken) now
+            self._flush_statement(out)
+            self._reset_scanner()
+            self._fenced, self._in_fence, self._dedent = True, opening, None
+            return
+        if self._fenced and not self._in_fence:
+            return  # prose between or after code blocks
+
+        # --- Undo whole-block indentation (e.g. code indented under a list item) ---
+        if self._string_end is None and self._depth == 0 and not self._continued and stripped \
+                and not stripped.startswith("#") and self._dedent is None:
+            self._dedent = text[:len(text) - len(stripped)]
+        if self._dedent and text.startswith(self._dedent):
+            text = text[len(self._dedent):]
+            stripped = text.lstrip()
+        indent = len(text) - len(stripped)
+
+        if self._string_end is not None:
+            # Inside a multi-line string: continues the current logical line
+            match = self._string_end.match(text)
+            self._statement_line(_Line(text, self._lineno, indent, False, False), out)
+            if not match:
+                return
+            self._string_end = None
+            pos = match.end()
+        else:
+            if self._depth and self._open is not None and indent <= self._open.indent and _RESYNC.match(stripped):
+                self._depth, self._continued = 0, False  # the parser reports the unclosed bracket
+            if self._depth == 0 and not self._continued:
+                if not stripped or stripped.startswith("#"):
+                    self._trivia.append(_Line(text, self._lineno, indent, False, True))
+                    return
+                line = _Line(text, self._lineno, indent, True, False)
+                if indent == 0 and not _CLAUSE.match(text):
+                    self._start_statement(out)
+                self._open = line
+            else:
+                line = _Line(text, self._lineno, indent, False, False)
+                self._continued = False
+            self._statement_line(line, out)
+            pos = 0
+
+        last = self._scan(text, pos)
+        if self._string_end is None and self._depth == 0 and not self._continued and self._open is not None:
+            self._open.header = last == ":"
+            self._open = None
+
+    def _scan(self, text: str, pos: int) -> str:
+        """Tokenizes the rest of `text`, updating bracket/string/continuation state. Returns the last token."""
+        if not _SPECIAL.search(text, pos):
+            # Fast path: no strings, comments or continuations, so only brackets matter
+            code = text[pos:]
+            self._depth = max(0, self._depth + code.count("(") + code.count("[") + code.count("{")
+                              - code.count(")") - code.count("]") - code.count("}"))
+            return code.rstrip()[-1:]
+        last = ""
+        end_of_line = len(text)
+        while pos < end_of_line:
+            match = _PSEUDO_TOKEN.match(text, pos)
+            if not match:
+                pos += 1  # stray character; leave it to the parser
+                continue
+            start, pos = match.span(1)
+            token = text[start:pos]
+            if not token or token in "\r\n":
+                break
+            initial = token[0]
+            if initial == "#":
+                break
+            if initial in _NUMBER_START:
+                last = token
+            elif token in tokenize.triple_quoted:
+                end = _STRING_END[token].match(text, pos)
+                if not end:
+                    self._string_end = _STRING_END[token]
+                    return "string"
+                pos = end.end()
+                last = "string"
+            elif initial in tokenize.single_quoted or token[:2] in tokenize.single_quoted \
+                    or token[:3] in tokenize.single_quoted:
+                if token[-1] == "\n":  # backslash-continued string
+                    self._string_end = _STRING_END.get(initial) or _STRING_END.get(token[1]) \
+                        or _STRING_END.get(token[2])
+                    return "string"
+                last = "string"
+            elif initial == "\\":
+                self._continued = True
+                break
+            else:
+                if initial in "([{":
+                    self._depth += 1
+                elif initial in ")]}":
+                    self._depth = max(0, self._depth - 1)
+                last = token
+        return last
+
+    # --- Statements ---
+
+    def _statement_line(self, line: _Line, out: list):
+        if self._trivia:
+            if self._statement:
+                self._statement.extend(self._trivia)
+            else:
+                out.append("".join(t.text for t in self._trivia))
+            self._trivia = []
+        self._statement.append(line)
+
+    def _start_statement(self, out: list):
+        # Decorators stay with the definition that follows them
+        if self._statement and all(l.logical is False or l.text.startswith("@") for l in self._statement if not l.blank):
+            return
+        trivia, self._trivia = self._trivia, []
+        self._flush_statement(out)
+        out.append("".join(t.text for t in trivia))
+
+    def _flush_statement(self, out: list):
+        lines, self._statement = self._statement, []
+        if not lines:
+            return
+        lines = self._repair(lines)
+        if lines:
+            self.statements += 1
+            out.append("".join(l.text for l in lines))
+
+    def _repair(self, lines: list) -> list:
+        """Returns the lines of one top-level statement that parse; empty if none can be kept."""
+        try:
+            ast.parse("".join(l.text for l in lines))
+            return lines
+        except (SyntaxError, ValueError):
+            pass
+        kept = self._drop_empty(self._drop_broken_lines(lines))
+        tree = self._parse_or_cut(kept)
+        if tree is None:
+            return []
+        kept, dropped = self._drop_unchecked_tests(lines, kept, tree)
+        if dropped:
+            kept = self._drop_empty(kept)
+            if self._parse_or_cut(kept) is None:
+                return []
+        return kept
+
+    def _drop_broken_lines(self, lines: list) -> list:
+        """
+        One pass over the statement's logical lines: drops each that doesn't
+        parse on its own or whose indentation doesn't fit the blocks around
+        it, together with the lines indented under it and the clauses
+        (else/except/...) continuing it.
+        """
+        kept = []                      # logical lines, as lists of physical lines
+        cuts = []                      # [lineno, lines cut, reason]
+        stack = [lines[0].indent]      # indentation of the open blocks
+        opened = False                 # the last kept logical line opens a block
+        skip = None                    # indentation of the last dropped line, while dropping its block
+        for group in _logical_lines(lines):
+            head = group[0]
+            if skip is not None and (head.indent > skip
+                                     or head.indent == skip and _CLAUSE.match(head.text, head.indent)):
+                cuts[-1][1] += len(group)
+                continue
+            skip = None
+            reason = _parse_error(group)
+            if reason is None:
+                if opened and head.indent > stack[-1]:
+                    stack.append(head.indent)
+                else:
+                    while len(stack) > 1 and stack[-1] > head.indent:
+                        stack.pop()
+                    if head.indent > stack[-1]:
+                        reason = "unexpected indent"
+                    elif head.indent < stack[-1]:
+                        reason = "unindent does not match any outer indentation level"
+            if reason is None:
+                kept.append(group)
+                opened = head.header
+                continue
+            # Decorators of a dropped definition go with it
+            cut = [head.lineno, len(group), reason]
+            while kept and kept[-1][0].indent == head.indent and kept[-1][0].text.startswith("@", head.indent):
+                decorator = kept.pop()
+                cut[0], cut[1] = decorator[0].lineno, cut[1] + len(decorator)
+            cuts.append(cut)
+            opened = bool(kept) and kept[-1][0].header
+            skip = head.indent
+        self.repairs.extend(f"line {lineno}: cut {count} line(s) ({reason})" for lineno, count, reason in cuts)
+        return [line for group in kept for line in group]
+
+    def _drop_empty(self, lines: list) -> list:
+        pruned = _drop_empty_blocks(lines)
+        if len(pruned) < len(lines):
+            kept_ids = set(map(id, pruned))
+            first = next(l for l in lines if id(l) not in kept_ids)
+            self.repairs.append(f"line {first.lineno}: dropped {len(lines) - len(pruned)} line(s) of empty block")
+        return pruned
+
+    def _parse_or_cut(self, lines: list):
+        """
+        The statement's AST. Whatever the line pass couldn't see (e.g. an
+        `else` without its `if`) is cut at the reported error until it
+        parses; None if nothing is left. `lines` is updated in place.
+        """
+        while lines:
+            try:
+                return ast.parse("".join(l.text for l in lines))
+            except (SyntaxError, ValueError) as e:
+                lines[:] = self._cut_at_error(lines, e)
+        return None
+
+    def _cut_at_error(self, lines: list, error) -> list:
+        reason = getattr(error, "msg", str(error))
+        index = min(max(getattr(error, "lineno", None) or len(lines), 1), len(lines)) - 1
+        start = index
+        while start > 0 and not lines[start].logical:
+            start -= 1
+        if start == 0:
+            self.repairs.append(f"line {lines[0].lineno}: dropped unparsable statement ({reason})")
+            return []
+        # Cut the broken statement and the rest of its block, resuming at the next definition out
+        indent = lines[start].indent
+        end = start + 1
+        while end < len(lines) and not (lines[end].logical and lines[end].indent < indent
+                                        and _DEFINITION.match(lines[end].text.lstrip())):
+            end += 1
+        self.repairs.append(f"line {lines[start].lineno}: cut {end - start} line(s) ({reason})")
+        return self._drop_empty(lines[:start] + lines[end:])
+
+    def _drop_unchecked_tests(self, original: list, kept: list, tree) -> tuple:
+        """Drops test functions that lost lines in the repair and no longer assert anything."""
+        kept_ids = set(map(id, kept))
+        # Line numbers of the removed lines, ascending (`original` is in source order)
+        removed = [l for l in original if id(l) not in kept_ids]
+        removed_linenos = [l.lineno for l in removed]
+        functions = [n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                functions.extend(n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+
+        drop = set()
+        for node in functions:
+            if not node.name.startswith("test") or _has_check(node):
+                continue
+            # AST line numbers index `kept`; the function lost lines if the first removed line after
+            # its header falls before the next kept line and isn't at or left of the header
+            header = kept[node.lineno - 1]
+            after = kept[node.end_lineno].lineno if node.end_lineno < len(kept) else float("inf")
+            i = bisect.bisect_right(removed_linenos, header.lineno)
+            if i == len(removed):
+                continue
+            line = removed[i]
+            if line.lineno >= after or line.logical and line.indent <= header.indent:
+                continue
+            first = min([d.lineno for d in node.decorator_list] + [node.lineno]) - 1
+            drop.update(range(first, node.end_lineno))
+            self.repairs.append(f"line {kept[first].lineno}: dropped {node.name}, left without a check")
+        return [l for i, l in enumerate(kept) if i not in drop], bool(drop)
+
+
+def _logical_lines(lines: list) -> list:
+    """Groups physical lines into logical lines (continuations and trailing comments stay with theirs)."""
+    groups = []
+    for line in lines:
+        if line.logical or not groups:
+            groups.append([line])
+        else:
+            groups[-1].append(line)
+    return groups
+
+
+def _parse_error(group: list):
+    """
+    Parses one logical line on its own, completing what it needs from
+    around it (a body for a block header, the `if`/`try` before a clause, a
+    definition after a decorator). Returns the error message, or None.
+    """
+    head = group[0]
+    text = head.text[head.indent:] + "".join(l.text for l in group[1:])
+    body = text + " pass\n" if head.header else text
+    word = _WORD.match(text).group()
+    if text.startswith("@"):
+        source = text + "def _(): pass\n"
+    elif word in ("elif", "else"):
+        source = "if 1:\n pass\n" + body
+    elif word in ("except", "finally"):
+        source = "try:\n pass\n" + body
+    elif head.header and word == "case":
+        source = "match _:\n " + text + "  pass\n"
+    elif head.header and word == "match":
+        source = text + " case _:\n  pass\n"
+    else:
+        source = body
+    try:
+        ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return getattr(e, "msg", str(e))
+    return None
+
+
+def _has_check(node) -> bool:
+    # Same notion of a real check as utils.code_extractor.is_valid_test_code
+    return any(isinstance(n, ast.Assert) or isinstance(n, ast.Attribute) and n.attr == "raises"
+               for n in ast.walk(node))
+
+
+def _drop_empty_blocks(lines: list) -> list:
+    """Removes block headers (and their decorators) left without a body, innermost first."""
+    kept = []             # reversed
+    group = []            # reversed lines since the last logical line start
+    next_indent = None    # indent of the next kept logical line, in source order
+    dropped_indent = None  # indent of a definition just dropped (its decorators go too)
+    for line in reversed(lines):
+        group.append(line)
+        if not line.logical:
+            continue
+        empty = line.header and (next_indent is None or next_indent <= line.indent)
+        orphan = dropped_indent == line.indent and line.text.lstrip().startswith("@")
+        if empty or orphan:
+            dropped_indent = line.indent
+        else:
+            kept.extend(group)
+            next_indent, dropped_indent = line.indent, None
+        group = []
+    kept.extend(group)
+    kept.reverse()
+    return kept
+
 
 class TestSuiteCleanerAgent(Runnable):
     """
     Cleans and sanitizes raw test code generated by TestSuiteGenAgent.
-    Removes markdown, fixes incomplete lines, ensures all test functions have a body,
-    and returns a syntactically valid Python test suite string.
+    Removes markdown and prose, repairs broken statements instead of truncating
+    the suite at the first one, and returns a syntactically valid Python test
+    suite string (see StreamingTestCleaner).
     """
 
     def invoke(self, input_dict: dict) -> dict:
@@ -13,101 +477,33 @@ class TestSuiteCleanerAgent(Runnable):
         Args:
             input_dict: {
                 "test_code": <str>,         # Raw test suite string from LLM
+                "chunks": Iterable[str],    # (Optional) streamed response, instead of test_code
                 "function_name": <str>,     # Name of function under test (for logging/fallback)
                 "test_filename": <str>      # (Optional) Target test file path
             }
         Returns:
             {
                 "cleaned_test_code": <str>,
-                "status": "cleaned" | "placeholder" | <error>
+                "status": "cleaned" | "repaired" | "placeholder" | <error>,
+                "repairs": List[str]        # what was cut or dropped, by response line
             }
         """
         raw = input_dict.get("test_code", "")
-        function_name = input_dict.get("function_name", "unknown")
-        test_filename = input_dict.get("test_filename", "")
-
-        # --- If empty or unusable, return a placeholder skipped test ---
-        if not raw or not isinstance(raw, str) or not raw.strip():
-            placeholder = (
-                "import pytest\n\n"
-                "@pytest.mark.skip(reason=\"LLM failed to generate test code.\")\n"
-                f"def test_placeholder():\n"
-                "    pass\n"
-            )
-            return {"cleaned_test_code": placeholder, "status": "placeholder"}
-
-        # --- Remove markdown code fences (```python ... ```) ---
-        code = raw.strip()
-        if code.startswith("```"):
-            code = re.sub(r"^```(?:python)?", "", code, flags=re.IGNORECASE | re.MULTILINE).strip()
-            if code.endswith("```"):
-                code = code[:-3].strip()
-
-        # --- Normalize line endings and strip leading/trailing whitespace ---
-        code = code.replace('\r\n', '\n').replace('\r', '\n').strip()
-
-        # --- Remove leading empty docstrings or blank lines ---
-        code = re.sub(r'^\s*("""|\'\'\').*?\1\s*', '', code, flags=re.DOTALL)
-        code = code.lstrip('\n')
-
-        # --- Split into lines for further processing ---
-        lines = code.splitlines()
-        clean_lines = []
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            stripped = line.strip()
-
-            # --- If line starts with assert but doesn't end with ), discard it and all after ---
-            if stripped.startswith("assert") and not stripped.endswith(")"):
-                break
+        chunks = input_dict.get("chunks")
+        if chunks is None:
+            chunks = [raw] if isinstance(raw, str) else []
 
-            # --- If line starts with def but doesn't end with :, discard it and all after ---
-            if stripped.startswith("def") and not stripped.endswith(":"):
-                break
+        cleaner = StreamingTestCleaner()
+        parts = [cleaner.feed(chunk) for chunk in chunks]
+        parts.append(cleaner.finish())
+        cleaned_code = "".join(parts).strip("\n")
 
-            clean_lines.append(line)
-            i += 1
-
-        # --- Ensure all test functions have a body ---
-        lines = clean_lines
-        fixed_lines = []
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            fixed_lines.append(line)
-            # Detect test function definition
-            if re.match(r'^\s*def\s+test_[a-zA-Z0-9_]*\s*\(.*\)\s*:', line):
-                # Look ahead to next line (if any)
-                next_idx = i + 1
-                needs_pass = False
-                if next_idx >= len(lines):
-                    needs_pass = True
-                else:
-                    next_line = lines[next_idx]
-                    # If next line is blank or another function def, insert pass
-                    if next_line.strip() == "" or re.match(r'^\s*def\s+', next_line):
-                        needs_pass = True
-                if needs_pass:
-                    fixed_lines.append("    pass")
-            i += 1
-
-        # --- Remove trailing blank lines ---
-        while fixed_lines and not fixed_lines[-1].strip():
-            fixed_lines.pop()
-
-        cleaned_code = "\n".join(fixed_lines)
-
-        # --- Final fallback: if nothing left, return placeholder ---
-        if not cleaned_code.strip():
-            placeholder = (
-                "import pytest\n\n"
-                "@pytest.mark.skip(reason=\"LLM failed to generate test code.\")\n"
-                f"def test_placeholder():\n"
-                "    pass\n"
-            )
-            return {"cleaned_test_code": placeholder, "status": "placeholder"}
-
-        return {"cleaned_test_code": cleaned_code,}
-    
-        print("🧪 FULL cleaned test code:\n", cleaned_test_code)
+        # --- If nothing usable is left, return a placeholder skipped test ---
+        if not cleaner.statements or not cleaned_code.strip():
+            return {"cleaned_test_code": PLACEHOLDER, "status": "placeholder", "repairs": cleaner.repairs}
+
+        return {
+            "cleaned_test_code": cleaned_code,
+            "status": "repaired" if cleaner.repairs else "cleaned",
+            "repairs": cleaner.repairs
+        }
@@ -134,4 +134,6 @@ class TestSuiteCoordinatorAgent(Runnable):
                     "status": f"error: {e}",
                     "test_filename": bp.get("test_filename", "")
                 })
-                continue
\ No newline at end of file
+                continue
+
+        return results
@@ -1,5 +1,6 @@
 from .utils import *
-from utils.code_extractor import extract_test_code
+from utils.code_extractor import extract_test_code, is_valid_test_code
+from .test_suite_cleaner import StreamingTestCleaner
 
 # Load test suite generation prompt
 PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "prompts", "test_suite_gen_prompt.txt")
@@ -17,8 +18,8 @@ test_suite_prompt_template = PromptTemplate(
     template=test_suite_prompt
 )
 
-# Set up the LLM
-llm = ChatOpenAI(
+# Set up the default LLM (ModelRouter passes tier-specific ones instead)
+default_llm = ChatOpenAI(
     model="gpt-3.5-turbo-0125",
     temperature=0,
     openai_api_key=os.getenv("OPENAI_API_KEY")
@@ -30,8 +31,8 @@ class TestSuiteGenAgent(Runnable):
     Only generates the test code; does not clean or write to disk.
     """
 
-    def __init__(self):
-        self.chain = test_suite_prompt_template | llm
+    def __init__(self, llm=None):
+        self.chain = test_suite_prompt_template | (llm if llm is not None else default_llm)
 
     def invoke(self, input_dict: dict) -> dict:
         # Validate required inputs
@@ -40,13 +41,7 @@ class TestSuiteGenAgent(Runnable):
             if not input_dict.get(key):
                 raise ValueError(f"Missing required input: {key}")
 
-        # Prepare prompt input for the LLM
-        prompt_input = {
-            "function_signature": input_dict["function_signature"],
-            "function_name": input_dict["function_name"],
-            "import_path": input_dict["import_path"],
-            "code": input_dict["code"]
-        }
+        prompt_input = self._prompt_input(input_dict)
 
         # Run the LLM chain
         llm_message = self.chain.invoke(prompt_input)
@@ -57,10 +52,7 @@ class TestSuiteGenAgent(Runnable):
         else:
             raw_content = str(llm_message).strip()
 
-        # Remove markdown code fences
-        if raw_content.startswith("```"):
-            raw_content = re.sub(r"^```(?:\w+)?\n", "", raw_content)
-            raw_content = re.sub(r"\n```$", "", raw_content)
+        raw_content = self._strip_fences(raw_content)
 
         # Debug print
         print("🧪 Cleaned test code preview:\n", raw_content[:300])  # print first 300 chars for sanity
@@ -71,3 +63,37 @@ class TestSuiteGenAgent(Runnable):
             "status": "generated"
         }
 
+    @staticmethod
+    def _strip_fences(raw_content: str) -> str:
+        # Remove markdown code fences
+        if raw_content.startswith("```"):
+            raw_content = re.sub(r"^```(?:\w+)?\n", "", raw_content)
+            raw_content = re.sub(r"\n```$", "", raw_content)
+        return raw_content
+
+    @staticmethod
+    def validate_response(text: str) -> bool:
+        """True if the raw LLM response still yields real tests once cleaned (gates the shared cache)."""
+        cleaner = StreamingTestCleaner()
+        cleaned = cleaner.feed(TestSuiteGenAgent._strip_fences(text.strip())) + cleaner.finish()
+        return is_valid_test_code(cleaned)
+
+    def render_prompt(self, input_dict: dict) -> str:
+        """The exact prompt text invoke() sends, e.g. for estimating its token cost."""
+        return test_suite_prompt_template.format(**self._prompt_input(input_dict))
+
+    def _prompt_input(self, input_dict: dict) -> dict:
+        # Prepare prompt input for the LLM
+        prompt_input = {
+            "function_signature": input_dict.get("function_signature", ""),
+            "function_name": input_dict.get("function_name", ""),
+            "import_path": input_dict.get("import_path", ""),
+            "code": input_dict.get("code", "")
+        }
+
+        # Optional notes on what earlier tests missed (e.g. surviving mutants), appended to the code
+        feedback = input_dict.get("feedback", "")
+        if feedback:
+            prompt_input["code"] += "\n\n" + "\n".join(f"# {line}" for line in feedback.splitlines())
+        return prompt_input
+
@@ -1,4 +1,34 @@
 from .utils import *
+import shutil
+import tempfile
+import threading
+from blueprint.blueprint import close_source
+
+# One lock per source file, so concurrent refactors don't clobber each other's writes
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+def _file_lock(filename: str) -> threading.Lock:
+    key = os.path.abspath(filename)
+    with _file_locks_guard:
+        return _file_locks.setdefault(key, threading.Lock())
+
+def _replace_file(filename: str, content: str):
+    """
+    Writes `content` to a temp file next to `filename` and renames it over
+    the original, so test runs importing the module concurrently see either
+    the old or the new file, never a truncated one.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        shutil.copymode(filename, tmp_path)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 class RefactorTriggerAgent(Runnable):
     """
@@ -13,7 +43,10 @@ class RefactorTriggerAgent(Runnable):
             input_dict: {
                 "reports": List[dict],      # testability reports with action == "refactor_required"
                 "blueprints": List[dict],   # matching blueprints (same order as reports)
-                "refactor_agent": <RefactorAgent instance>
+                "refactor_agent": <RefactorAgent instance>,
+                "scheduler": <LLMScheduler instance>,  # (Optional) rate-limits refactor LLM calls
+                "priority": <float>,                    # (Optional) scheduler priority for those calls
+                "timeout": <float>                      # (Optional) max seconds to wait for one
             }
         Returns:
             List of updated/new blueprints (original CLI blueprints replaced, new logic blueprints appended)
@@ -21,6 +54,7 @@ class RefactorTriggerAgent(Runnable):
         reports = input_dict.get("reports", [])
         blueprints = input_dict.get("blueprints", [])
         refactor_agent = input_dict.get("refactor_agent")
+        llm_options = {key: input_dict[key] for key in ("scheduler", "priority", "timeout") if key in input_dict}
 
         if not refactor_agent:
             print("[RefactorTrigger] No RefactorAgent provided. Skipping refactor step.")
@@ -63,7 +97,10 @@ class RefactorTriggerAgent(Runnable):
                 "code": code_block,
                 "filename": filename,
                 "test_filename": test_filename,
-                "dependencies": dependencies
+                "dependencies": dependencies,
+                "module_code": file_content,
+                "import_path": blueprint.get("import_path", ""),
+                **llm_options
             }
 
             # Call RefactorAgent
@@ -85,18 +122,27 @@ class RefactorTriggerAgent(Runnable):
                 updated_blueprints.append(blueprint)
                 continue
 
-            # Replace the old function code with the new one in the file content
-            new_file_content = (
-                file_content[:func_match.start(1)]
-                + updated_cli_code
-                + "\n"
-                + file_content[func_match.end(1):]
-            )
-
-            # Write back to file
+            # Write back to file. The file is re-read under a per-file lock because other
+            # functions in it may have been refactored concurrently since we read it, and
+            # swapped in atomically because other workers may be running its tests.
+            # (Release the shared mapping first; spans into it go stale.)
             try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(new_file_content)
+                with _file_lock(filename):
+                    with open(filename, "r", encoding="utf-8") as f:
+                        file_content = f.read()
+                    func_match = func_pattern.search(file_content)
+                    if not func_match:
+                        raise ValueError(f"'{function_name}' no longer found")
+
+                    # Replace the old function code with the new one in the file content
+                    new_file_content = (
+                        file_content[:func_match.start(1)]
+                        + updated_cli_code
+                        + "\n"
+                        + file_content[func_match.end(1):]
+                    )
+                    close_source(filename)
+                    _replace_file(filename, new_file_content)
                 print(f"[RefactorTrigger] Refactored '{function_name}' in '{filename}'.")
             except Exception as e:
                 print(f"[RefactorTrigger] Failed to write updated file '{filename}': {e}")
@@ -7,8 +7,16 @@ class TestabilityAnalyzerAgent(Runnable):
     """
     LangChain-compatible agent that analyzes Python code for function-level testability.
     Receives a code string and filename, returns a list of testability reports.
+    With a SymbolIndex, verdicts for functions whose source is unchanged are
+    read from the index instead of recomputed.
     """
 
+    # Bump whenever the heuristics change, so verdicts cached by older versions are recomputed
+    ANALYZER_VERSION = "1"
+
+    def __init__(self, index=None):
+        self.index = index
+
     def invoke(self, input_dict: dict) -> list:
         """
         Args:
@@ -35,63 +43,71 @@ class TestabilityAnalyzerAgent(Runnable):
 
         reports = []
         for func_code in functions:
-            signature = extract_function_signature(func_code)
-            function_name = self._extract_function_name(signature)
+            # Unchanged functions reuse the verdict stored in the symbol index
+            report = self.index.get_testability(func_code, self.ANALYZER_VERSION) if self.index is not None else None
+            if report is None:
+                report = self._analyze_function(func_code)
+                if self.index is not None:
+                    self.index.set_testability(func_code, report, self.ANALYZER_VERSION)
+            reports.append(report)
 
-            # Heuristics for CLI/IO
-            is_cli = any(word in func_code.lower() for word in ["input(", "print(", "sys.stdin", "sys.stdout"])
-            has_logic = self._has_internal_logic(func_code)
+        return reports
 
-            # Determine testability
-            if not signature or not function_name:
-                reports.append({
-                    "function_name": function_name or "unknown",
-                    "function_signature": signature or "",
-                    "is_testable": False,
-                    "requires_refactor": False,
-                    "reason": "Missing or malformed function signature.",
-                    "action": "skip"
-                })
-                continue
+    def _analyze_function(self, func_code: str) -> dict:
+        signature = extract_function_signature(func_code)
+        function_name = self._extract_function_name(signature)
 
-            if is_cli and has_logic:
-                reports.append({
-                    "function_name": function_name,
-                    "function_signature": signature,
-                    "is_testable": False,
-                    "requires_refactor": True,
-                    "reason": "CLI wrapper around logic; needs refactor.",
-                    "action": "refactor_required"
-                })
-            elif is_cli and not has_logic:
-                reports.append({
-                    "function_name": function_name,
-                    "function_signature": signature,
-                    "is_testable": False,
-                    "requires_refactor": False,
-                    "reason": "Pure CLI/IO function with no testable logic.",
-                    "action": "skip"
-                })
-            elif has_logic:
-                reports.append({
-                    "function_name": function_name,
-                    "function_signature": signature,
-                    "is_testable": True,
-                    "requires_refactor": False,
-                    "reason": "Pure logic with no CLI.",
-                    "action": "testable"
-                })
-            else:
-                reports.append({
-                    "function_name": function_name,
-                    "function_signature": signature,
-                    "is_testable": False,
-                    "requires_refactor": False,
-                    "reason": "No testable logic detected.",
-                    "action": "skip"
-                })
+        # Heuristics for CLI/IO
+        is_cli = any(word in func_code.lower() for word in ["input(", "print(", "sys.stdin", "sys.stdout"])
+        has_logic = self._has_internal_logic(func_code)
 
-        return reports
+        # Determine testability
+        if not signature or not function_name:
+            return {
+                "function_name": function_name or "unknown",
+                "function_signature": signature or "",
+                "is_testable": False,
+                "requires_refactor": False,
+                "reason": "Missing or malformed function signature.",
+                "action": "skip"
+            }
+
+        if is_cli and has_logic:
+            return {
+                "function_name": function_name,
+                "function_signature": signature,
+                "is_testable": False,
+                "requires_refactor": True,
+                "reason": "CLI wrapper around logic; needs refactor.",
+                "action": "refactor_required"
+            }
+        elif is_cli and not has_logic:
+            return {
+                "function_name": function_name,
+                "function_signature": signature,
+                "is_testable": False,
+                "requires_refactor": False,
+                "reason": "Pure CLI/IO function with no testable logic.",
+                "action": "skip"
+            }
+        elif has_logic:
+            return {
+                "function_name": function_name,
+                "function_signature": signature,
+                "is_testable": True,
+                "requires_refactor": False,
+                "reason": "Pure logic with no CLI.",
+                "action": "testable"
+            }
+        else:
+            return {
+                "function_name": function_name,
+                "function_signature": signature,
+                "is_testable": False,
+                "requires_refactor": False,
+                "reason": "No testable logic detected.",
+                "action": "skip"
+            }
 
     def _extract_function_name(self, signature: str) -> str:
         if not signature:
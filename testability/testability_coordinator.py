@@ -1,90 +1,388 @@
+from concurrent.futures import CancelledError, TimeoutError as FuturesTimeoutError
+
 from .utils import *
+from pipeline.dag_executor import DAGExecutor
+from pipeline.budget import BudgetExhausted, generation_cost
+from utils.code_parser import extract_function_code
+from utils.code_extractor import is_valid_test_code
+
+FUNCTION_NAME_RE = re.compile(r"\s*def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(")
+
+
+def _function_name(bp) -> str:
+    match = FUNCTION_NAME_RE.match(bp.get("function_signature", "") or "")
+    return match.group(1) if match else bp.get("function_name", "")
+
 
 class TestabilityCoordinatorAgent(Runnable):
     """
-    Coordinates routing of function blueprints based on testability reports.
-    Sends 'refactor_required' to RefactorTriggerAgent,
-    'testable' to TestSuiteGenAgent, and ignores 'skip'.
+    Coordinates routing of function blueprints based on testability.
+
+    Every function moves independently through its own chain of tasks on a
+    DAGExecutor:
+
+        analyze -> refactor (if 'refactor_required') -> generate -> execute
+
+    so functions that are already testable are generated and executed while
+    slow refactor calls for other functions are still in flight. 'skip'
+    functions stop after analysis.
+
+    With `mutation_test`, passing tests are also scored by mutation testing;
+    weak ones are regenerated (told which mutants survived) and the new tests
+    are kept only if they pass and score higher.
+
+    With a `budget` (deadline / token budget), functions start in `priorities`
+    order and every LLM step reserves its estimated tokens first. Once the
+    budget refuses, remaining work is skipped; what finished is kept, and the
+    rest is reported with an "unfinished" reason rather than dropped. Past
+    the deadline no test run, escalation or mutation retry starts either;
+    those are listed per function under "skipped".
     """
 
-    def invoke(self, input_dict: dict) -> list:
+    def invoke(self, input_dict: dict) -> dict:
         """
         Args:
             input_dict: {
-                "testability_reports": List[dict],
                 "blueprints": List[dict],
-                "refactor_agent": <RefactorTriggerAgent instance>,
-                "test_suite_gen_agent": <TestSuiteGenAgent instance>
+                "testability_reports": List[dict],         # (Optional) precomputed; else analyzed per function
+                "analyzer": <TestabilityAnalyzerAgent instance>,
+                "refactor_trigger": <RefactorTriggerAgent instance>,
+                "refactor_agent": <RefactorAgent instance>,
+                "test_suite_gen_agent": <TestSuiteGenAgent instance>,
+                "cleaner_agent": <TestSuiteCleanerAgent instance>,
+                "run_tests": Callable[[str, str], dict],  # (Optional) (function_name, test_code) -> outcome;
+                                                          # outcome["unfinished"] if cut short by the deadline
+                "scheduler": <LLMScheduler instance>,     # (Optional) rate-limits generation and refactor calls
+                "router": <ModelRouter instance>,         # (Optional) per-function model tiers with escalation
+                "mutation_test": Callable[[str, str], dict],  # (Optional) (function_name, test_code) ->
+                                                              # {"score", "weak", "feedback", "unfinished", ...}
+                "mutation_retries": <int>,                # (Optional) regenerations for weak tests, default 1
+                "budget": <RunBudget instance>,           # (Optional) deadline / token budget ("anytime" mode)
+                "priorities": {function_name: float},     # (Optional) higher runs first
+                "max_workers": <int>                      # (Optional) DAG worker threads
             }
         Returns:
-            Updated list of blueprints after processing all testability actions.
+            {
+                "blueprints": List[dict],   # updated blueprints, original order, refactored ones replaced in place
+                "results": List[dict],      # one per generated function: function_name, status,
+                                            # test_filename, test_code, outcome, mutation,
+                                            # unfinished (reason, if the budget ran out),
+                                            # skipped (steps not run past the deadline)
+                "critical_path": {"tasks": [...], "seconds": float}
+            }
         """
-        testability_reports = input_dict.get("testability_reports", [])
         blueprints = input_dict.get("blueprints", [])
+        testability_reports = input_dict.get("testability_reports")
+        analyzer = input_dict.get("analyzer")
+        refactor_trigger = input_dict.get("refactor_trigger")
         refactor_agent = input_dict.get("refactor_agent")
-        test_suite_gen_agent = input_dict.get("test_suite_gen_agent")
-
-        # Helper: map function_name to blueprint
-        def get_blueprint_by_name(function_name):
-            for bp in blueprints:
-                sig = bp.get("function_signature", "")
-                # Extract function name from signature
-                import re
-                match = re.match(r"\s*def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(", sig)
-                if match and match.group(1) == function_name:
-                    return bp
-            return None
-
-        # Partition reports by action
-        refactor_reports = []
-        refactor_blueprints = []
-        testable_reports = []
-        testable_blueprints = []
-
-        for report in testability_reports:
-            action = report.get("action")
-            function_name = report.get("function_name")
-            bp = get_blueprint_by_name(function_name)
-            if not bp:
+        gen_agent = input_dict.get("test_suite_gen_agent")
+        cleaner_agent = input_dict.get("cleaner_agent")
+        run_tests = input_dict.get("run_tests")
+        scheduler = input_dict.get("scheduler")
+        router = input_dict.get("router")
+        mutation_test = input_dict.get("mutation_test")
+        mutation_retries = input_dict.get("mutation_retries", 1)
+        budget = input_dict.get("budget")
+        priorities = input_dict.get("priorities") or {}
+
+        # Indexed lookups instead of scanning blueprints/reports per function
+        report_lookup = {r.get("function_name"): r for r in (testability_reports or [])}
+        order = {}
+        for bp in blueprints:
+            order.setdefault(_function_name(bp), len(order))
+
+        dag = DAGExecutor(max_workers=input_dict.get("max_workers", 8))
+
+        # Most valuable first: roots start in insertion order, and LLM calls queue by rank
+        ranked = sorted(order, key=lambda n: -priorities.get(n, 0.0))
+        for rank, name in enumerate(ranked):
+            bp = blueprints[order[name]]
+
+            def analyze(_, bp=bp, name=name):
+                if testability_reports is not None:
+                    return report_lookup.get(name, {"function_name": name, "action": "skip"})
+                reports = analyzer.invoke({"code": self._code(bp), "filename": bp.get("filename", "")})
+                return reports[0] if reports else {"function_name": name, "action": "skip"}
+
+            # Without priorities the scheduler keeps its own order (shortest job first)
+            job_priority = rank if priorities else None
+
+            def refactor(deps, bp=bp, name=name, priority=job_priority):
+                report = deps[f"analyze:{name}"]
+                action = report.get("action")
+                if action == "testable":
+                    return {"replaced": [bp], "targets": [bp]}
+                if action != "refactor_required" or not refactor_trigger:
+                    return {"replaced": [bp], "targets": []}
+
+                tier = router.route(name, self._code(bp)) if router else None
+                while True:
+                    reason = budget.reserve(generation_cost(self._code(bp)), f"refactor:{name}") if budget else None
+                    if reason:
+                        return {"replaced": [bp], "targets": [], "unfinished": f"{reason} before refactoring"}
+                    agent = router.agent(tier, type(refactor_agent)) if router else refactor_agent
+                    trigger_input = {"reports": [report], "blueprints": [bp], "refactor_agent": agent}
+                    if scheduler is not None:
+                        trigger_input.update(scheduler=scheduler, priority=priority,
+                                             timeout=budget.remaining_seconds() if budget is not None else None)
+                    updated = refactor_trigger.invoke(trigger_input)
+                    # The trigger hands back the original blueprint when the refactor failed
+                    new_bps = [self._complete_blueprint(new_bp, bp) for new_bp in updated if new_bp is not bp]
+                    if new_bps or not router:
+                        break
+                    tier = router.escalate(name, tier, "refactor failed")
+                    if tier is None:
+                        break
+                if not new_bps:
+                    if budget is not None and budget.expired():
+                        return {"replaced": [bp], "targets": [], "unfinished": "deadline reached while refactoring"}
+                    return {"replaced": [bp], "targets": []}
+                return {"replaced": new_bps, "targets": new_bps}
+
+            def generate(deps, name=name, bp=bp, priority=job_priority):
+                refactored = deps[f"refactor:{name}"]
+                if refactored.get("unfinished"):
+                    return [{
+                        "function_name": name,
+                        "status": f"unfinished: {refactored['unfinished']}",
+                        "test_filename": bp.get("test_filename", ""),
+                        "test_code": "",
+                        "tier": None,
+                        "unfinished": refactored["unfinished"],
+                        "_blueprint": bp,
+                        "_tier": None
+                    }]
+                generated = []
+                for target in refactored["targets"]:
+                    target_name = _function_name(target)
+                    tier = router.route(target_name, self._code(target)) if router else None
+                    unfinished = None
+                    try:
+                        test_code, tier = self._generate_validated(
+                            gen_agent, cleaner_agent, target, scheduler, router, tier, budget=budget, priority=priority
+                        )
+                        status = "generated"
+                    except BudgetExhausted as e:
+                        test_code, status, unfinished = "", f"unfinished: {e}", str(e)
+                    except Exception as e:
+                        test_code, status = "", f"error: {e}"
+                    generated.append({
+                        "function_name": target_name,
+                        "status": status,
+                        "test_filename": target.get("test_filename", ""),
+                        "test_code": test_code,
+                        "tier": router.tiers[tier].name if router and tier is not None else None,
+                        "_blueprint": target,
+                        "_tier": tier
+                    })
+                    if unfinished:
+                        generated[-1]["unfinished"] = unfinished
+                return generated
+
+            def execute(deps, name=name, priority=job_priority):
+                generated = deps[f"generate:{name}"]
+                for result in generated:
+                    outcome = None
+                    target, tier = result.pop("_blueprint"), result.pop("_tier")
+
+                    def skip(step, reason, result=result):
+                        # Past the deadline: what ran so far stands, the rest is reported as skipped
+                        result.setdefault("unfinished", reason)
+                        result.setdefault("skipped", []).append(step)
+
+                    while run_tests and result["test_code"].strip():
+                        if budget is not None and budget.expired():
+                            skip("test_run" if outcome is None else "escalation",
+                                 "deadline reached before running tests")
+                            break
+                        outcome = run_tests(result["function_name"], result["test_code"])
+                        # The runner may have rewritten the tests (e.g. quarantined slow ones)
+                        result["test_code"] = outcome.get("test_code", result["test_code"])
+                        if outcome.get("unfinished"):
+                            skip("test_rounds", outcome["unfinished"])
+                            break
+                        if not router or tier is None or outcome.get("returncode") == 0:
+                            break
+                        # Tests failed: retry generation one tier up
+                        next_tier = router.escalate(result["function_name"], tier, "generated tests failed")
+                        if next_tier is None:
+                            break
+                        try:
+                            result["test_code"], tier = self._generate_validated(
+                                gen_agent, cleaner_agent, target, scheduler, router, next_tier,
+                                budget=budget, priority=priority
+                            )
+                        except BudgetExhausted:
+                            break  # keep the tests we have
+                        result["tier"] = router.tiers[tier].name
+                    result["outcome"] = outcome
+
+                    if mutation_test and outcome and outcome.get("returncode") == 0 \
+                            and budget is not None and budget.expired():
+                        skip("mutation_testing", "deadline reached before mutation testing")
+                    elif mutation_test and outcome and outcome.get("returncode") == 0:
+                        result["mutation"] = mutation = mutation_test(result["function_name"], result["test_code"])
+                        if mutation.get("unfinished"):
+                            skip("mutation_testing", mutation["unfinished"])
+                            continue
+                        for _ in range(mutation_retries):
+                            if not mutation.get("weak"):
+                                break
+                            if budget is not None and budget.expired():
+                                skip("mutation_retry", "deadline reached before regenerating weak tests")
+                                break
+                            # Weak tests: regenerate (a tier up if there is one), told which mutants survived
+                            if router and tier is not None:
+                                next_tier = router.escalate(result["function_name"], tier, "weak tests (mutation score)")
+                                tier = tier if next_tier is None else next_tier
+                            try:
+                                test_code, tier = self._generate_validated(
+                                    gen_agent, cleaner_agent, target, scheduler, router, tier,
+                                    feedback=mutation.get("feedback", ""), budget=budget, priority=priority
+                                )
+                            except BudgetExhausted:
+                                break
+                            retry = run_tests(result["function_name"], test_code)
+                            if retry.get("unfinished"):
+                                skip("mutation_retry", retry["unfinished"])
+                                break
+                            if retry.get("returncode") != 0:
+                                break
+                            test_code = retry.get("test_code", test_code)
+                            retry_mutation = mutation_test(result["function_name"], test_code)
+                            if retry_mutation.get("unfinished"):
+                                skip("mutation_retry", retry_mutation["unfinished"])
+                                break
+                            if (retry_mutation.get("score") or 0) <= (mutation.get("score") or 0):
+                                break
+                            result["test_code"], result["outcome"], result["mutation"] = test_code, retry, retry_mutation
+                            mutation = retry_mutation
+                            if router and tier is not None:
+                                result["tier"] = router.tiers[tier].name
+                return generated
+
+            dag.add_task(f"analyze:{name}", analyze)
+            dag.add_task(f"refactor:{name}", refactor, deps=[f"analyze:{name}"])
+            dag.add_task(f"generate:{name}", generate, deps=[f"refactor:{name}"])
+            dag.add_task(f"execute:{name}", execute, deps=[f"generate:{name}"])
+
+        task_results = dag.run()
+
+        updated_blueprints = []
+        results = []
+        for name, index in order.items():
+            refactored = task_results[f"refactor:{name}"]
+            updated_blueprints.extend(
+                refactored.value["replaced"] if refactored.status == "done" else [blueprints[index]]
+            )
+
+            executed = task_results[f"execute:{name}"]
+            if executed.status == "done":
+                results.extend(executed.value)
                 continue
-            if action == "refactor_required":
-                refactor_reports.append(report)
-                refactor_blueprints.append(bp)
-            elif action == "testable":
-                testable_reports.append(report)
-                testable_blueprints.append(bp)
-            # skip: do nothing
-
-        # Refactor phase
-        updated_blueprints = blueprints.copy()
-        if refactor_reports and refactor_agent:
-            # Refactor agent expects blueprints and reports
-            refactor_result = refactor_agent.invoke({
-                "reports": refactor_reports,
-                "blueprints": refactor_blueprints
-            })
-            # Replace/extend blueprints as needed
-            if isinstance(refactor_result, list):
-                # Remove old refactored blueprints, add new ones
-                refactored_names = {r.get("function_name") for r in refactor_reports}
-                updated_blueprints = [
-                    bp for bp in updated_blueprints
-                    if bp.get("function_signature", "").split("(")[0].replace("def ", "").strip() not in refactored_names
-                ]
-                updated_blueprints.extend(refactor_result)
-
-        # Test suite generation phase
-        if testable_reports and test_suite_gen_agent:
-            test_suite_gen_agent.invoke({
-                "reports": testable_reports,
-                "blueprints": testable_blueprints
-            })
-
-        # Maintain original order: sort by order in original blueprints
-        def blueprint_sort_key(bp):
+            # Report the first stage that failed for this function
+            for stage in ("analyze", "refactor", "generate", "execute"):
+                task = task_results[f"{stage}:{name}"]
+                if task.status == "failed":
+                    results.append({
+                        "function_name": name,
+                        "status": f"error in {stage}: {task.error}",
+                        "test_filename": blueprints[index].get("test_filename", ""),
+                        "test_code": "",
+                        "outcome": None
+                    })
+                    break
+
+        path, seconds = dag.critical_path()
+        return {
+            "blueprints": updated_blueprints,
+            "results": results,
+            "critical_path": {"tasks": path, "seconds": seconds}
+        }
+
+    def _code(self, bp) -> str:
+        # Blueprint spans go stale once a refactor rewrites their file; fall back to re-reading it
+        code = bp.get("code", "")
+        if code or not bp.get("filename"):
+            return code
+        try:
+            with open(bp["filename"], "r", encoding="utf-8") as f:
+                return extract_function_code(f.read(), _function_name(bp))
+        except OSError:
+            return ""
+
+    def _complete_blueprint(self, new_bp: dict, original) -> dict:
+        # Blueprints produced by RefactorAgent only carry signature/filenames
+        completed = dict(new_bp)
+        completed.setdefault("function_name", _function_name(new_bp))
+        completed.setdefault("import_path", original.get("import_path", ""))
+        completed.setdefault("code", "")
+        return completed
+
+    def _generate_validated(self, gen_agent, cleaner_agent, bp, scheduler, router, tier, feedback: str = "",
+                            budget=None, priority=None):
+        """
+        Generates tests on `tier`, escalating while the output fails validation.
+        Returns (test_code, tier actually used). Raises BudgetExhausted if the
+        budget refuses the first attempt; later refusals keep the last attempt.
+        """
+        if not router:
+            return self._generate(gen_agent, cleaner_agent, bp, scheduler, feedback, budget, priority), tier
+        test_code = None
+        while True:
+            agent = router.agent(tier, type(gen_agent))
+            try:
+                attempt = self._generate(agent, cleaner_agent, bp, scheduler, feedback, budget, priority)
+            except BudgetExhausted:
+                if test_code is None:
+                    raise
+                return test_code, previous_tier
+            test_code, previous_tier = attempt, tier
+            if is_valid_test_code(test_code):
+                return test_code, tier
+            next_tier = router.escalate(_function_name(bp), tier, "generated tests failed validation")
+            if next_tier is None:
+                return test_code, tier
+            tier = next_tier
+
+    def _generate(self, gen_agent, cleaner_agent, bp, scheduler, feedback: str = "", budget=None,
+                  priority=None) -> str:
+        code = self._code(bp)
+        if budget is not None:
+            reason = budget.reserve(generation_cost(code + feedback), f"generate:{_function_name(bp)}")
+            if reason:
+                raise BudgetExhausted(f"{reason} before generating tests")
+        gen_input = {
+            "code": code,
+            "function_signature": bp.get("function_signature", ""),
+            "function_name": _function_name(bp),
+            "import_path": bp.get("import_path", ""),
+            "test_filename": bp.get("test_filename", ""),
+            "source_filename": bp.get("filename", "")
+        }
+        if feedback:
+            gen_input["feedback"] = feedback
+        if scheduler is not None:
+            # Rate limits count the whole rendered prompt, not just the function's code
+            render = getattr(gen_agent, "render_prompt", None)
+            future = scheduler.submit(
+                lambda: gen_agent.invoke(gen_input), prompt=render(gen_input) if render else code,
+                module=gen_input["import_path"],
+                **({"priority": float(priority)} if priority is not None else {})
+            )
             try:
-                return blueprints.index(bp)
-            except ValueError:
-                return len(blueprints)  # new blueprints go last
+                # Don't wait past the deadline; a late response is simply discarded
+                gen_result = future.result(timeout=budget.remaining_seconds() if budget is not None else None)
+            except (FuturesTimeoutError, CancelledError):
+                future.cancel()
+                raise BudgetExhausted("deadline reached while generating tests")
+        else:
+            gen_result = gen_agent.invoke(gen_input)
 
-        updated_blueprints = sorted(updated_blueprints, key=blueprint_sort_key)
\ No newline at end of file
+        clean_result = cleaner_agent.invoke({
+            "test_code": gen_result.get("test_suite", ""),
+            "function_name": gen_input["function_name"],
+            "test_filename": gen_input["test_filename"]
+        })
+        return clean_result.get("cleaned_test_code", "")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the pipeline packages from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Agent modules build their default OpenAI client at import time; tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "offline-tests")
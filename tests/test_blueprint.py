@@ -0,0 +1,82 @@
+import os
+import threading
+
+import pytest
+
+from blueprint import blueprint
+from blueprint.blueprint import close_source, get_source, register_source
+from blueprint.blueprint_builder import build_blueprints_from_file
+
+CODE = (
+    "import math\n\n\n"
+    "def greet(name):\n    return f'héllo {name}'\n\n\n"
+    "def area(r):\n    return math.pi * r * r\n"
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "shapes.py"
+    path.write_text(CODE, encoding="utf-8")
+    return path
+
+
+def test_spans_slice_each_function_out_of_the_shared_buffer(source):
+    greet, area = build_blueprints_from_file(str(source))
+    assert greet.file_id == area.file_id
+    # Spans are byte offsets; the non-ASCII é before area must not shift it
+    assert greet.code == "def greet(name):\n    return f'héllo {name}'"
+    assert area.code == "def area(r):\n    return math.pi * r * r"
+    assert CODE.encode("utf-8")[area.start:area.end].decode("utf-8") == area.code
+
+
+def test_blueprint_reads_like_the_old_dict(source):
+    greet, _ = build_blueprints_from_file(str(source))
+    assert list(greet) == list(blueprint.Blueprint._KEYS) and len(greet) == len(greet._KEYS)
+    assert greet["function_name"] == "greet" and greet["import_path"] == "shapes"
+    assert greet.get("code") == greet.code and greet.get("file_id", "absent") == "absent"
+    with pytest.raises(KeyError):
+        greet["start"]
+    assert dict(greet) == greet.to_dict()
+    assert greet.to_dict()["function_signature"] == "def greet(name):"
+
+
+def test_rewritten_or_replaced_files_go_stale(source):
+    greet, _ = build_blueprints_from_file(str(source))
+    file_id = greet.file_id
+
+    source.write_text(CODE + "\n# edited\n", encoding="utf-8")
+    assert get_source(file_id).is_stale() and greet.code == ""
+    # Re-registering remaps the new content under the same id
+    assert register_source(str(source)) == file_id
+    assert greet.code.startswith("def greet")
+
+    replacement = source.with_name("shapes.tmp")
+    replacement.write_text(CODE.replace("greet", "greeT"), encoding="utf-8")
+    os.replace(replacement, source)
+    assert greet.code == ""
+    assert build_blueprints_from_file(str(source))[0].code.startswith("def greeT")
+
+    close_source(str(source))
+    assert greet.code == ""
+
+
+def test_concurrent_registration_maps_a_file_once(source):
+    workers = 16
+    barrier = threading.Barrier(workers, timeout=5)
+    ids = []
+
+    def register():
+        barrier.wait()
+        ids.append(register_source(str(source)))
+
+    threads = [threading.Thread(target=register) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 1
+    key = os.path.abspath(str(source))
+    assert [b.path for b in blueprint._buffers].count(key) == 1
+    assert blueprint._buffer_ids[key] == ids[0]
@@ -0,0 +1,106 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from llm.cache_client import CachingLLM, GenerationCacheClient, cache_key
+from llm.cache_server import GenerationCacheServer, content_hash, sign_entry
+from llm.model_router import ModelRouter, ModelTier
+from test_suite_gen import test_suite_gen
+
+VALID = "```python\ndef test_add():\n    assert add(1, 2) == 3\n```"
+INVALID = "Sorry, I can't write tests for that."
+validate_tests = test_suite_gen.TestSuiteGenAgent.validate_response
+
+
+class EchoLLM:
+    """Answers every prompt with a fixed response and counts calls."""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        return self.response
+
+    def batch(self, inputs, config=None, **kwargs):
+        return [self.invoke(i) for i in inputs]
+
+
+def test_round_trip_and_batched_lookup():
+    with GenerationCacheServer() as server:
+        client = GenerationCacheClient(server.url)
+        key = cache_key("prompt", "model", 0)
+        assert client.get(key) is None
+        assert client.put(key, "response")
+        assert client.get(key) == "response"
+        assert client.get_many([key, cache_key("other", "model", 0)]) == {key: "response"}
+        assert server.store.summary()["puts"] == 1
+
+
+def test_secret_server_rejects_unsigned_and_forged_puts():
+    with GenerationCacheServer(secret="s3cret") as server:
+        key = cache_key("prompt", "model", 0)
+        anonymous = GenerationCacheClient(server.url)
+        assert not anonymous.put(key, "poisoned")
+        assert anonymous.read_only  # refused once, stops trying
+
+        forged = urllib.request.Request(
+            f"{server.url}/v1/entries/{key}", method="PUT",
+            data=json.dumps({"response": "poisoned", "sha256": content_hash("poisoned")}).encode(),
+            headers={"Content-Type": "application/json",
+                     "X-Autotest-Signature": sign_entry("wrong", key, content_hash("poisoned"))})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(forged, timeout=2)
+        assert error.value.code == 403
+
+        signed = GenerationCacheClient(server.url, secret="s3cret")
+        assert signed.put(key, "response")
+        assert anonymous.get(key) == "response"  # reads stay open
+        assert server.store.summary()["unauthorized"] == 2
+
+
+def test_read_only_client_never_writes():
+    with GenerationCacheServer() as server:
+        client = GenerationCacheClient(server.url, read_only=True)
+        assert not client.put(cache_key("prompt", "model", 0), "response")
+        assert server.store.summary()["puts"] == 0
+
+
+def test_unauthenticated_server_refuses_non_loopback_host():
+    with pytest.raises(ValueError):
+        GenerationCacheServer(host="0.0.0.0")
+
+
+def test_invalid_generations_are_not_stored():
+    with GenerationCacheServer() as server:
+        client = GenerationCacheClient(server.url)
+        bad = CachingLLM(EchoLLM(INVALID), client, "model", validate=validate_tests)
+        assert bad.invoke("prompt") == INVALID
+        assert client.stats["invalid_not_stored"] == 1
+        assert server.store.summary()["puts"] == 0
+
+        good_llm = EchoLLM(VALID)
+        good = CachingLLM(good_llm, client, "model", validate=validate_tests)
+        assert good.batch(["prompt"]) == [VALID]
+        assert good.invoke("prompt") == VALID
+        assert good_llm.calls == 1  # the second call was a cache hit
+
+
+def test_router_gates_the_cache_with_the_agents_validator():
+    class StubAgent:
+        validate_response = staticmethod(lambda text: text == "ok")
+
+        def __init__(self, llm=None):
+            self.llm = llm
+
+    with GenerationCacheServer() as server:
+        client = GenerationCacheClient(server.url)
+        router = ModelRouter(tiers=[ModelTier("fast", "fast-model", factory=lambda: EchoLLM("not ok"))], cache=client)
+        agent = router.agent(0, StubAgent)
+        assert router.agent(0, StubAgent) is agent
+        agent.llm.invoke("prompt")
+        assert server.store.summary()["puts"] == 0
+        assert client.stats["invalid_not_stored"] == 1
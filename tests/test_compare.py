@@ -0,0 +1,56 @@
+import json
+
+from benchmark_gen.compare import find_regressions, main
+
+
+def bench(*results):
+    return {"results": [dict(zip(("n", "median", "min"), r)) for r in results]}
+
+
+def test_threshold_is_exclusive_and_min_must_clear_the_baseline():
+    baseline = {"f": bench((10, 1.0, 0.9))}
+    assert find_regressions(baseline, {"f": bench((10, 1.25, 1.2))}, threshold=0.25) == []
+    [regression] = find_regressions(baseline, {"f": bench((10, 1.5, 1.2))}, threshold=0.25)
+    assert regression == {"function": "f", "n": 10, "baseline_median": 1.0, "current_median": 1.5, "ratio": 1.5}
+    # A slow median whose fastest sample still beats the baseline is noise
+    assert find_regressions(baseline, {"f": bench((10, 1.5, 0.95))}, threshold=0.25) == []
+
+
+def test_regressions_are_sorted_worst_first():
+    baseline = {"f": bench((10, 1.0, 1.0), (100, 1.0, 1.0)), "g": bench((10, 1.0, 1.0))}
+    current = {"f": bench((10, 2.0, 2.0), (100, 3.0, 3.0)), "g": bench((10, 1.5, 1.5))}
+    assert [(r["function"], r["n"]) for r in find_regressions(baseline, current)] == [
+        ("f", 100), ("f", 10), ("g", 10)]
+
+
+def test_benchmarks_missing_from_either_side_are_skipped():
+    baseline = {"old_only": bench((10, 1.0, 1.0)), "f": bench((10, 1.0, 1.0))}
+    current = {"new_only": bench((10, 9.0, 9.0)),
+               # n=10 errored this run; n=100 has no baseline size to compare against
+               "f": {"results": [{"n": 10, "error": "boom"}, {"n": 100, "median": 9.0, "min": 9.0}]}}
+    assert find_regressions(baseline, current) == []
+    assert find_regressions({}, current) == [] and find_regressions(baseline, {}) == []
+
+
+def write(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_check_exit_status(tmp_path, capsys):
+    baseline = write(tmp_path / "baseline.json", {"f": bench((10, 1.0, 1.0))})
+    fast = write(tmp_path / "fast.json", {"f": bench((10, 1.05, 1.0))})
+    slow = write(tmp_path / "slow.json", {"f": bench((10, 2.0, 2.0))})
+
+    assert main(["check", baseline, fast]) == 0
+    assert main(["check", baseline, slow]) == 1
+    assert "f (n=10)" in capsys.readouterr().out
+    assert main(["check", baseline, slow, "--threshold", "1.5"]) == 0
+
+    # --update still reports the regression, then accepts the new timings
+    assert main(["check", baseline, slow, "--update"]) == 1
+    assert main(["check", baseline, slow]) == 0
+
+    missing = str(tmp_path / "missing.json")
+    assert main(["check", missing, slow]) == 0
+    assert json.loads(open(missing).read()) == json.loads(open(slow).read())
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from complexity.complexity_probe import ComplexityProbeAgent, _weighted_fit, fit_growth
+
+SIZES = [2 ** k for k in range(3, 15)]
+
+
+def samples(cost, noise=0.0, seed=0):
+    rng = random.Random(seed)
+    return [{"n": n, "seconds": cost(n) * (1 + rng.uniform(-noise, noise))} for n in SIZES]
+
+
+def test_weighted_fit_recovers_a_line_and_clamps_negative_slopes():
+    a, b, sse = _weighted_fit([1, 2, 3, 4], [3.0, 5.0, 7.0, 9.0])
+    assert a == pytest.approx(1.0) and b == pytest.approx(2.0) and sse == pytest.approx(0.0, abs=1e-12)
+    _, b, _ = _weighted_fit([1, 2, 3], [3.0, 2.0, 1.0])
+    assert b == 0.0
+
+
+@pytest.mark.parametrize("cost, expected, slope", [
+    (lambda n: 2e-6 + 1e-8 * n, "O(n)", 1.0),
+    (lambda n: 2e-6 + 1e-10 * n * n, "O(n^2)", 2.0),
+])
+def test_fit_growth_on_synthetic_timings(cost, expected, slope):
+    fit = fit_growth(samples(cost, noise=0.05))
+    assert fit["complexity"] == expected
+    assert fit["slope"] == pytest.approx(slope, abs=0.15)
+
+
+def test_fit_growth_does_not_report_noise_as_growth():
+    assert fit_growth(samples(lambda n: 1e-6, noise=0.1))["complexity"] == "O(1)"
+    assert fit_growth(samples(lambda n: 1e-6)[:2])["complexity"] == "unknown"
+
+
+def test_unknown_max_complexity_is_rejected():
+    with pytest.raises(ValueError, match="O\\(n log n\\)"):
+        ComplexityProbeAgent().invoke({"blueprints": [], "max_complexity": "linear"})
+
+
+def test_pinned_test_holds_for_the_measured_function(tmp_path, monkeypatch):
+    (tmp_path / "pinned_target.py").write_text("def total(items):\n    return sum(items)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    result = {"function_name": "total", "import_path": "pinned_target", "kinds": ["list[int]"],
+              "complexity": "O(n)", "slope": 1.0, "samples": samples(lambda n: 1e-8 * n)}
+
+    source = ComplexityProbeAgent().pinned_test(result)
+    assert "def test_total_scales_no_worse_than_o_n():" in source
+    assert "assert large / small <= 12.0" in source  # 4x the input, O(n) expects 4x, slack 3
+    namespace = {}
+    exec(compile(source, "test_pinned.py", "exec"), namespace)
+    namespace["test_total_scales_no_worse_than_o_n"]()
+
+    assert ComplexityProbeAgent().pinned_test(dict(result, complexity="unknown")) == ""
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import Counter
+
+from pipeline.dag_executor import DAGExecutor
+
+
+def test_independent_tasks_run_in_parallel():
+    # Each task waits for the other; they can only both pass if they run at once
+    barrier = threading.Barrier(2, timeout=5)
+    dag = DAGExecutor(max_workers=2)
+    dag.add_task("a", lambda deps: barrier.wait())
+    dag.add_task("b", lambda deps: barrier.wait())
+    results = dag.run()
+    assert [results[t].status for t in "ab"] == ["done", "done"]
+
+
+def test_failure_spreads_to_dependents_only():
+    def boom(deps):
+        raise RuntimeError("boom")
+
+    dag = DAGExecutor(max_workers=4)
+    dag.add_task("a", boom)
+    dag.add_task("b", lambda deps: 1, deps=["a"])
+    dag.add_task("c", lambda deps: 2, deps=["b"])
+    dag.add_task("d", lambda deps: 3)
+    dag.add_task("e", lambda deps: deps["d"] + 1, deps=["d"])
+    results = dag.run()
+
+    assert results["a"].status == "failed" and str(results["a"].error) == "boom"
+    assert results["b"].status == results["c"].status == "upstream_failed"
+    assert results["c"].error == "dependency 'b' did not complete"
+    assert (results["e"].status, results["e"].value) == ("done", 4)
+
+
+def test_every_task_runs_exactly_once():
+    calls = Counter()
+    lock = threading.Lock()
+
+    def task(task_id):
+        def run(deps):
+            with lock:
+                calls[task_id] += 1
+            return task_id
+        return run
+
+    dag = DAGExecutor(max_workers=8)
+    # Many roots with instant children: a child can become ready while roots are still being submitted
+    for i in range(50):
+        dag.add_task(f"root{i}", task(f"root{i}"))
+        dag.add_task(f"child{i}", task(f"child{i}"), deps=[f"root{i}"])
+    dag.add_task("join", task("join"), deps=[f"child{i}" for i in range(50)])
+    results = dag.run()
+
+    assert all(r.status == "done" for r in results.values())
+    assert calls == Counter({task_id: 1 for task_id in results})
+
+
+def test_critical_path_follows_the_slowest_chain():
+    def sleep(seconds):
+        return lambda deps: time.sleep(seconds)
+
+    # a -> c -> e takes 0.4s, b -> d -> e only 0.3s
+    dag = DAGExecutor(max_workers=4)
+    dag.add_task("a", sleep(0.05))
+    dag.add_task("b", sleep(0.2))
+    dag.add_task("c", sleep(0.3), deps=["a"])
+    dag.add_task("d", sleep(0.05), deps=["b"])
+    dag.add_task("e", sleep(0.05), deps=["c", "d"])
+    dag.run()
+
+    path, span = dag.critical_path()
+    assert path == ["a", "c", "e"]
+    assert 0.4 <= span < 0.6
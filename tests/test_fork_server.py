@@ -0,0 +1,35 @@
+import os
+import signal
+
+import pytest
+
+from mutation.fork_server import _forked, _read_all
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def _exit_status(work, **limits):
+    pid, fd = _forked(work, **limits)
+    payload = _read_all(fd)
+    _, status = os.waitpid(pid, 0)
+    return status, payload
+
+
+def test_mutant_children_get_the_memory_cap():
+    def allocate():
+        blob = bytearray(800 * 1024 * 1024)
+        return {"size": len(blob)}, 0
+
+    status, payload = _exit_status(allocate, memory_mb=512)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 2 and payload == b""
+    status, payload = _exit_status(allocate)
+    assert os.WEXITSTATUS(status) == 0 and b"size" in payload
+
+
+def test_mutant_children_get_a_cpu_cap():
+    def spin():
+        while True:
+            pass
+
+    status, _ = _exit_status(spin, cpu_seconds=0.5)
+    assert os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL)
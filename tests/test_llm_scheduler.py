@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from scheduler.fake_llm_server import FakeThrottlingLLMServer, fake_completion
+from scheduler.llm_scheduler import LLMScheduler, RateLimitError, critical_modules_first
+
+
+def test_throttled_requests_back_off_and_all_complete():
+    with FakeThrottlingLLMServer(rpm=1000, max_concurrent=1, latency=0.05) as server:
+        with LLMScheduler(max_concurrency=4, initial_concurrency=4, backoff_base=0.05, max_retries=20) as scheduler:
+            futures = [scheduler.submit(lambda i=i: fake_completion(server.url, f"prompt {i}"), prompt=f"prompt {i}")
+                       for i in range(12)]
+            results = [f.result(timeout=30) for f in futures]
+            metrics = scheduler.metrics()
+
+    assert results == [f"echo: prompt {i}" for i in range(12)]
+    assert server.stats["throttled"] > 0
+    assert metrics["throttled"] == server.stats["throttled"]
+    assert metrics["retries"] > 0
+    assert metrics["completed"] == 12 and metrics["failed"] == 0
+    assert metrics["concurrency_limit"] < 4  # halved at least once
+
+
+def test_concurrency_halves_on_429_and_recovers_additively():
+    def throttled():
+        raise RateLimitError("429")
+
+    with FakeThrottlingLLMServer(rpm=1000, max_concurrent=8, latency=0.0) as server:
+        with LLMScheduler(max_concurrency=4, initial_concurrency=4, max_retries=0) as scheduler:
+            with pytest.raises(RateLimitError):
+                scheduler.submit(throttled).result(timeout=10)
+            assert scheduler.metrics()["concurrency_limit"] == 2
+
+            # About one success per unit of limit adds 1: 2 -> 3 -> 4
+            for i in range(6):
+                scheduler.submit(lambda i=i: fake_completion(server.url, str(i))).result(timeout=10)
+            assert scheduler.metrics()["concurrency_limit"] == 4
+
+
+def _run_in_order(scheduler, submissions):
+    """Blocks the only worker, queues `submissions` ({label: submit kwargs}), then returns the run order."""
+    gate, order = threading.Event(), []
+    blocker = scheduler.submit(gate.wait, priority=float("-inf"))
+    futures = [scheduler.submit(lambda label=label: order.append(label), **kwargs)
+               for label, kwargs in submissions.items()]
+    gate.set()
+    blocker.result(timeout=10)
+    for f in futures:
+        f.result(timeout=10)
+    return order
+
+
+def test_explicit_priority_runs_lowest_first():
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        order = _run_in_order(scheduler, {"c": {"priority": 3.0}, "a": {"priority": 1.0}, "b": {"priority": 2.0}})
+    assert order == ["a", "b", "c"]
+
+
+def test_default_priority_is_shortest_job_first():
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        order = _run_in_order(scheduler, {"long": {"prompt": "x" * 4000}, "short": {"prompt": "x" * 40},
+                                          "medium": {"prompt": "x" * 400}})
+    assert order == ["short", "medium", "long"]
+
+
+def test_critical_modules_run_before_others():
+    with LLMScheduler(max_concurrency=1, priority=critical_modules_first(["core"])) as scheduler:
+        order = _run_in_order(scheduler, {"other": {"prompt": "x", "module": "misc"},
+                                          "core": {"prompt": "x" * 4000, "module": "core"}})
+    assert order == ["core", "other"]
+
+
+def test_cancel_pending_cancels_queued_jobs():
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        gate = threading.Event()
+        blocker = scheduler.submit(gate.wait)
+        queued = [scheduler.submit(lambda: None) for _ in range(3)]
+        while scheduler.metrics()["in_flight"] == 0:
+            pass
+        assert scheduler.cancel_pending() == 3
+        gate.set()
+        blocker.result(timeout=10)
+    assert all(f.cancelled() for f in queued)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_system_exit_propagates_instead_of_being_stored():
+    def interrupted():
+        raise SystemExit(1)
+
+    with LLMScheduler(max_concurrency=2, initial_concurrency=2) as scheduler:
+        future = scheduler.submit(interrupted)
+        # The other worker keeps serving, and the dead one's slot was released
+        assert scheduler.submit(lambda: "ok").result(timeout=10) == "ok"
+        deadline = time.monotonic() + 10
+        while scheduler.metrics()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        metrics = scheduler.metrics()
+        assert metrics["in_flight"] == 0 and metrics["failed"] == 0
+        assert not future.done()
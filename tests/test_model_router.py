@@ -0,0 +1,70 @@
+from llm.complexity import complexity_metrics
+from llm.model_router import ModelRouter, ModelTier
+from utils.code_extractor import is_valid_test_code
+
+SIMPLE = "def add(a, b):\n    return a + b\n"
+COMPLEX = (
+    "def classify(items):\n"
+    "    out = []\n"
+    "    for item in items:\n"
+    "        if item is None or item == '':\n"
+    "            continue\n"
+    "        try:\n"
+    "            value = int(item)\n"
+    "        except ValueError:\n"
+    "            value = float(parse(item))\n"
+    "        while value > 100:\n"
+    "            value = shrink(value)\n"
+    "        out.append(normalize(value) if value > 0 else abs(value))\n"
+    "    return sorted(out)\n"
+)
+
+
+class StubLLM:
+    def __init__(self, model):
+        self.model = model
+
+
+class StubAgent:
+    def __init__(self, llm=None):
+        self.llm = llm
+
+
+def stub_router():
+    return ModelRouter(tiers=[
+        ModelTier("fast", "fast-model", min_score=0.0, factory=lambda: StubLLM("fast-model")),
+        ModelTier("strong", "strong-model", min_score=12.0, factory=lambda: StubLLM("strong-model")),
+    ])
+
+
+def test_routes_by_complexity():
+    router = stub_router()
+    assert complexity_metrics(SIMPLE)["score"] < 12.0 <= complexity_metrics(COMPLEX)["score"]
+    assert router.route("add", SIMPLE) == 0
+    assert router.route("classify", COMPLEX) == 1
+    assert router.route("broken", "def broken(:\n") == 1  # unparseable goes to the strong tier
+
+
+def test_escalates_once_then_stops_at_top_tier():
+    router = stub_router()
+    router.route("add", SIMPLE)
+    assert router.escalate("add", 0, "tests failed") == 1
+    assert router.escalate("add", 1, "tests failed") is None
+    summary = router.summary()
+    assert summary["initial_routing"] == {"fast": 1, "strong": 0}
+    assert summary["escalations"] == [{"function_name": "add", "from": "fast", "to": "strong",
+                                       "reason": "tests failed"}]
+    assert summary["escalation_rate"] == 1.0
+
+
+def test_agents_are_bound_to_their_tier_and_cached():
+    router = stub_router()
+    fast, strong = router.agent(0, StubAgent), router.agent(1, StubAgent)
+    assert fast.llm.model == "fast-model" and strong.llm.model == "strong-model"
+    assert router.agent(0, StubAgent) is fast
+
+
+def test_valid_test_code_requires_a_real_check():
+    assert is_valid_test_code("def test_add():\n    assert add(1, 2) == 3\n")
+    assert not is_valid_test_code("def test_add():\n    pass\n")
+    assert not is_valid_test_code("def test_add(:\n")
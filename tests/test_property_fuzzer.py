@@ -0,0 +1,66 @@
+import os
+
+from blueprint.blueprint_builder import build_blueprints_from_file
+from fuzz.property_fuzzer import ROOT_DIR, PropertyFuzzAgent
+from fuzz.snapshot import SNAPSHOT_EXT, load_snapshot
+from utils.input_synth import param_kinds
+
+TARGET = (
+    "def div(a: int, b: int):\n"
+    "    print('noise')\n"
+    "    return a // b\n"
+    "\n"
+    "def spin(n):\n"
+    "    while True:\n"
+    "        pass\n"
+    "\n"
+    "def greet(name, who):\n"
+    "    return name + who\n"
+)
+
+
+def test_unhinted_unknown_names_are_not_guessed():
+    assert param_kinds("def f(who, n, rate): pass", default=None) == [("who", None), ("n", "int"), ("rate", "float")]
+    assert param_kinds("def f(who): pass") == [("who", "int")]
+
+
+def test_fuzzing_runs_isolated_with_timeout(tmp_path, monkeypatch):
+    (tmp_path / "fuzz_target.py").write_text(TARGET)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    blueprints = [{"function_name": name, "import_path": "fuzz_target", "code": code}
+                  for name, code in (("div", TARGET.split("\n\n")[0]), ("spin", TARGET.split("\n\n")[1]),
+                                     ("greet", TARGET.split("\n\n")[2]))]
+    results = {r["function_name"]: r for r in PropertyFuzzAgent().invoke(
+        {"blueprints": blueprints, "batch_size": 200, "timeout": 5})}
+
+    assert set(results) == {"div", "spin"}  # greet's parameters aren't numeric
+    assert results["div"]["error"] is None
+    assert [f["kind"] for f in results["div"]["failures"]] == ["raise:ZeroDivisionError"]
+    assert "timed out" in results["spin"]["error"]
+
+
+def test_unhinted_parameters_get_kinds_from_their_use_in_the_body():
+    assert param_kinds("def divide(x, y):\n    if y == 0:\n        return 'err'\n    return x / y\n",
+                       default=None) == [("x", "float"), ("y", "float")]
+    assert param_kinds("def add(x, y):\n    return x + y\n", default=None) == [("x", "int"), ("y", "int")]
+    assert param_kinds("def greet(name, who):\n    return name + who\n", default=None) == [("name", "str"),
+                                                                                          ("who", "str")]
+
+
+def test_real_target_divide_by_zero_is_found_and_snapshotted(tmp_path):
+    blueprints = build_blueprints_from_file(os.path.join(ROOT_DIR, "autotest_target_file.py"))
+    results = {r["function_name"]: r for r in PropertyFuzzAgent().invoke(
+        {"blueprints": blueprints, "batch_size": 500, "snapshot_dir": str(tmp_path), "timeout": 30})}
+    assert set(results) == {"add", "subtract", "multiply", "divide"}
+
+    divide = results["divide"]
+    assert divide["error"] is None and divide["mode"] == "loop"  # `if y == 0` can't take arrays
+    # divide guards y == 0 by returning a message instead of raising ZeroDivisionError
+    [failure] = divide["failures"]
+    assert failure["reason"] == "return_type" and failure["kind"] == "str" and failure["args"][1] == 0
+    assert "Division by zero" in failure["detail"]
+
+    assert divide["snapshot"]["status"] == "recorded" and divide["snapshot"]["path"].endswith(SNAPSHOT_EXT)
+    columns, batch = load_snapshot(divide["snapshot"]["path"])
+    zero_rows = [i for i, y in enumerate(columns[1]) if y == 0]
+    assert zero_rows and all(batch["kind"][i] == "str" for i in zero_rows)
@@ -0,0 +1,135 @@
+import ast
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from langchain_core.runnables import RunnableLambda
+
+from blueprint.blueprint_builder import build_blueprints_from_file
+from refactor.ast_refactorer import _function_def, module_names, refactor_cli_function
+from refactor.refactor_agent import RefactorAgent, select_refactored_functions
+from scheduler.llm_scheduler import LLMScheduler
+from testability.refactor_trigger import RefactorTriggerAgent
+
+MODULE = "import sys\n\n\ndef main_logic():\n    pass\n\n\ndef main():\n    pass\n"
+
+
+def test_ast_refactor_avoids_existing_logic_name():
+    code = "def main():\n    x = input()\n    y = int(x) * 2\n    print(y)\n"
+    parsed = refactor_cli_function(code, taken=module_names(MODULE))
+    assert parsed["pure_function_signature"].startswith("def main_logic_2(")
+    assert "main_logic_2(x)" in parsed["refactored_code"]
+
+
+def test_function_nodes_only_carry_fields_this_python_has():
+    node = _function_def(name="f", args=ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[],
+                                                      defaults=[]),
+                         body=[ast.Pass()], decorator_list=[], returns=None, type_params=[])
+    assert ("type_params" in vars(node)) == ("type_params" in ast.FunctionDef._fields)
+    assert ast.unparse(ast.fix_missing_locations(node)) == "def f():\n    pass"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="PEP 695 type parameters need Python 3.12")
+def test_ast_refactor_keeps_the_wrappers_type_parameters():
+    code = "def main[T](default: T):\n    x = input()\n    y = int(x) * 2\n    print(y)\n"
+    parsed = refactor_cli_function(code)
+    assert parsed["original_cli_function"].startswith("def main[T](default: T):")
+
+
+def test_llm_refactor_keeps_only_wrapper_pure_function_and_new_imports():
+    llm_code = (
+        "import sys\nimport json\n\n"
+        "def helper():\n    pass\n\n"
+        "def main_logic(x):\n    return json.dumps(x)\n\n"
+        "def main():\n    print(main_logic(input()))\n"
+    )
+    code, name = select_refactored_functions(llm_code, "main", "main_logic", MODULE)
+    assert name == "main_logic_2"
+    assert code.count("import") == 1 and "import json" in code
+    assert "def helper" not in code
+    assert "def main_logic_2(x)" in code and "print(main_logic_2(input()))" in code
+
+
+def test_llm_refactor_without_wrapper_is_rejected():
+    code, _ = select_refactored_functions("def main_logic(x):\n    return x\n", "main", "main_logic")
+    assert code == ""
+
+
+def test_only_successful_parsable_refactors_pass_cache_validation():
+    ok = '{"refactored_code": "def f_logic(x):\\n    return x\\n", "refactor_successful": true}'
+    assert RefactorAgent.validate_response(ok)
+    assert not RefactorAgent.validate_response(ok.replace("true", "false"))
+    assert not RefactorAgent.validate_response('{"refactored_code": "def f(:", "refactor_successful": true}')
+    assert not RefactorAgent.validate_response("no json here")
+
+
+class StubRefactorAgent:
+    def invoke(self, input_dict):
+        return {"replace_original": True, "updated_cli_code": "def main():\n    print(main_logic(input()))\n"}
+
+
+def test_refactored_file_is_swapped_in_whole_and_old_spans_go_stale(tmp_path):
+    target = tmp_path / "cli.py"
+    target.write_text("def helper():\n    return 1\n\n\ndef main():\n    x = input()\n    print(x)\n" * 200)
+    [helper, *_] = build_blueprints_from_file(str(target))
+    stop, seen = threading.Event(), []
+
+    def read_while_refactoring():
+        while not stop.is_set():
+            seen.append(target.read_text())
+
+    reader = threading.Thread(target=read_while_refactoring)
+    reader.start()
+    try:
+        RefactorTriggerAgent().invoke({
+            "reports": [{"function_name": "main"}],
+            "blueprints": [{"function_signature": "def main():", "filename": str(target)}],
+            "refactor_agent": StubRefactorAgent(),
+        })
+    finally:
+        stop.set()
+        reader.join()
+
+    assert "main_logic(input())" in target.read_text()
+    assert all(text.startswith("def helper():") for text in seen)  # never empty or half-written
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+    assert helper["code"] == ""  # span into the replaced file
+
+
+LOOP_CLI = "def main():\n    while True:\n        x = input()\n        if x == 'q':\n            break\n        print(int(x) * 2)\n"
+LLM_REFACTOR = json.dumps({
+    "refactored_code": "def main_logic(x):\n    return int(x) * 2\n\n"
+                       "def main():\n    while True:\n        x = input()\n        if x == 'q':\n            break\n"
+                       "        print(main_logic(x))\n",
+    "pure_function_signature": "def main_logic(x):",
+    "refactor_successful": True,
+})
+
+
+def test_llm_refactor_goes_through_the_scheduler():
+    seen = []
+    llm = RunnableLambda(lambda prompt: seen.append(prompt) or LLM_REFACTOR)
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        result = RefactorAgent(llm=llm).invoke({
+            "function_signature": "def main():", "code": LOOP_CLI, "filename": "cli.py",
+            "test_filename": "test_cli.py", "module_code": LOOP_CLI, "scheduler": scheduler, "priority": 0,
+        })
+        metrics = scheduler.metrics()
+    assert result["replace_original"] and "def main_logic(x)" in result["updated_cli_code"]
+    assert metrics["submitted"] == metrics["completed"] == 1
+    assert metrics["tokens_per_minute"] > 0  # estimated from the rendered prompt
+
+
+def test_scheduled_refactor_gives_up_at_the_timeout():
+    release = threading.Event()
+    llm = RunnableLambda(lambda prompt: release.wait(10) and LLM_REFACTOR)
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        result = RefactorAgent(llm=llm).invoke({
+            "function_signature": "def main():", "code": LOOP_CLI, "filename": "cli.py",
+            "test_filename": "test_cli.py", "module_code": LOOP_CLI, "scheduler": scheduler, "timeout": 0.1,
+        })
+        release.set()
+    assert not result["replace_original"]
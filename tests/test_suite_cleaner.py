@@ -0,0 +1,83 @@
+import ast
+
+from test_suite_gen.test_suite_cleaner import StreamingTestCleaner
+
+
+def clean(text: str, chunk: int = 0) -> tuple:
+    cleaner = StreamingTestCleaner()
+    pieces = [text[i:i + chunk] for i in range(0, len(text), chunk)] if chunk else [text]
+    out = "".join(cleaner.feed(p) for p in pieces) + cleaner.finish()
+    ast.parse(out)
+    return out, cleaner.repairs
+
+
+def test_unclosed_bracket_in_a_method_resyncs_at_the_next_method():
+    out, _ = clean(
+        "class TestAdd:\n"
+        "    def test_ok(self):\n"
+        "        assert add(1, 0) == 1\n"
+        "\n"
+        "    def test_unclosed(self):\n"
+        "        assert add(1,\n"
+        "    def test_after(self):\n"
+        "        assert add(0, 1) == 1\n"
+    )
+    assert "def test_ok" in out and "def test_after" in out
+    assert "test_unclosed" not in out
+
+
+def test_broken_line_followed_by_same_indent_drops_only_that_line():
+    out, repairs = clean(
+        "def test_invalid():\n"
+        "    x = add(1, 1)\n"
+        "    assert x == = 2\n"
+        "    assert x > 0\n"
+    )
+    assert out == "def test_invalid():\n    x = add(1, 1)\n    assert x > 0\n"
+    assert repairs == ["line 3: cut 1 line(s) (invalid syntax)"]
+
+
+def test_broken_header_drops_its_block():
+    out, _ = clean(
+        "def test_raises():\n"
+        "    with pytest.raises(ValueError)\n"
+        "        add('x', 1)\n"
+        "    assert add(1, 1) == 2\n"
+    )
+    assert out == "def test_raises():\n    assert add(1, 1) == 2\n"
+
+
+def test_tests_left_without_a_check_are_dropped():
+    out, repairs = clean(
+        "def test_only_broken():\n"
+        "    x = add(1, 1)\n"
+        "    assert x == = 2\n"
+        "\n"
+        "def test_smoke():\n"
+        "    add(1, 2)\n"
+    )
+    assert "test_only_broken" not in out
+    assert "def test_smoke" in out  # never repaired, so kept as written
+    assert any("dropped test_only_broken" in r for r in repairs)
+
+
+def test_streamed_output_matches_one_shot():
+    text = (
+        "Here you go:\n```python\n"
+        "@pytest.mark.parametrize('a', [\n    1,\n])\n"
+        "def test_param(a):\n    \"\"\"Doc\ndef inside a docstring.\n    \"\"\"\n    assert a\n"
+        "def test_truncated():\n    assert add(1, 2) == 3\n    assert add(2,"
+    )
+    assert clean(text) == clean(text, chunk=7)
+
+
+def test_large_class_drops_exactly_the_methods_that_lost_their_check():
+    n = 3000
+    out, repairs = clean("class TestMany:\n" + "".join(
+        f"    def test_invalid_{i}(self):\n        x = add({i}, 1)\n        assert x == = {i}\n\n"
+        f"    def test_smoke_{i}(self):\n        add({i}, 0)\n\n"  # never had a check, nothing removed
+        f"    def test_ok_{i}(self):\n        assert add({i}, 0) == {i}\n        assert add({i},\n\n"
+        for i in range(n)))
+    assert "test_invalid_" not in out
+    assert out.count("def test_smoke_") == n and out.count("def test_ok_") == n
+    assert sum("left without a check" in r for r in repairs) == n
@@ -0,0 +1,73 @@
+import ast
+
+from test_suite_gen import suite_minimizer
+from test_suite_gen.suite_minimizer import greedy_cover, split_suite
+
+
+def test_greedy_cover_picks_best_gain_per_cost_and_drops_redundant_units():
+    elements = {"slow_all": {1, 2, 3, 4}, "fast_a": {1, 2}, "fast_b": {3, 4}}
+    costs = {"slow_all": 10.0, "fast_a": 1.0, "fast_b": 1.0}
+    assert greedy_cover(elements, costs) == ["fast_a", "fast_b"]
+
+    # An early pick made redundant by later ones is dropped
+    elements = {"wide": {1, 2, 3}, "left": {1, 2, 4}, "right": {3, 5}}
+    assert greedy_cover(elements, {"wide": 1.0, "left": 1.0, "right": 1.0}) == ["left", "right"]
+
+
+def test_greedy_cover_ties_go_to_the_first_unit():
+    elements = {"a": {1}, "b": {1}, "c": {2}}
+    assert greedy_cover(elements, {"a": 1.0, "b": 1.0, "c": 1.0}) == ["a", "c"]
+    # Equal gain per cost: the larger gain wins
+    assert greedy_cover({"small": {1}, "big": {1, 2}}, {"small": 1.0, "big": 2.0}) == ["big"]
+
+
+def test_mutation_kills_count_as_coverage(tmp_path, monkeypatch):
+    test_path = tmp_path / "test_suite.py"
+    test_path.write_text(
+        "def test_a():\n    assert add(1, 1) == 2\n\n\n"
+        "def test_b():\n    assert add(1, 1) > 0\n"
+    )
+    same_lines = {"outcome": "passed", "duration": 0.1, "lines": [["t.py", 2]], "arcs": []}
+    monkeypatch.setattr(suite_minimizer, "collect_coverage", lambda *args, **kwargs: [
+        dict(same_lines, nodeid="test_suite.py::test_a"), dict(same_lines, nodeid="test_suite.py::test_b")])
+    agent = suite_minimizer.TestSuiteMinimizerAgent()
+
+    result = agent.invoke({"test_filename": str(test_path), "targets": ["t.py"]})
+    assert result["kept"] == ["test_a"] and result["moved"] == ["test_b"]
+
+    test_path.write_text(
+        "def test_a():\n    assert add(1, 1) == 2\n\n\n"
+        "def test_b():\n    assert add(1, 1) > 0\n"
+    )
+    result = agent.invoke({"test_filename": str(test_path), "targets": ["t.py"],
+                           "mutation_kills": {"test_suite.py::test_b": ["m1"]}})
+    # test_b now also covers a killed mutant, so it alone keeps everything covered
+    assert result["kept"] == ["test_b"] and result["moved"] == ["test_a"]
+    assert result["coverage"]["mutants"] == 1
+
+
+def test_split_moves_only_the_named_definition_of_a_duplicate_name(tmp_path):
+    test_path, extended_path = tmp_path / "test_suite.py", tmp_path / "extended_test_suite.py"
+    test_path.write_text(
+        "import pytest\n\n\n"
+        "def test_zero():\n    assert 'shadowed'\n\n\n"
+        "class TestAdd:\n"
+        "    @pytest.fixture\n    def two(self):\n        return 2\n\n"
+        "    def test_zero(self):\n        assert 'add'\n\n"
+        "    def test_two(self, two):\n        assert two\n\n\n"
+        "class TestSub:\n"
+        "    def test_zero(self):\n        assert 'sub'\n\n\n"
+        "def test_zero():\n    assert 'bound'\n"
+    )
+    assert split_suite(str(test_path), {"test_zero", "TestAdd::test_zero"}, str(extended_path)) == 2
+
+    main, extended = test_path.read_text(), extended_path.read_text()
+    ast.parse(main), ast.parse(extended)
+    # The shadowed top-level copy never runs, so it stays; the one pytest runs moves
+    assert "'shadowed'" in main and "'bound'" not in main and "'bound'" in extended
+    # Only TestAdd's test_zero moves; TestSub's keeps its place
+    assert "'add'" not in main and "'sub'" in main and "'sub'" not in extended
+    assert "def test_two" in main and "def test_two" not in extended
+    # The extended copy of TestAdd keeps its fixture so the moved method still runs
+    extended_class = extended[extended.index("class TestAdd:"):]
+    assert "def two(self)" in extended_class and "'add'" in extended_class
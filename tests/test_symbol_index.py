@@ -0,0 +1,32 @@
+from blueprint.symbol_index import SymbolIndex
+from testability.testability_analyzer import TestabilityAnalyzerAgent
+
+CODE = "def add(a, b):\n    return a + b\n"
+FUNC = CODE.rstrip()  # the block split_functions yields
+
+
+def test_verdicts_of_another_analyzer_version_are_misses(tmp_path):
+    source = tmp_path / "mod.py"
+    source.write_text(CODE)
+    with SymbolIndex(str(tmp_path / "index.sqlite")) as index:
+        index.refresh(str(source))
+        index.set_testability(FUNC, {"is_testable": True}, "1")
+        assert index.get_testability(FUNC, "1") == {"is_testable": True}
+        assert index.get_testability(FUNC, "2") is None
+
+        # A re-split keeps the verdict together with the version that made it
+        source.write_text("# moved\n" + CODE)
+        index.refresh(str(source))
+        assert index.functions(str(source))[0]["testability_version"] == "1"
+        assert index.get_testability(FUNC, "2") is None
+
+
+def test_analyzer_recomputes_verdicts_cached_by_an_older_version(tmp_path):
+    source = tmp_path / "mod.py"
+    source.write_text(CODE)
+    with SymbolIndex(str(tmp_path / "index.sqlite")) as index:
+        index.refresh(str(source))
+        index.set_testability(FUNC, {"stale": True}, "0")
+        [report] = TestabilityAnalyzerAgent(index=index).invoke({"code": CODE, "filename": str(source)})
+        assert report["function_name"] == "add" and "stale" not in report
+        assert index.get_testability(FUNC, TestabilityAnalyzerAgent.ANALYZER_VERSION) == report
@@ -0,0 +1,43 @@
+import time
+
+from run.test_runner import TestLimits, run_tests_with_limits
+
+SUITE = (
+    "import time\n"
+    "\n"
+    "def test_fast():\n"
+    "    assert 1\n"
+    "\n"
+    "def test_memory():\n"
+    "    blob = bytearray(800 * 1024 * 1024)\n"
+    "\n"
+    "def test_sleep():\n"
+    "    time.sleep(3)\n"
+)
+
+
+def test_offenders_are_quarantined_and_stats_keep_first_run_durations(tmp_path):
+    test_path = tmp_path / "test_suite.py"
+    test_path.write_text(SUITE)
+    result = run_tests_with_limits(str(test_path), str(tmp_path), TestLimits(test_timeout=1, memory_mb=512))
+
+    reasons = {q["test"]: q["reason"] for q in result["quarantined"]}
+    assert reasons == {"test_memory": "memory", "test_sleep": "timeout"}
+    assert "autotest quarantine" in test_path.read_text()
+    # The re-run skips test_sleep instantly; stats still report its first, timed-out run
+    assert result["stats"]["slowest"][0]["nodeid"].endswith("test_sleep")
+    assert result["stats"]["total_duration"] >= 1.0
+
+
+def test_deadline_cuts_the_run_short_without_quarantining(tmp_path):
+    test_path = tmp_path / "test_suite.py"
+    test_path.write_text(SUITE)
+    start = time.monotonic()
+    result = run_tests_with_limits(str(test_path), str(tmp_path), TestLimits(test_timeout=30, memory_mb=0),
+                                   deadline=start + 1.5)
+    assert time.monotonic() - start < 10
+    assert result["unfinished"] == "deadline reached while running tests"
+    assert result["quarantined"] == [] and "autotest quarantine" not in test_path.read_text()
+
+    result = run_tests_with_limits(str(test_path), str(tmp_path), deadline=time.monotonic())
+    assert result["unfinished"] == "deadline reached before running tests" and result["tests"] == []
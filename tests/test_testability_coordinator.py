@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from pipeline.budget import RunBudget
+from testability.testability_coordinator import TestabilityCoordinatorAgent
+from scheduler.llm_scheduler import LLMScheduler
+
+BLUEPRINTS = [
+    {"function_signature": "def main():", "function_name": "main", "code": "def main():\n    print(input())\n",
+     "filename": "cli.py", "test_filename": "test_cli.py", "import_path": "cli"},
+]
+REPORTS = [{"function_name": "main", "action": "refactor_required"}]
+
+
+class RecordingTrigger:
+    """Records what the coordinator hands the refactor trigger; every refactor fails."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, input_dict):
+        self.inputs.append(input_dict)
+        return input_dict["blueprints"]
+
+
+def test_refactor_calls_are_scheduled_with_a_priority():
+    trigger = RecordingTrigger()
+    with LLMScheduler(max_concurrency=1) as scheduler:
+        TestabilityCoordinatorAgent().invoke({
+            "blueprints": BLUEPRINTS, "testability_reports": REPORTS, "refactor_trigger": trigger,
+            "refactor_agent": object(), "scheduler": scheduler, "priorities": {"main": 1.0},
+        })
+    [trigger_input] = trigger.inputs
+    assert trigger_input["scheduler"] is scheduler
+    assert trigger_input["priority"] == 0  # rank of the most valuable function
+
+
+class StubGenAgent:
+    def invoke(self, input_dict):
+        return {"test_suite": "def test_main():\n    assert True\n"}
+
+
+class PassthroughCleaner:
+    def invoke(self, input_dict):
+        return {"cleaned_test_code": input_dict["test_code"]}
+
+
+def test_steps_past_the_deadline_are_skipped_and_reported():
+    budget = RunBudget(deadline_seconds=60)
+    runs, mutations = [], []
+
+    def run_tests(name, code):
+        runs.append(name)
+        budget.deadline = time.monotonic()  # the deadline passes during the first run
+        return {"returncode": 0}
+
+    outcome = TestabilityCoordinatorAgent().invoke({
+        "blueprints": BLUEPRINTS, "testability_reports": [{"function_name": "main", "action": "testable"}],
+        "test_suite_gen_agent": StubGenAgent(), "cleaner_agent": PassthroughCleaner(), "run_tests": run_tests,
+        "mutation_test": lambda name, code: mutations.append(name), "budget": budget,
+    })
+    [result] = outcome["results"]
+    assert runs == ["main"] and mutations == []
+    assert result["skipped"] == ["mutation_testing"]
+    assert result["unfinished"] == "deadline reached before mutation testing"
+
+
+def test_test_runs_cut_short_by_the_deadline_are_reported():
+    outcome = TestabilityCoordinatorAgent().invoke({
+        "blueprints": BLUEPRINTS, "testability_reports": [{"function_name": "main", "action": "testable"}],
+        "test_suite_gen_agent": StubGenAgent(), "cleaner_agent": PassthroughCleaner(),
+        "run_tests": lambda name, code: {"returncode": -1, "unfinished": "deadline reached while running tests"},
+        "mutation_test": lambda name, code: pytest.fail("mutation testing after an unfinished run"),
+    })
+    [result] = outcome["results"]
+    assert result["skipped"] == ["test_rounds"]
+    assert result["unfinished"] == "deadline reached while running tests"
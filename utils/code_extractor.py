@@ -18,3 +18,27 @@ def extract_test_code(llm_response: str) -> dict:
         cleaned = cleaned.removesuffix("```").strip()
 
     return {"test_suite": cleaned, "status": "generated"}
+
+def is_valid_test_code(test_code: str) -> bool:
+    """
+    True if `test_code` parses and defines at least one test function with a
+    real check in it (assert or pytest.raises), i.e. not an empty stub or the
+    cleaner's placeholder.
+    """
+    import ast
+
+    if not isinstance(test_code, str) or not test_code.strip():
+        return False
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return False
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            for inner in ast.walk(node):
+                if isinstance(inner, ast.Assert):
+                    return True
+                if isinstance(inner, ast.Attribute) and inner.attr == "raises":
+                    return True
+    return False
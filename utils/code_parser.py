@@ -1,28 +1,43 @@
+import mmap
 import re
-from typing import List
+from typing import List, Tuple, Union
 
-def split_functions(code: str) -> List[str]:
+_FUNC_PATTERN = r"""
+    (
+        (?:^[ \t]*@.*\n)*                                 # Optional decorator(s)
+        ^[ \t]*def[ \t]+[a-zA-Z_][a-zA-Z0-9_]*[ \t]*\(.*\)[ \t]*:   # def line
+        (?:\n(?:^[ \t]+.*\n?)*)*                          # Function body (indented)
+    )
     """
-    Splits a Python source string into top-level function blocks.
-    Preserves decorators, docstrings, and inner indents.
-    Only returns non-nested, top-level functions.
+_FUNC_RE = re.compile(_FUNC_PATTERN, re.MULTILINE | re.VERBOSE)
+_FUNC_RE_BYTES = re.compile(_FUNC_PATTERN.encode("ascii"), re.MULTILINE | re.VERBOSE)
+
+def split_function_spans(code: Union[str, bytes]) -> List[Tuple[int, int]]:
+    """
+    Returns (start, end) offsets of each top-level function block in `code`.
+    Works on str (character offsets) or bytes (byte offsets), so callers can
+    slice a memory-mapped file without decoding it first.
+    Trailing whitespace is excluded from each span, matching split_functions.
     """
     if not code:
         return []
 
-    func_pattern = re.compile(
-        r"""
-        (
-            (?:^[ \t]*@.*\n)*                                 # Optional decorator(s)
-            ^[ \t]*def[ \t]+[a-zA-Z_][a-zA-Z0-9_]*[ \t]*\(.*\)[ \t]*:   # def line
-            (?:\n(?:^[ \t]+.*\n?)*)*                          # Function body (indented)
-        )
-        """,
-        re.MULTILINE | re.VERBOSE
-    )
+    func_re = _FUNC_RE_BYTES if isinstance(code, (bytes, bytearray, mmap.mmap)) else _FUNC_RE
+    spans = []
+    for match in func_re.finditer(code):
+        start, end = match.span(1)
+        block = match.group(1)
+        end -= len(block) - len(block.rstrip())
+        spans.append((start, end))
+    return spans
 
-    matches = func_pattern.findall(code)
-    return [func.rstrip() for func in matches]
+def split_functions(code: str) -> List[str]:
+    """
+    Splits a Python source string into top-level function blocks.
+    Preserves decorators, docstrings, and inner indents.
+    Only returns non-nested, top-level functions.
+    """
+    return [code[start:end] for start, end in split_function_spans(code)]
 
 def extract_function_signature(func_code: str) -> str:
     """
@@ -48,3 +63,17 @@ def extract_function_signature(func_code: str) -> str:
             return " ".join(signature_lines)
 
     return ""
+
+def extract_function_code(code: str, function_name: str) -> str:
+    """
+    Returns the source block of top-level function `function_name` in `code`,
+    or "" if it is not defined there.
+    """
+    pattern = re.compile(rf"^[ \t]*def[ \t]+{re.escape(function_name)}[ \t]*\(")
+    for func_code in split_functions(code):
+        for line in func_code.splitlines():
+            if not line.lstrip().startswith("@"):
+                if pattern.match(line):
+                    return func_code
+                break
+    return ""
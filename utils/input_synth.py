@@ -0,0 +1,197 @@
+import ast
+import random
+from typing import List, Optional, Tuple
+
+# Source expressions producing a value of each kind at size `n` from random.Random `rng`.
+# Kept as source so generated benchmark modules can embed them verbatim.
+_GENERATORS = {
+    "int": "rng.randint(1, max(1, n))",
+    "float": "rng.uniform(1.0, float(max(1, n)))",
+    "bool": "rng.random() < 0.5",
+    "str": "''.join(rng.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(n))",
+    "list[int]": "[rng.randint(-n, n) for _ in range(n)]",
+    "list[float]": "[rng.uniform(-n, n) for _ in range(n)]",
+    "list[str]": "[str(rng.randint(0, n)) for _ in range(n)]",
+    "tuple": "tuple(rng.randint(-n, n) for _ in range(n))",
+    "set": "set(rng.sample(range(2 * n + 1), n))",
+    "dict": "{i: rng.randint(-n, n) for i in range(n)}",
+}
+
+_ANNOTATION_KINDS = {
+    "int": "int", "float": "float", "bool": "bool", "str": "str",
+    "list": "list[int]", "List": "list[int]", "Sequence": "list[int]", "Iterable": "list[int]",
+    "tuple": "tuple", "Tuple": "tuple", "set": "set", "Set": "set", "frozenset": "set",
+    "dict": "dict", "Dict": "dict", "Mapping": "dict",
+}
+
+# Fallback when a parameter has no annotation: guess from its name
+_NAME_HINTS = (
+    (("n", "i", "j", "k", "count", "size", "num", "index", "idx", "length", "width", "height", "depth"), "int"),
+    (("items", "lst", "list", "arr", "array", "values", "nums", "numbers", "data", "seq", "xs"), "list[int]"),
+    (("s", "text", "string", "word", "name", "line", "msg", "message", "prefix", "suffix"), "str"),
+    (("flag", "enabled", "verbose"), "bool"),
+    (("mapping", "table", "counts", "d", "dct"), "dict"),
+    (("rate", "ratio", "weight", "prob", "alpha"), "float"),
+)
+
+
+def _annotation_kind(node) -> str:
+    if node is None:
+        return ""
+    if isinstance(node, ast.Name):
+        return _ANNOTATION_KINDS.get(node.id, "")
+    if isinstance(node, ast.Attribute):
+        return _ANNOTATION_KINDS.get(node.attr, "")
+    if isinstance(node, ast.Subscript):
+        outer = _annotation_kind(node.value)
+        if outer == "list[int]":
+            inner = _annotation_kind(node.slice)
+            if inner in ("float", "str"):
+                return f"list[{inner}]"
+        return outer
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        try:
+            return _annotation_kind(ast.parse(node.value, mode="eval").body)
+        except SyntaxError:
+            return ""
+    return ""
+
+
+def _name_kind(name: str) -> Optional[str]:
+    lowered = name.lower()
+    for names, kind in _NAME_HINTS:
+        if lowered in names or lowered.rstrip("s") in names:
+            return kind
+    return None
+
+
+# `+` and `*` also work on str/list operands, so on their own they only suggest a number
+_NUMERIC_OPS = (ast.Sub, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.Add, ast.Mult)
+# str/list evidence beats float, which beats int
+_KIND_RANK = {"int": 0, "float": 1, "str": 2, "list[int]": 2}
+
+
+def _constant_kind(node) -> Optional[str]:
+    if isinstance(node, ast.Constant) and not isinstance(node.value, bool):
+        if isinstance(node.value, int):
+            return "int"
+        if isinstance(node.value, float):
+            return "float"
+        if isinstance(node.value, str):
+            return "str"
+    if isinstance(node, ast.JoinedStr):
+        return "str"
+    if isinstance(node, (ast.List, ast.ListComp)):
+        return "list[int]"
+    return None
+
+
+def _usage_kinds(func, known: dict) -> dict:
+    """
+    Kinds implied by how the parameters not in `known` are used in the body:
+    arithmetic and comparisons with numbers suggest int (float once true
+    division or a float constant is involved); concatenation with a string
+    or list, subscripting and iteration suggest str/list.
+    """
+    found = {}
+
+    def note(node, kind):
+        if isinstance(node, ast.Name) and node.id not in known and kind:
+            if _KIND_RANK[kind] >= _KIND_RANK.get(found.get(node.id), -1):
+                found[node.id] = kind
+
+    def operand_kind(node):
+        if isinstance(node, ast.Name):
+            return known.get(node.id) or found.get(node.id)
+        return _constant_kind(node)
+
+    for node in ast.walk(func):
+        if isinstance(node, (ast.BinOp, ast.AugAssign)):
+            left = node.left if isinstance(node, ast.BinOp) else node.target
+            right = node.right if isinstance(node, ast.BinOp) else node.value
+            for side, other in ((left, right), (right, left)):
+                other_kind = operand_kind(other)
+                if other_kind in ("str", "list[int]") and isinstance(node.op, (ast.Add, ast.Mult, ast.Mod)):
+                    # s + t concatenates, s * n repeats, "%s" % x formats anything
+                    note(side, {ast.Add: other_kind, ast.Mult: "int"}.get(type(node.op)))
+                elif isinstance(node.op, ast.Div) or other_kind == "float":
+                    note(side, "float")
+                elif isinstance(node.op, _NUMERIC_OPS):
+                    note(side, "int")
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            note(node.operand, "int")
+        elif isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            numbers = [k for k in map(_constant_kind, operands) if k in ("int", "float")]
+            if numbers and not any(isinstance(op, (ast.In, ast.NotIn)) for op in node.ops):
+                for operand in operands:
+                    note(operand, "float" if "float" in numbers else "int")
+        elif isinstance(node, ast.Subscript):
+            note(node.value, "list[int]")
+        elif isinstance(node, (ast.For, ast.comprehension)):
+            note(node.iter, "list[int]")
+    return found
+
+
+def param_kinds(func_code: str, default: Optional[str] = "int") -> List[Tuple[str, Optional[str]]]:
+    """
+    Infers an input kind for each positional parameter of the (first) function
+    in `func_code`, from its type hint, its name or, failing both, how the
+    body uses it. Parameters with no evidence get `default`; pass None to tell
+    them apart from inferred ones.
+
+    Returns:
+        [(param_name, kind), ...] where kind is a key of _GENERATORS (or `default`).
+    """
+    try:
+        tree = ast.parse(func_code)
+    except SyntaxError:
+        return []
+    func = next((n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))), None)
+    if func is None:
+        return []
+    params = [a for a in func.args.posonlyargs + func.args.args if a.arg not in ("self", "cls")]
+    hinted = {a.arg: _annotation_kind(a.annotation) or _name_kind(a.arg) for a in params}
+    known = {name: kind for name, kind in hinted.items() if kind}
+    used = _usage_kinds(func, known)
+    return [(a.arg, hinted[a.arg] or used.get(a.arg) or default) for a in params]
+
+
+def kind_of_value(value, default: Optional[str] = "int") -> Optional[str]:
+    """Maps an observed argument value to an input kind (`default` for unrecognized types)."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, list):
+        if value and all(isinstance(v, float) for v in value):
+            return "list[float]"
+        if value and all(isinstance(v, str) for v in value):
+            return "list[str]"
+        return "list[int]"
+    if isinstance(value, tuple):
+        return "tuple"
+    if isinstance(value, (set, frozenset)):
+        return "set"
+    if isinstance(value, dict):
+        return "dict"
+    return default
+
+
+def generator_source(kind: str) -> str:
+    """Source expression (in terms of `n` and `rng`) producing a value of `kind`."""
+    return _GENERATORS.get(kind, _GENERATORS["int"])
+
+
+def make_value(kind: str, n: int, rng: random.Random):
+    """Builds one value of `kind` at size `n`."""
+    # n/rng go in globals so the comprehensions in the generator sources can see them
+    return eval(generator_source(kind), {"__builtins__": __builtins__, "n": n, "rng": rng})
+
+
+def make_args(kinds: List[str], n: int, rng: random.Random) -> tuple:
+    return tuple(make_value(kind, n, rng) for kind in kinds)